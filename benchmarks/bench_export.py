@@ -0,0 +1,70 @@
+# benchmarks/bench_export.py
+"""Потоковая выгрузка (todo/export.py): время и пиковая память на большом объёме.
+
+Запуск из корня проекта (нужен settings.json):
+    python benchmarks/bench_export.py --tasks 1000000 --output bench_export.json
+
+Для каждого формата выгрузка пишется в /dev/null так же, как её отдаёт
+StreamingHttpResponse, — по кускам из генератора. Пиковая память процесса (RSS)
+меряется до и после: при потоковой выгрузке прирост не зависит от числа задач.
+"""
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from common import seed, setup_django
+
+
+def peak_rss_mb():
+    # ru_maxrss в Linux — в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=1_000_000)
+    parser.add_argument('--comments', type=int, default=100_000)
+    parser.add_argument('--formats', default='csv,jsonl,xlsx')
+    parser.add_argument('--db', help="Путь к файлу SQLite (по умолчанию временный)")
+    parser.add_argument('--output', help="Куда сохранить JSON с результатами")
+    args = parser.parse_args()
+
+    db_path = Path(args.db or Path(tempfile.mkdtemp()) / 'bench.sqlite3')
+    setup_django(db_path)
+    print(f'База: {db_path}')
+    seed(users=200, tasks=args.tasks, comments=args.comments)
+
+    from todo import export
+    from todo.models import TaskModel
+
+    results = {'tasks': args.tasks, 'formats': {}}
+    for format_name in args.formats.split(','):
+        rss_before = peak_rss_mb()
+        started = time.perf_counter()
+        size = 0
+        _, content = export.export('tasks', format_name, TaskModel.objects.all())
+        with open(os.devnull, 'wb') as sink:
+            for chunk in content:
+                sink.write(chunk)
+                size += len(chunk)
+        elapsed = time.perf_counter() - started
+        results['formats'][format_name] = {
+            'seconds': round(elapsed, 2),
+            'mb': round(size / 1024 / 1024, 1),
+            'rows_per_second': round(args.tasks / elapsed),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'peak_rss_growth_mb': round(peak_rss_mb() - rss_before, 1),
+        }
+        print(f"{format_name:6} {elapsed:7.2f} с  {size / 1024 / 1024:8.1f} МБ  "
+              f"пик RSS {peak_rss_mb():.0f} МБ (+{peak_rss_mb() - rss_before:.0f})")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
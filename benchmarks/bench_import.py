@@ -0,0 +1,100 @@
+# benchmarks/bench_import.py
+"""Импорт задач (todo/importer.py): скорость и пиковая память на большом файле.
+
+Запуск из корня проекта (нужен settings.json):
+    python benchmarks/bench_import.py --rows 1000000 --output bench_import.json
+
+Генерирует CSV с --rows строками (каждая сотая — с неизвестным исполнителем), импортирует его через
+importer.import_tasks и печатает строки в секунду, число запросов на пачку и прирост
+пиковой памяти процесса (RSS). При потоковом импорте прирост не зависит от размера файла.
+"""
+import argparse
+import csv
+import json
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from common import seed, setup_django
+
+
+def peak_rss_mb():
+    # ru_maxrss в Linux — в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_csv(path, rows, users):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['title', 'assignee', 'deadline', 'priority', 'description'])
+        for i in range(rows):
+            assignee = f'bench_user_{i % users}' if i % 2 else f'bench_user_{i % users}@example.com'
+            writer.writerow([
+                f'Импортированная задача {i}', assignee if i % 100 != 1 else 'nobody',
+                '2026-12-01 18:00', 'high' if i % 3 else 'Средний', f'Описание задачи {i}',
+            ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--dry-run', action='store_true')
+    parser.add_argument('--db', help="Путь к файлу SQLite (по умолчанию временный)")
+    parser.add_argument('--output', help="Куда сохранить JSON с результатами")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp())
+    db_path = Path(args.db or workdir / 'bench.sqlite3')
+    setup_django(db_path)
+    print(f'База: {db_path}')
+    seed(users=args.users, tasks=0)
+
+    from django.conf import settings
+    from django.db import connection
+
+    from todo import importer
+    from todo.models import UserModel
+
+    source = workdir / 'tasks.csv'
+    write_csv(source, args.rows, args.users)
+    print(f'Файл: {source} ({source.stat().st_size / 1024 / 1024:.1f} МБ)')
+
+    # С DEBUG Django хранит текст последних запросов, а INSERT на пачку — это десятки КБ
+    settings.DEBUG = False
+    queries = 0
+
+    def count_queries(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    user = UserModel.objects.get(username='bench_manager')
+    rss_before = peak_rss_mb()
+    started = time.perf_counter()
+    with open(source, 'rb') as stream, connection.execute_wrapper(count_queries):
+        result = importer.import_tasks(stream, 'csv', user, dry_run=args.dry_run)
+    elapsed = time.perf_counter() - started
+
+    chunks = max(1, -(-result.created // importer.CHUNK_SIZE))
+    results = {
+        'rows': result.rows,
+        'created': result.created,
+        'errors': result.error_count,
+        'seconds': round(elapsed, 2),
+        'rows_per_second': round(result.rows / elapsed),
+        'queries': queries,
+        'queries_per_chunk': round(queries / chunks, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'peak_rss_growth_mb': round(peak_rss_mb() - rss_before, 1),
+    }
+    for key, value in results.items():
+        print(f'{key:20} {value}')
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/bench_indexes.py
+"""Сравнение горячих запросов к задачам с индексами из 0015 и без них.
+
+Запуск из корня проекта (нужен settings.json):
+    python benchmarks/bench_indexes.py --tasks 1000000 --output bench_indexes.json
+
+База создаётся во временном файле; рабочая db.sqlite3 не затрагивается.
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from common import explain, seed, setup_django, summarize
+
+# Индексы из миграции 0015 — их снимаем для замера «до»
+MIGRATION_INDEXES = [
+    'todo_task_active_assignee_idx',
+    'todo_task_created_idx',
+    'todo_task_assignee_created_idx',
+    'todo_task_assignee_updated_idx',
+]
+
+
+def endpoint_querysets(manager, employee):
+    """Запросы в том виде, в каком их строят представления и бот."""
+    from datetime import timedelta
+    from django.utils import timezone
+    from todo import views
+    from todo.models import TaskModel
+
+    active = TaskModel.ACTIVE_STATUSES
+    since = timezone.now() - timedelta(days=1)
+    return {
+        'api_tasks_employee': TaskModel.objects.filter(assignee=employee, status__in=active)
+            .order_by('-created_at').values_list(*views.TASK_API_FIELDS),
+        'api_tasks_manager': TaskModel.objects.filter(status__in=active)
+            .order_by('-created_at').values_list(*views.TASK_API_FIELDS, 'assignee__first_name'),
+        'api_tasks_delta_employee': TaskModel.objects.filter(assignee=employee, updated_at__gt=since)
+            .order_by('-created_at').values_list(*views.TASK_API_FIELDS),
+        'calendar_employee': TaskModel.objects.filter(assignee=employee, status__in=active)
+            .values_list('id', 'title', 'deadline', 'priority'),
+        'bot_user_tasks': TaskModel.objects.filter(assignee=employee, status__in=active),
+        'task_list_employee_page': TaskModel.objects.filter(assignee=employee).order_by('-created_at')[:10],
+        'task_list_manager_page': TaskModel.objects.order_by('-created_at')[:10],
+        'overdue_sweep': TaskModel.objects.filter(
+            status__in=TaskModel.OVERDUE_CANDIDATE_STATUSES, deadline__lt=timezone.now(),
+        ).order_by('deadline').values_list('id', 'assignee_id')[:500],
+    }
+
+
+def measure(querysets, iterations):
+    results = {}
+    for name, queryset in querysets.items():
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            list(queryset.all())  # .all() — свежая копия без кеша результатов
+            samples.append((time.perf_counter() - started) * 1000)
+        results[name] = {'plan': explain(queryset), **summarize(samples)}
+    return results
+
+
+def drop_indexes():
+    from django.db import connection
+    from todo.models import TaskModel
+
+    with connection.schema_editor() as editor:
+        for index in TaskModel._meta.indexes:
+            if index.name in MIGRATION_INDEXES:
+                editor.remove_index(TaskModel, index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--db', help="Путь к файлу SQLite (по умолчанию временный)")
+    parser.add_argument('--output', help="Куда сохранить JSON с результатами")
+    args = parser.parse_args()
+
+    db_path = Path(args.db or Path(tempfile.mkdtemp()) / 'bench.sqlite3')
+    setup_django(db_path)
+    print(f'База: {db_path}')
+    manager, employees = seed(users=args.users, tasks=args.tasks)
+
+    from django.db import connection
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    querysets = endpoint_querysets(manager, employees[0])
+    report = {'tasks': args.tasks, 'users': args.users, 'vendor': connection.vendor}
+    report['after'] = measure(querysets, args.iterations)
+    drop_indexes()
+    report['before'] = measure(querysets, args.iterations)
+
+    for name in querysets:
+        before, after = report['before'][name], report['after'][name]
+        print(f"{name:28} p50 {before['p50_ms']:>9.2f} → {after['p50_ms']:>9.2f} мс   "
+              f"p99 {before['p99_ms']:>9.2f} → {after['p99_ms']:>9.2f} мс")
+        print(f"{'':28} план: {' | '.join(after['plan'])}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_search.py
+"""Полнотекстовый поиск (todo/search.py) против icontains на большом объёме задач.
+
+Запуск из корня проекта (нужен settings.json):
+    python benchmarks/bench_search.py --tasks 1000000 --output bench_search.json
+
+Задачи получают случайные названия и описания из словаря ниже. Индекс строится
+командой rebuild_search_index (время тоже замеряется), затем для каждого запроса
+сравниваются search_task_ids() и запасной вариант на icontains.
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from common import seed, setup_django, summarize
+
+WORDS = (
+    'отчёт отчёты квартальный годовой бюджет продажи поставщик накладная сверка договор '
+    'клиент презентация релиз сервер база данных миграция резервная копия оплата счёт '
+    'закупка склад доставка маршрут встреча согласование юрист аудит налоговая декларация '
+    'сотрудник отпуск график дежурство инцидент мониторинг тестирование ошибка исправление'
+).split()
+
+QUERIES = ['отчёт', 'квартальных отчётов', 'накладные поставщиков', 'миграции базы данных', 'несуществующееслово']
+
+
+def texts(rnd, number):
+    title = ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(2, 5))).capitalize()
+    description = ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(10, 40)))
+    return f'{title} №{number}', description
+
+
+def timed(func, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--fallback-iterations', type=int, default=3, help="icontains на миллионе задач медленный")
+    parser.add_argument('--db', help="Путь к файлу SQLite (по умолчанию временный)")
+    parser.add_argument('--output', help="Куда сохранить JSON с результатами")
+    args = parser.parse_args()
+
+    db_path = Path(args.db or Path(tempfile.mkdtemp()) / 'bench.sqlite3')
+    setup_django(db_path)
+    print(f'База: {db_path}')
+    manager, employees = seed(users=args.users, tasks=args.tasks, texts=texts)
+
+    from django.db import connection
+    from todo import search
+
+    report = {'tasks': args.tasks, 'users': args.users, 'vendor': connection.vendor, 'queries': {}}
+    started = time.perf_counter()
+    search.rebuild(batch_size=5000, log=lambda line: None)
+    report['index_build_seconds'] = round(time.perf_counter() - started, 1)
+    print(f"Индекс построен за {report['index_build_seconds']} с")
+
+    for query in QUERIES:
+        entry = {}
+        for role, user in (('manager', manager), ('employee', employees[0])):
+            ids, indexed = timed(lambda: search.search_task_ids(user, query, 20), args.iterations)
+            _, fallback = timed(lambda: search._fallback_ids(user, query, 20), args.fallback_iterations)
+            entry[role] = {'found': len(ids), 'index': indexed, 'icontains': fallback}
+            print(f"{query[:26]:26} {role:8} индекс p50 {indexed['p50_ms']:>9.2f} мс   "
+                  f"icontains p50 {fallback['p50_ms']:>10.2f} мс   найдено {len(ids)}")
+        report['queries'][query] = entry
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
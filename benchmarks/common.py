@@ -0,0 +1,140 @@
+# benchmarks/common.py
+"""Общие помощники для бенчмарков: отдельная БД, массовое наполнение, замеры."""
+import os
+import random
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup_django(db_path, migrate=True):
+    """Поднимает Django на отдельном файле SQLite, чтобы не трогать рабочую базу."""
+    sys.path.insert(0, str(ROOT))
+    os.chdir(ROOT)  # settings.json ищется относительно текущего каталога
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todo_comp.settings')
+    import django
+    from django.conf import settings
+
+    for database in settings.DATABASES.values():
+        database['NAME'] = str(db_path)
+    settings.ALLOWED_HOSTS = ['*']
+    settings.STORAGES['staticfiles']['BACKEND'] = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    django.setup()
+
+    if migrate:
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+
+
+@contextmanager
+def raw_timestamps(model, *field_names):
+    """Отключает auto_now/auto_now_add, чтобы bulk_create сохранил заданные даты."""
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def seed(users=50, tasks=10_000, comments=0, files=0, batch_size=5_000, seed_value=42, log=print, texts=None):
+    """Наполняет базу через bulk_create. Возвращает (manager, employees).
+
+    texts(rnd, number) → (название, описание); по умолчанию тексты у всех задач одинаковые.
+    """
+    from django.utils import timezone
+    from todo.models import Comment, TaskFile, TaskModel, UserModel
+
+    rnd = random.Random(seed_value)
+    manager = UserModel.objects.create(
+        username='bench_manager', email='bench_manager@example.com', first_name='Руководитель',
+        role='manager', password='!',
+    )
+    employees = UserModel.objects.bulk_create(
+        UserModel(
+            username=f'bench_user_{i}', email=f'bench_user_{i}@example.com', first_name=f'Сотрудник {i}',
+            role='employee', password='!',
+        )
+        for i in range(users)
+    )
+
+    now = timezone.now()
+    statuses = ['new', 'in_progress', 'completed', 'overdue']
+    status_weights = [2, 2, 5, 1]
+    priorities = [code for code, _ in TaskModel.PRIORITY_CHOICES]
+    started = time.perf_counter()
+    with raw_timestamps(TaskModel, 'created_at', 'updated_at'):
+        for offset in range(0, tasks, batch_size):
+            chunk = []
+            for _ in range(min(batch_size, tasks - offset)):
+                created_at = now - timedelta(minutes=rnd.randint(0, 365 * 24 * 60))
+                number = offset + len(chunk)
+                title, description = (
+                    texts(rnd, number) if texts else (f'Задача {number}', 'Описание задачи для нагрузочного теста')
+                )
+                chunk.append(TaskModel(
+                    title=title,
+                    description=description,
+                    assignee=rnd.choice(employees),
+                    created_by=manager,
+                    created_at=created_at,
+                    updated_at=created_at,
+                    deadline=created_at + timedelta(days=rnd.randint(1, 60)),
+                    priority=rnd.choice(priorities),
+                    status=rnd.choices(statuses, status_weights)[0],
+                ))
+            TaskModel.objects.bulk_create(chunk)
+            log(f'  задачи: {offset + len(chunk)}/{tasks}')
+    log(f'  наполнение задач: {time.perf_counter() - started:.1f} с')
+
+    if comments or files:
+        task_ids = list(TaskModel.objects.values_list('id', flat=True))
+        people = [manager] + employees
+        with raw_timestamps(Comment, 'created_at'):
+            for offset in range(0, comments, batch_size):
+                Comment.objects.bulk_create(
+                    Comment(task_id=rnd.choice(task_ids), author=rnd.choice(people), text='Комментарий', created_at=now)
+                    for _ in range(min(batch_size, comments - offset))
+                )
+        for offset in range(0, files, batch_size):
+            TaskFile.objects.bulk_create(
+                TaskFile(task_id=rnd.choice(task_ids), file=f'task_files/bench_{offset + i}.txt')
+                for i in range(min(batch_size, files - offset))
+            )
+    return manager, employees
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples_ms):
+    return {
+        'count': len(samples_ms),
+        'p50_ms': round(percentile(samples_ms, 50), 3),
+        'p95_ms': round(percentile(samples_ms, 95), 3),
+        'p99_ms': round(percentile(samples_ms, 99), 3),
+        'max_ms': round(max(samples_ms), 3),
+        'mean_ms': round(statistics.fmean(samples_ms), 3),
+    }
+
+
+def explain(queryset):
+    """План выполнения запроса для текущей СУБД."""
+    from django.db import connection
+
+    sql, params = queryset.query.sql_with_params()
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        return [' '.join(str(col) for col in row) for row in cursor.fetchall()]
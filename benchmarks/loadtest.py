@@ -0,0 +1,311 @@
+# benchmarks/loadtest.py
+"""Нагрузочный тест горячих страниц и обработчиков бота, полностью офлайн.
+
+Запуск из корня проекта (нужен settings.json):
+    python benchmarks/loadtest.py --tasks 100000 --concurrency 1,4,16 --output load_$(git rev-parse --short HEAD).json
+    python benchmarks/loadtest.py ... --compare load_abc1234.json   # сравнить с прошлым прогоном
+
+База наполняется через bulk_create во временном файле SQLite. HTTP-запросы идут через
+django.test.Client из N потоков (в процессе, без сети — измеряется сам Django + БД),
+бот — через Application.process_update с локальным FakeTelegramServer вместо Telegram.
+
+Для каждого сценария и уровня параллельности в JSON попадают пропускная способность,
+перцентили задержки, число SQL на запрос и ошибки. С --compare выводятся изменения
+относительно базового файла; код выхода 1, если p95 вырос больше чем на --threshold %.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from common import ROOT, seed, setup_django, summarize
+
+HTTP_SCENARIOS = ('task_list', 'api_tasks', 'calendar', 'task_detail')
+BOT_SCENARIOS = ('bot_tasks', 'bot_page')
+TELEGRAM_ID_OFFSET = 100_000
+
+
+class QueryCounter:
+    """execute_wrapper, считающий SQL в своём потоке."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def scenario_url(name, user, visible_ids, rnd):
+    if name == 'task_list':
+        return '/tasks/'
+    if name == 'api_tasks':
+        return '/api/tasks/'
+    if name == 'calendar':
+        return '/api/calendar-events/'
+    return f'/tasks/{rnd.choice(visible_ids[user.pk])}/'
+
+
+def run_http(name, users, visible_ids, concurrency, total, seed_value):
+    from django.db import connection
+    from django.test import Client
+
+    clients = []
+    for i in range(concurrency):
+        user = users[i % len(users)]
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        clients.append((client, user))
+
+    lock = threading.Lock()
+    remaining = [total]
+    latencies, queries, errors = [], [], []
+
+    def worker(index):
+        client, user = clients[index]
+        rnd = random.Random(seed_value + index)
+        counter = QueryCounter()
+        try:
+            with connection.execute_wrapper(counter):
+                while True:
+                    with lock:
+                        if remaining[0] <= 0:
+                            return
+                        remaining[0] -= 1
+                    url = scenario_url(name, user, visible_ids, rnd)
+                    before = counter.count
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    b''.join(response) if response.streaming else response.content
+                    elapsed = (time.perf_counter() - started) * 1000
+                    with lock:
+                        latencies.append(elapsed)
+                        queries.append(counter.count - before)
+                        if response.status_code >= 400:
+                            errors.append(f'{response.status_code} {url}')
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return result(latencies, time.perf_counter() - started, sum(queries), errors)
+
+
+def run_bot(name, telegram_ids, concurrency, total, seed_value, telegram_latency):
+    from django.db.backends.utils import CursorWrapper
+    from telegram import Update
+    from telegram.ext import Application
+    from todo import bot as bot_module
+    from todo.fake_telegram import FakeTelegramServer
+
+    rnd = random.Random(seed_value)
+
+    def update(number, telegram_id, callback):
+        user = {'id': telegram_id, 'is_bot': False, 'first_name': 'Bench'}
+        chat = {'id': telegram_id, 'type': 'private'}
+        message = {'message_id': 1, 'date': 0, 'chat': chat, 'from': user, 'text': '📋 Мои задачи'}
+        if callback:
+            return {'update_id': number, 'callback_query': {
+                'id': str(number), 'from': user, 'chat_instance': '1', 'message': message, 'data': 'page_1',
+            }}
+        return {'update_id': number, 'message': message}
+
+    async def drive():
+        latencies, errors = [], []
+        with FakeTelegramServer(latency=telegram_latency) as server:
+            application = Application.builder().token('123:abc').base_url(server.base_url).updater(None).build()
+            bot_module.register_handlers(application)
+            async with application:
+                # Прогрев: каждый чат один раз открывает список — заодно кэш пользователей бота
+                # и сохранённый список, по которому листаются страницы в bot_page
+                for number, telegram_id in enumerate(telegram_ids):
+                    await application.process_update(Update.de_json(update(number, telegram_id, False), application.bot))
+                counter.count = 0
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def one(number):
+                    async with semaphore:
+                        payload = update(TELEGRAM_ID_OFFSET + number, rnd.choice(telegram_ids), name == 'bot_page')
+                        started = time.perf_counter()
+                        try:
+                            await application.process_update(Update.de_json(payload, application.bot))
+                        except Exception as exc:
+                            errors.append(repr(exc))
+                        latencies.append((time.perf_counter() - started) * 1000)
+
+                started = time.perf_counter()
+                await asyncio.gather(*(one(number) for number in range(total)))
+                wall = time.perf_counter() - started
+        return result(latencies, wall, counter.count, errors)
+
+    # Соединения sync_to_async привязаны к контексту задачи, а не к потоку, поэтому SQL
+    # считаем на уровне курсора: во время сценария других запросов к БД нет
+    counter = QueryCounter()
+    original = CursorWrapper._execute_with_wrappers
+
+    def counting(self, sql, params, many, executor):
+        counter.count += 1
+        return original(self, sql, params, many, executor)
+
+    CursorWrapper._execute_with_wrappers = counting
+    try:
+        return asyncio.run(drive())
+    finally:
+        CursorWrapper._execute_with_wrappers = original
+
+
+def result(latencies, wall, query_total, errors):
+    return {
+        **summarize(latencies),
+        'throughput_rps': round(len(latencies) / wall, 1) if wall else None,
+        'queries_per_request': round(query_total / len(latencies), 2) if latencies else None,
+        'errors': len(errors),
+        'error_samples': sorted(set(errors))[:5],
+    }
+
+
+def prepare(args):
+    """Наполняет базу и готовит пользователей для сценариев."""
+    from django.db import connection
+    from todo.models import TaskModel, TelegramUserModel
+
+    manager, employees = seed(
+        users=args.users, tasks=args.tasks, comments=args.comments, files=args.files, seed_value=args.seed,
+    )
+    TelegramUserModel.objects.bulk_create(
+        TelegramUserModel(user=employee, telegram_id=str(TELEGRAM_ID_OFFSET + i))
+        for i, employee in enumerate(employees)
+    )
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    rnd = random.Random(args.seed)
+    sample = rnd.sample(employees, min(len(employees), 20))
+    # Для страницы задачи берём id, которые пользователь действительно может открыть
+    visible_ids = {manager.pk: list(TaskModel.objects.order_by('?').values_list('pk', flat=True)[:500])}
+    for employee in sample:
+        visible_ids[employee.pk] = list(TaskModel.objects.filter(assignee=employee).values_list('pk', flat=True)[:500])
+    sample = [employee for employee in sample if visible_ids[employee.pk]]
+    # Каждый пятый клиент — руководитель: его списки самые тяжёлые
+    users = [manager if i % 5 == 0 else sample[i % len(sample)] for i in range(max(args.concurrency))]
+    telegram_ids = [TELEGRAM_ID_OFFSET + employees.index(employee) for employee in sample]
+    return users, visible_ids, telegram_ids
+
+
+def environment():
+    import django
+    from django.db import connection
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    with connection.cursor() as cursor:
+        cursor.execute('select sqlite_version()' if connection.vendor == 'sqlite' else 'select version()')
+        db_version = cursor.fetchone()[0]
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': f'{connection.vendor} {db_version}',
+        'platform': platform.platform(),
+    }
+
+
+def compare(report, baseline, threshold):
+    """Печатает изменения относительно baseline; True, если есть регрессия p95."""
+    regressed = False
+    print(f"\nСравнение с {baseline.get('environment', {}).get('commit') or 'базой'}:")
+    for name, levels in report['results'].items():
+        for level, current in levels.items():
+            before = baseline.get('results', {}).get(name, {}).get(level)
+            if not before:
+                continue
+            change = (current['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+            mark = ''
+            if change > threshold:
+                mark, regressed = '  ← регрессия', True
+            print(
+                f"  {name:12} x{level:<3} p95 {before['p95_ms']:>8.2f} → {current['p95_ms']:>8.2f} мс ({change:+.0f}%)  "
+                f"rps {before['throughput_rps']} → {current['throughput_rps']}  "
+                f"SQL {before['queries_per_request']} → {current['queries_per_request']}{mark}"
+            )
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=100_000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--comments', type=int, default=50_000)
+    parser.add_argument('--files', type=int, default=10_000)
+    parser.add_argument('--concurrency', default='1,4,16', help="Уровни параллельности через запятую")
+    parser.add_argument('--requests', type=int, default=300, help="Запросов на сценарий и уровень")
+    parser.add_argument('--scenarios', default=','.join(HTTP_SCENARIOS + BOT_SCENARIOS))
+    parser.add_argument('--telegram-latency', type=float, default=0.0, help="Задержка фейкового Telegram API, с")
+    parser.add_argument('--no-render-cache', action='store_true', help="Выключить кэш JSON (TODO_RENDER_CACHE)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', help="Путь к файлу SQLite (по умолчанию временный)")
+    parser.add_argument('--output', help="Куда сохранить JSON с результатами")
+    parser.add_argument('--compare', help="JSON прошлого прогона для сравнения")
+    parser.add_argument('--threshold', type=float, default=20.0, help="Допустимый рост p95, %%")
+    args = parser.parse_args()
+    args.concurrency = [int(level) for level in args.concurrency.split(',')]
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(HTTP_SCENARIOS + BOT_SCENARIOS)
+    if unknown:
+        parser.error(f"неизвестные сценарии: {', '.join(sorted(unknown))}")
+
+    db_path = Path(args.db or Path(tempfile.mkdtemp()) / 'loadtest.sqlite3')
+    setup_django(db_path)
+    from django.conf import settings
+    if args.no_render_cache:
+        settings.TODO_RENDER_CACHE = None
+    print(f'База: {db_path}')
+    users, visible_ids, telegram_ids = prepare(args)
+
+    report = {
+        'environment': environment(),
+        'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'db')},
+        'results': {},
+    }
+    for name in scenarios:
+        report['results'][name] = {}
+        for level in args.concurrency:
+            # Прогрев: первые запросы заполняют кэши и план запросов
+            if name in HTTP_SCENARIOS:
+                run_http(name, users, visible_ids, level, min(level * 2, args.requests), args.seed)
+                stats = run_http(name, users, visible_ids, level, args.requests, args.seed)
+            else:
+                stats = run_bot(name, telegram_ids, level, args.requests, args.seed, args.telegram_latency)
+            report['results'][name][str(level)] = stats
+            print(
+                f"{name:12} x{level:<3} {stats['throughput_rps']:>8} rps  p50 {stats['p50_ms']:>8.2f}  "
+                f"p95 {stats['p95_ms']:>8.2f}  p99 {stats['p99_ms']:>8.2f} мс  SQL/запрос {stats['queries_per_request']}"
+                + (f"  ошибок {stats['errors']}" if stats['errors'] else '')
+            )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
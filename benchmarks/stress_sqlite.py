@@ -0,0 +1,199 @@
+# benchmarks/stress_sqlite.py
+"""Стресс-тест SQLite при смешанной нагрузке: нет ли «database is locked».
+
+Запуск из корня проекта (нужен settings.json):
+    python benchmarks/stress_sqlite.py --duration 30 --processes 4
+    python benchmarks/stress_sqlite.py --duration 30 --legacy   # прежняя конфигурация для сравнения
+
+В каждом процессе одновременно работают: читатели страниц (через django.test.Client,
+read-only view идут через алиас 'read'), писатели (правка задач, комментарии, новые
+задачи), «бот» (завершение задач) и sweep_overdue. Несколько процессов — как
+gunicorn-воркеры плюс отдельный run_bot.
+
+Код выхода 1, если была хоть одна ошибка блокировки.
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path
+
+from common import seed, setup_django
+
+READ_URLS = ('/api/tasks/', '/api/calendar-events/', '/tasks/', '/history/')
+
+
+def configure(legacy):
+    """legacy — настройки до WAL: DEFERRED-транзакции, 5 с ожидания, одно соединение."""
+    from django.conf import settings
+
+    settings.TODO_RENDER_CACHE = None  # каждый запрос должен дойти до БД
+    if legacy:
+        for alias in ('default', 'read'):
+            settings.DATABASES[alias]['OPTIONS'] = {}
+            settings.DATABASES[alias]['CONN_MAX_AGE'] = 0
+        settings.DATABASES.pop('read')
+
+
+def classify(exc):
+    text = str(exc)
+    return 'locked' if 'locked' in text or 'busy' in text else type(exc).__name__
+
+
+def run_role(name, stop, stats, lock, body):
+    from django.db import close_old_connections, connection
+
+    rnd = random.Random()
+    try:
+        while not stop.is_set():
+            try:
+                body(rnd)
+                outcome = 'ok'
+            except Exception as exc:
+                outcome = classify(exc)
+            with lock:
+                stats[(name, outcome)] += 1
+            close_old_connections()
+    finally:
+        connection.close()
+
+
+def workload(args):
+    """Все роли одного процесса; возвращает Counter((роль, исход) → число)."""
+    from django.test import Client
+    from django.utils import timezone
+    from todo.bot import complete_task
+    from todo.models import Comment, TaskModel, UserModel
+    from todo.overdue import sweep_overdue
+
+    users = list(UserModel.objects.all())
+    manager = next(user for user in users if user.role == 'manager')
+    employees = [user for user in users if user.role == 'employee']
+    task_ids = list(TaskModel.objects.values_list('pk', flat=True))
+
+    def reader(index):
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(manager if index % 3 == 0 else employees[index % len(employees)])
+
+        def body(rnd):
+            response = client.get(rnd.choice(READ_URLS))
+            if response.status_code >= 400:
+                raise RuntimeError(f'HTTP {response.status_code}')
+        return body
+
+    def writer(rnd):
+        action = rnd.random()
+        if action < 0.4:
+            task = TaskModel.objects.get(pk=rnd.choice(task_ids))
+            task.priority = rnd.choice(['low', 'medium', 'high', 'urgent'])
+            task.save()
+        elif action < 0.8:
+            Comment.objects.create(task_id=rnd.choice(task_ids), author=rnd.choice(employees), text='Нагрузочный комментарий')
+        else:
+            # Дедлайн через секунду — через секунду задачу подхватит sweep_overdue
+            TaskModel.objects.create(
+                title='Новая задача', assignee=rnd.choice(employees), created_by=manager,
+                deadline=timezone.now() + timedelta(seconds=1),
+            )
+
+    def bot(rnd):
+        employee = rnd.choice(employees)
+        ids = list(TaskModel.objects.filter(assignee=employee, status__in=TaskModel.ACTIVE_STATUSES).values_list('pk', flat=True)[:20])
+        if ids:
+            complete_task(employee, rnd.choice(ids))
+
+    def sweeper(rnd):
+        sweep_overdue()
+        time.sleep(0.2)
+
+    stop = threading.Event()
+    stats = Counter()
+    lock = threading.Lock()
+    roles = [('reader', reader(i)) for i in range(args.readers)]
+    roles += [('writer', writer)] * args.writers + [('bot', bot), ('sweeper', sweeper)]
+    threads = [
+        threading.Thread(target=run_role, args=(name, stop, stats, lock, body), daemon=True)
+        for name, body in roles
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return stats
+
+
+def drain_event_bus(timeout=30):
+    """Ждёт, пока подписчики шины разберут очереди: иначе процесс завершится посреди обработки."""
+    from todo import events
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not any(metrics['queue_depth'] for metrics in events.bus.metrics().values()):
+            return
+        time.sleep(0.1)
+
+
+def child(args, db_path, queue):
+    setup_django(db_path, migrate=False)
+    configure(args.legacy)
+    stats = workload(args)
+    drain_event_bus()
+    queue.put(dict((f'{name}:{outcome}', n) for (name, outcome), n in stats.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=20, help="Секунд нагрузки")
+    parser.add_argument('--processes', type=int, default=2)
+    parser.add_argument('--readers', type=int, default=4, help="Потоков-читателей на процесс")
+    parser.add_argument('--writers', type=int, default=2, help="Потоков-писателей на процесс")
+    parser.add_argument('--tasks', type=int, default=5_000)
+    parser.add_argument('--legacy', action='store_true', help="Без WAL, DEFERRED-транзакции, без алиаса 'read'")
+    parser.add_argument('--output', help="Куда сохранить JSON с результатами")
+    args = parser.parse_args()
+
+    db_path = Path(tempfile.mkdtemp()) / 'stress.sqlite3'
+    setup_django(db_path)
+    configure(args.legacy)
+    seed(users=30, tasks=args.tasks, comments=1_000, log=lambda message: None)
+    from django.db import connection
+    with connection.cursor() as cursor:
+        # Режим журнала хранится в самом файле: миграции уже перевели его в WAL
+        cursor.execute('PRAGMA journal_mode=DELETE' if args.legacy else 'PRAGMA journal_mode')
+        journal_mode = cursor.fetchone()[0]
+    connection.close()
+    print(f'База: {db_path} (journal_mode={journal_mode})')
+
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    processes = [context.Process(target=child, args=(args, db_path, queue)) for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    totals = Counter()
+    for _ in processes:
+        totals.update(queue.get())
+    for process in processes:
+        process.join()
+
+    errors = {key: n for key, n in totals.items() if not key.endswith(':ok')}
+    locked = sum(n for key, n in errors.items() if key.endswith(':locked'))
+    for key in sorted(totals):
+        print(f'  {key:24} {totals[key]:>8}  ({totals[key] / args.duration:.0f}/с)')
+    print(f'Ошибок блокировки: {locked}, прочих ошибок: {sum(errors.values()) - locked}')
+    if args.output:
+        report = {'legacy': args.legacy, 'journal_mode': journal_mode, 'duration': args.duration,
+                  'processes': args.processes, 'counts': dict(totals), 'locked_errors': locked}
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    sys.exit(1 if locked else 0)
+
+
+if __name__ == '__main__':
+    main()
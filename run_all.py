@@ -16,11 +16,17 @@ def main():
         execute_from_command_line([sys.argv[0], "runserver", "127.0.0.1:8000"])
         return
 
-    # Это основной процесс — запускаем и бота, и сервер
-    from todo.telegram_bot import start_bot
-    bot_thread = threading.Thread(target=start_bot, daemon=True)
+    # Это основной процесс — запускаем и бота, и сервер.
+    # Режим — как у run_bot: при установленном webhook polling получал бы ошибку от getUpdates
+    from todo.bot_runner import run as run_bot
+    bot_thread = threading.Thread(target=run_bot, kwargs={'mode': settings.TELEGRAM_BOT_MODE}, daemon=True)
     bot_thread.start()
 
+    # Фоновая отметка просроченных задач (вместо UPDATE на каждом GET)
+    from todo.overdue import run_forever
+    sweeper_thread = threading.Thread(target=run_forever, daemon=True)
+    sweeper_thread.start()
+
     execute_from_command_line([sys.argv[0], "runserver", "127.0.0.1:8000"])
 
 if __name__ == "__main__":
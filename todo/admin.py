@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserModel, TaskModel, TelegramUserModel
+from .models import FileBlob, NotificationOutbox, UserModel, TaskModel, TelegramUserModel
 
 # Register your models here.
 class UserAdmin(admin.ModelAdmin):
@@ -16,8 +16,18 @@ class TelegramUserAdmin(admin.ModelAdmin):
     list_display = ['user', 'telegram_id', 'is_active']
     search_fields = ['user__username', 'telegram_id']
 
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ['chat_id', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['chat_id', 'text']
+
+class FileBlobAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'size', 'ref_count', 'created_at']
+    search_fields = ['sha256']
 
     
 admin.site.register(UserModel, UserAdmin)
 admin.site.register(TaskModel, TaskAdmin)
 admin.site.register(TelegramUserModel, TelegramUserAdmin)
+admin.site.register(NotificationOutbox, NotificationOutboxAdmin)
+admin.site.register(FileBlob, FileBlobAdmin)
@@ -6,3 +6,6 @@ class TodoConfig(AppConfig):
 
     def ready(self):
         import todo.signals  # ← важно!
+        import todo.consumers  # подписчики шины событий
+        from todo_comp import config
+        config.install_reload_handler()  # SIGHUP — перечитать settings.json
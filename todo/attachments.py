@@ -0,0 +1,224 @@
+# todo/attachments.py
+"""Хранилище вложений с дедупликацией по содержимому.
+
+Каждый уникальный файл лежит один раз в blobs/ab/cd/<sha256> (модель FileBlob), а
+TaskFile ссылается на него и хранит исходное имя. Счётчик ссылок FileBlob.ref_count
+увеличивает attach(), уменьшает сигнал post_delete у TaskFile; блобы без ссылок
+удаляет collect_garbage() (команда gc_attachments).
+
+Файлы читаются и хэшируются порциями — целиком в памяти они не бывают ни при обычной
+загрузке формы, ни при загрузке по частям (UploadSession).
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import FileBlob, TaskFile, UploadSession
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 1024 * 1024
+# Блоб без ссылок удаляется не сразу: его может подхватить параллельная загрузка
+ORPHAN_GRACE = timedelta(hours=1)
+# Брошенные загрузки по частям
+STALE_UPLOAD_AGE = timedelta(days=1)
+
+
+def max_upload_size():
+    return getattr(settings, 'TODO_UPLOAD_MAX_SIZE', 512 * 1024 * 1024)
+
+
+def upload_chunk_size():
+    return getattr(settings, 'TODO_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)
+
+
+def upload_temp_dir():
+    return str(getattr(settings, 'TODO_UPLOAD_TEMP_DIR', os.path.join(settings.MEDIA_ROOT, 'uploads')))
+
+
+def blob_path(sha256):
+    return f'blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}'
+
+
+def hash_file(fileobj):
+    """SHA-256 и размер, читая файл порциями."""
+    digest = hashlib.sha256()
+    size = 0
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(READ_CHUNK_SIZE), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest(), size
+
+
+def store_blob(fileobj):
+    """Возвращает FileBlob с содержимым fileobj, записывая файл только если такого ещё нет."""
+    sha256, size = hash_file(fileobj)
+    if size > max_upload_size():
+        raise ValidationError(f"Файл больше допустимых {max_upload_size() // (1024 * 1024)} МБ.")
+    blob = FileBlob.objects.filter(pk=sha256).first()
+    if blob is not None:
+        return blob
+
+    path = blob_path(sha256)
+    if not default_storage.exists(path):
+        saved = default_storage.save(path, File(fileobj))
+        if saved != path:
+            # Файл с этим хэшем успел записать параллельный запрос — копия не нужна
+            default_storage.delete(saved)
+    blob, _ = FileBlob.objects.get_or_create(pk=sha256, defaults={'file': path, 'size': size})
+    return blob
+
+
+def attach(task, blob, name):
+    """Создаёт TaskFile на готовый блоб и увеличивает счётчик ссылок."""
+    with transaction.atomic():
+        if not FileBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1):
+            # Блоб только что удалил collect_garbage
+            raise FileBlob.DoesNotExist(blob.pk)
+        return TaskFile.objects.create(task=task, blob=blob, file=blob.file.name, original_name=os.path.basename(name)[:255])
+
+
+def store_and_attach(task, fileobj, name):
+    try:
+        return attach(task, store_blob(fileobj), name)
+    except FileBlob.DoesNotExist:
+        return attach(task, store_blob(fileobj), name)
+
+
+def attach_uploaded_file(task, uploaded_file):
+    """Вложение из обычной формы (request.FILES)."""
+    return store_and_attach(task, uploaded_file, uploaded_file.name)
+
+
+def release(task_file):
+    """Вызывается после удаления TaskFile (см. signals.release_blob_on_delete)."""
+    if task_file.blob_id:
+        FileBlob.objects.filter(pk=task_file.blob_id).update(ref_count=F('ref_count') - 1)
+
+
+# === Загрузка по частям ===
+
+class UploadOffsetMismatch(Exception):
+    def __init__(self, expected):
+        super().__init__(f"Ожидался offset {expected}")
+        self.expected = expected
+
+
+def session_path(session):
+    return os.path.join(upload_temp_dir(), f'{session.pk}.part')
+
+
+def start_upload(user, filename, size):
+    if size < 0 or size > max_upload_size():
+        raise ValidationError(f"Файл больше допустимых {max_upload_size() // (1024 * 1024)} МБ.")
+    session = UploadSession.objects.create(user=user, filename=os.path.basename(filename)[:255], size=size)
+    os.makedirs(upload_temp_dir(), exist_ok=True)
+    open(session_path(session), 'wb').close()
+    return session
+
+
+def append_chunk(session, offset, stream):
+    """Дописывает часть из потока (обычно сам request) и возвращает новый offset.
+
+    Часть принимается, только если она продолжает уже полученные данные — так повтор
+    после обрыва не испортит файл. Тело читается во временный файл вне транзакции:
+    медленный клиент не держит блокировку записи SQLite. Затем offset сдвигается
+    условным UPDATE; проигравший параллельный запрос получает UploadOffsetMismatch,
+    и в файл загрузки попадает только часть победителя.
+    """
+    if offset != session.offset:
+        raise UploadOffsetMismatch(session.offset)
+    limit = upload_chunk_size()
+    fd, chunk_path = tempfile.mkstemp(dir=upload_temp_dir(), prefix=f'{session.pk}.', suffix='.chunk')
+    try:
+        with os.fdopen(fd, 'w+b') as chunk_file:
+            written = 0
+            for chunk in iter(lambda: stream.read(READ_CHUNK_SIZE), b''):
+                written += len(chunk)
+                if written > limit or offset + written > session.size:
+                    raise ValidationError("Часть больше допустимого размера.")
+                chunk_file.write(chunk)
+
+            advanced = UploadSession.objects.filter(pk=session.pk, offset=offset).update(
+                offset=F('offset') + written, updated_at=timezone.now(),
+            )
+            if not advanced:
+                current = UploadSession.objects.filter(pk=session.pk).values_list('offset', flat=True).first()
+                if current is None:
+                    raise UploadSession.DoesNotExist(session.pk)
+                raise UploadOffsetMismatch(current)
+
+            chunk_file.seek(0)
+            with open(session_path(session), 'r+b') as part:
+                part.seek(offset)
+                shutil.copyfileobj(chunk_file, part, READ_CHUNK_SIZE)
+    finally:
+        os.remove(chunk_path)
+    session.offset = offset + written
+    return session.offset
+
+
+def complete_upload(session, task):
+    """Превращает полностью полученную загрузку во вложение задачи."""
+    # Последняя часть могла уже сдвинуть offset, но ещё дописываться в файл
+    if session.offset != session.size or os.path.getsize(session_path(session)) != session.size:
+        raise UploadOffsetMismatch(session.offset)
+    with open(session_path(session), 'rb') as part:
+        task_file = store_and_attach(task, part, session.filename)
+    discard_upload(session)
+    return task_file
+
+
+def discard_upload(session):
+    try:
+        os.remove(session_path(session))
+    except FileNotFoundError:
+        pass
+    session.delete()
+
+
+# === Сборка мусора ===
+
+def collect_garbage(now=None, grace=ORPHAN_GRACE, recount=False):
+    """Удаляет блобы без ссылок и брошенные загрузки. Возвращает (блобов, загрузок)."""
+    now = now or timezone.now()
+    if recount:
+        # Чинит счётчики, если они разошлись с реальностью (например, после ручных правок в БД)
+        for blob in FileBlob.objects.all().iterator():
+            actual = blob.task_files.count()
+            if actual != blob.ref_count:
+                FileBlob.objects.filter(pk=blob.pk).update(ref_count=actual)
+
+    removed_blobs = 0
+    candidates = FileBlob.objects.filter(ref_count__lte=0, created_at__lt=now - grace)
+    for blob in candidates.iterator():
+        with transaction.atomic():
+            # Перепроверяем под блокировкой: между выборкой и удалением мог появиться TaskFile
+            locked = FileBlob.objects.select_for_update().filter(pk=blob.pk, ref_count__lte=0).first()
+            if locked is None or locked.task_files.exists():
+                continue
+            locked.delete()
+            transaction.on_commit(lambda name=locked.file.name: default_storage.delete(name))
+        removed_blobs += 1
+
+    removed_uploads = 0
+    for session in UploadSession.objects.filter(updated_at__lt=now - STALE_UPLOAD_AGE):
+        discard_upload(session)
+        removed_uploads += 1
+
+    if removed_blobs or removed_uploads:
+        logger.info("Удалено блобов: %s, брошенных загрузок: %s", removed_blobs, removed_uploads)
+    return removed_blobs, removed_uploads
@@ -1,6 +1,8 @@
 # todo/bot.py
 from asgiref.sync import sync_to_async
+import html
 import logging
+import time
 from datetime import datetime
 from telegram import (
     KeyboardButton,
@@ -35,15 +37,74 @@ def set_bot(bot):
 def get_bot():
     return _bot_instance
 
+# === Кэш telegram_id → пользователь ===
+
+# Привязку меняют редко, а проверяется она в каждом обработчике. Отвязку через сайт
+# бот увидит не позже чем через USER_CACHE_TTL секунд. Отсутствие привязки не кэшируется:
+# только что привязавший аккаунт (в другом процессе бота, через админку) узнаётся сразу.
+USER_CACHE_TTL = 30
+TASKS_PAGE_SIZE = 8
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Простой кэш с истечением по времени. Используется только из цикла бота."""
+
+    def __init__(self, ttl, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+
+    def get(self, key, default=_MISSING):
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            self._data.pop(key, None)
+            return default
+        return item[1]
+
+    def set(self, key, value):
+        if len(self._data) >= self.maxsize:
+            self._data.clear()
+        self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+
+_user_cache = TTLCache(USER_CACHE_TTL)
+
 # === Асинхронные обёртки для ORM ===
 
-@sync_to_async
-def get_telegram_user(telegram_id):
+def _load_telegram_user(telegram_id):
     try:
         return TelegramUserModel.objects.select_related('user').get(telegram_id=telegram_id)
     except TelegramUserModel.DoesNotExist:
         return None
 
+def _run_for_user(telegram_id, telegram_user, func, args):
+    if telegram_user is _MISSING:
+        telegram_user = _load_telegram_user(telegram_id)
+    if telegram_user is None:
+        return None, None
+    return telegram_user, func(telegram_user.user, *args)
+
+async def run_for_user(telegram_id, func, *args):
+    """Выполняет func(user, *args) вместе с поиском пользователя — за один переход в поток ORM.
+
+    Если пользователь есть в кэше, повторно он не запрашивается. Возвращает
+    (telegram_user, результат) или (None, None), если Telegram не привязан.
+    """
+    cached = _user_cache.get(telegram_id)
+    telegram_user, result = await sync_to_async(_run_for_user)(telegram_id, cached, func, args)
+    if telegram_user is not None:
+        _user_cache.set(telegram_id, telegram_user)
+    return telegram_user, result
+
+async def get_telegram_user(telegram_id):
+    telegram_user, _ = await run_for_user(telegram_id, lambda user: None)
+    return telegram_user
+
 @sync_to_async
 def get_user_by_code(code):
     try:
@@ -52,7 +113,7 @@ def get_user_by_code(code):
         return None
 
 @sync_to_async
-def link_telegram_user(user, telegram_id, username=None):
+def _link_telegram_user(user, telegram_id, username=None):
     TelegramUserModel.objects.update_or_create(
         user=user,
         defaults={
@@ -64,46 +125,42 @@ def link_telegram_user(user, telegram_id, username=None):
     user.telegram_link_code = None
     user.save()
 
-@sync_to_async
-def get_user_tasks(user):
-    return list(
-        TaskModel.objects.filter(
-            assignee=user,
-            status__in=['new', 'in_progress', 'overdue']
-        )
-    )
-
-@sync_to_async
-def get_telegram_user_with_user(telegram_id):
-    try:
-        return TelegramUserModel.objects.select_related('user').get(telegram_id=telegram_id)
-    except TelegramUserModel.DoesNotExist:
-        return None
+async def link_telegram_user(user, telegram_id, username=None):
+    await _link_telegram_user(user, telegram_id, username)
+    _user_cache.invalidate(telegram_id)
 
 @sync_to_async
-def unlink_telegram_user(telegram_id):
+def _unlink_telegram_user(telegram_id):
     try:
         TelegramUserModel.objects.get(telegram_id=telegram_id).delete()
         return True
     except TelegramUserModel.DoesNotExist:
         return False
 
-@sync_to_async
-def mark_task_completed(task_id):
-    try:
-        task = TaskModel.objects.get(id=task_id)
-        task.status = 'completed'
-        task.save()
-        return True
-    except TaskModel.DoesNotExist:
-        return False
+async def unlink_telegram_user(telegram_id):
+    _user_cache.invalidate(telegram_id)
+    return await _unlink_telegram_user(telegram_id)
 
-@sync_to_async
-def get_task_detail(task_id):
-    try:
-        return TaskModel.objects.select_related('created_by').get(id=task_id)
-    except TaskModel.DoesNotExist:
-        return None
+def active_task_rows(user):
+    """(id, title, deadline) активных задач пользователя — всё, что нужно для списка."""
+    return list(
+        TaskModel.objects
+        .filter(assignee=user, status__in=TaskModel.ACTIVE_STATUSES)
+        .order_by('deadline', 'id')
+        .values_list('id', 'title', 'deadline')
+    )
+
+def complete_task(user, task_id):
+    """Завершает задачу пользователя и возвращает обновлённый список его задач."""
+    task = TaskModel.objects.filter(id=task_id, assignee=user).first()
+    if task is None:
+        return False, None
+    task.status = 'completed'
+    task.save()
+    return True, active_task_rows(user)
+
+def task_detail(user, task_id):
+    return TaskModel.objects.select_related('created_by').filter(id=task_id, assignee=user).first()
 
 @sync_to_async
 def get_assignee_telegram_id(user_id):
@@ -113,6 +170,36 @@ def get_assignee_telegram_id(user_id):
     except TelegramUserModel.DoesNotExist:
         return None
 
+# === Список задач с постраничной навигацией ===
+
+def render_tasks_page(rows, page):
+    """Текст и клавиатура одной страницы списка. rows — результат active_task_rows."""
+    pages = max(1, -(-len(rows) // TASKS_PAGE_SIZE))
+    page = min(max(page, 0), pages - 1)
+    chunk = rows[page * TASKS_PAGE_SIZE:(page + 1) * TASKS_PAGE_SIZE]
+    now = timezone.now()
+
+    lines = [f"📋 <b>Активные задачи: {len(rows)}</b>"]
+    keyboard = []
+    for number, (task_id, title, deadline) in enumerate(chunk, start=page * TASKS_PAGE_SIZE + 1):
+        mark = "⏰ " if deadline < now else ""
+        lines.append(
+            f"{number}. {mark}{html.escape(title)} — "
+            f"{timezone.localtime(deadline).strftime('%d.%m.%Y %H:%M')}"
+        )
+        keyboard.append([
+            InlineKeyboardButton(f"📄 {number}", callback_data=f"detail_{task_id}_{page}"),
+            InlineKeyboardButton(f"✅ {number}", callback_data=f"complete_{task_id}_{page}"),
+        ])
+    if pages > 1:
+        keyboard.append([
+            InlineKeyboardButton("◀️", callback_data=f"page_{page - 1}" if page > 0 else "noop"),
+            InlineKeyboardButton(f"{page + 1}/{pages}", callback_data="noop"),
+            InlineKeyboardButton("▶️", callback_data=f"page_{page + 1}" if page < pages - 1 else "noop"),
+        ])
+    keyboard.append([InlineKeyboardButton("🔄 Обновить", callback_data=f"refresh_{page}")])
+    return "\n".join(lines), InlineKeyboardMarkup(keyboard)
+
 # === Обработчики команд и сообщений ===
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -161,83 +248,98 @@ async def send_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def show_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE):
     telegram_id = str(update.effective_user.id)
-    telegram_user = await get_telegram_user_with_user(telegram_id)
+    telegram_user, rows = await run_for_user(telegram_id, active_task_rows)
 
     if not telegram_user:
         await update.message.reply_text("Сначала привяжи Telegram через сайт.")
         return
-
-    tasks_list = await get_user_tasks(telegram_user.user)
-    if not tasks_list:
+    if not rows:
         await update.message.reply_text("У тебя нет активных задач.")
         return
 
-    for task in tasks_list:
-        keyboard = [
-            [
-                InlineKeyboardButton("✅ Завершить", callback_data=f"complete_{task.id}"),
-                InlineKeyboardButton("📄 Подробнее", callback_data=f"detail_{task.id}")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        msg = (
-            f"• *{task.title}*\n"
-            f"Дедлайн: {timezone.localtime(task.deadline).strftime('%d.%m.%Y %H:%M')}"
-        )
-        await update.message.reply_text(msg, reply_markup=reply_markup, parse_mode="Markdown")
+    # Страницы листаются по этому снимку, без новых запросов к БД
+    context.chat_data['tasks'] = rows
+    text, reply_markup = render_tasks_page(rows, 0)
+    await update.message.reply_text(text, reply_markup=reply_markup, parse_mode="HTML")
+
+def _parse_callback(data):
+    """'detail_12_0' → ('detail', [12, 0]). Старые кнопки без номера страницы тоже подходят."""
+    action, _, rest = data.partition("_")
+    try:
+        return action, [int(part) for part in rest.split("_") if part]
+    except ValueError:
+        return action, None
 
 async def handle_task_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    data = query.data
-    telegram_id = str(update.effective_user.id)
-    telegram_user = await get_telegram_user_with_user(telegram_id)
-
-    if not telegram_user:
-        await query.edit_message_text("❌ Аккаунт не привязан.")
+    action, args = _parse_callback(query.data)
+    if action == "noop":
+        return
+    if not args and action != "refresh":
+        await query.edit_message_text("❌ Некорректный ID задачи.")
         return
+    telegram_id = str(update.effective_user.id)
 
-    if data.startswith("complete_"):
-        try:
-            task_id = int(data.split("_")[1])
-        except (ValueError, IndexError):
-            await query.edit_message_text("❌ Некорректный ID задачи.")
+    if action in ("page", "back") and 'tasks' in context.chat_data:
+        # Листание по закэшированному списку — только проверяем привязку (обычно из кэша)
+        if not await get_telegram_user(telegram_id):
+            await query.edit_message_text("❌ Аккаунт не привязан.")
             return
+        text, reply_markup = render_tasks_page(context.chat_data['tasks'], args[0])
+        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="HTML")
+        return
 
-        success = await mark_task_completed(task_id)
-        if success:
-            await query.edit_message_text("✅ Задача отмечена как выполненная!")
-        else:
+    if action in ("page", "back", "refresh"):
+        page = args[0] if args else 0
+        telegram_user, rows = await run_for_user(telegram_id, active_task_rows)
+    elif action == "complete":
+        page = args[1] if len(args) > 1 else 0
+        telegram_user, result = await run_for_user(telegram_id, complete_task, args[0])
+        if telegram_user and not result[0]:
             await query.edit_message_text("❌ Задача не найдена.")
-
-    elif data.startswith("detail_"):
-        try:
-            task_id = int(data.split("_")[1])
-        except (ValueError, IndexError):
-            await query.edit_message_text("❌ Некорректный ID задачи.")
             return
-
-        task = await get_task_detail(task_id)
-        if not task:
-            await query.edit_message_text("Задача не найдена.")
+        rows = result[1] if telegram_user else None
+    elif action == "detail":
+        page = args[1] if len(args) > 1 else 0
+        telegram_user, task = await run_for_user(telegram_id, task_detail, args[0])
+        if telegram_user:
+            await show_task_detail(query, task, page)
             return
+    else:
+        return
 
-        description = task.description or "Без описания"
-        priority = task.get_priority_display()
-        creator = task.created_by.first_name if task.created_by else "—"
-        status = task.get_status_display()
-        msg = (
-            f"*{task.title}*\n\n"
-            f"**Статус:** {status}\n"
-            f"**Приоритет:** {priority}\n"
-            f"**Создал:** {creator}\n"
-            f"**Дедлайн:** {timezone.localtime(task.deadline).strftime('%d.%m.%Y %H:%M')}\n\n"
-            f"{description}"
-        )
-        keyboard = [[InlineKeyboardButton("✅ Завершить", callback_data=f"complete_{task.id}")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(msg, reply_markup=reply_markup, parse_mode="Markdown")
+    if not telegram_user:
+        await query.edit_message_text("❌ Аккаунт не привязан.")
+        return
+    context.chat_data['tasks'] = rows
+    if not rows:
+        await query.edit_message_text("✅ Активных задач больше нет.")
+        return
+    text, reply_markup = render_tasks_page(rows, page)
+    await query.edit_message_text(text, reply_markup=reply_markup, parse_mode="HTML")
+
+async def show_task_detail(query, task, page):
+    if not task:
+        await query.edit_message_text("Задача не найдена.")
+        return
+
+    description = task.description or "Без описания"
+    creator = task.created_by.first_name if task.created_by else "—"
+    msg = (
+        f"<b>{html.escape(task.title)}</b>\n\n"
+        f"<b>Статус:</b> {task.get_effective_status_display()}\n"
+        f"<b>Приоритет:</b> {task.get_priority_display()}\n"
+        f"<b>Создал:</b> {html.escape(creator)}\n"
+        f"<b>Дедлайн:</b> {timezone.localtime(task.deadline).strftime('%d.%m.%Y %H:%M')}\n\n"
+        f"{html.escape(description)}"
+    )
+    keyboard = [[
+        InlineKeyboardButton("✅ Завершить", callback_data=f"complete_{task.id}_{page}"),
+        InlineKeyboardButton("⬅️ К списку", callback_data=f"back_{page}"),
+    ]]
+    await query.edit_message_text(msg, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="HTML")
 
 async def unlink(update: Update, context: ContextTypes.DEFAULT_TYPE):
     telegram_id = str(update.effective_user.id)
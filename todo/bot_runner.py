@@ -0,0 +1,176 @@
+# todo/bot_runner.py
+"""Отдельный процесс(ы) Telegram-бота.
+
+Режим webhook: Telegram шлёт апдейты на /api/telegram/webhook/ (см. views.telegram_webhook),
+веб-процесс только складывает их в TelegramUpdate. Этот раннер поднимает пул корутин,
+которые забирают апдейты из таблицы и передают их в Application. Таких процессов можно
+запустить сколько угодно: update_id уникален, а забор строки атомарен.
+
+Режим polling остаётся запасным вариантом. Какой из них запускают run_bot и run_all.py,
+задаёт TELEGRAM_BOT_MODE.
+"""
+import asyncio
+import logging
+import os
+import signal
+import socket
+import threading
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from telegram import Update
+
+from .models import TelegramUpdate
+from .telegram_bot import build_application, start_bot
+
+logger = logging.getLogger(__name__)
+
+# Если воркер умер посреди обработки, апдейт снова станет доступен через это время
+CLAIM_LEASE = timedelta(minutes=1)
+MAX_ATTEMPTS = 3
+# Задержка перед повтором после ошибки: 5 с, 10 с, 20 с… (как у очереди уведомлений)
+BASE_BACKOFF_SECONDS = 5
+MAX_BACKOFF_SECONDS = 5 * 60
+# Сколько хранить обработанные апдейты (нужны только для отсечения повторов)
+KEEP_PROCESSED = timedelta(days=1)
+
+
+def _available(now):
+    return Q(status='pending', next_attempt_at__lte=now) | Q(status='processing', claimed_until__lt=now)
+
+
+def claim_update(worker_id):
+    """Атомарно забирает самый старый доступный апдейт или возвращает None."""
+    if connection.features.has_select_for_update_skip_locked:
+        return _claim_update_skip_locked(worker_id)
+    while True:
+        now = timezone.now()
+        candidate = (
+            TelegramUpdate.objects.filter(_available(now))
+            .order_by('update_id').values_list('pk', flat=True).first()
+        )
+        if candidate is None:
+            return None
+        claimed = TelegramUpdate.objects.filter(_available(now), pk=candidate).update(
+            status='processing', claimed_by=worker_id,
+            claimed_until=now + CLAIM_LEASE, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return TelegramUpdate.objects.get(pk=candidate)
+        # Строку перехватил другой воркер — берём следующую
+
+
+def _claim_update_skip_locked(worker_id):
+    # PostgreSQL: воркеры не спорят за одну строку — занятые пропускаются без повторов
+    now = timezone.now()
+    with transaction.atomic():
+        item = (
+            TelegramUpdate.objects.select_for_update(skip_locked=True)
+            .filter(_available(now)).order_by('update_id').first()
+        )
+        if item is None:
+            return None
+        item.status = 'processing'
+        item.claimed_by = worker_id
+        item.claimed_until = now + CLAIM_LEASE
+        item.attempts += 1
+        item.save(update_fields=['status', 'claimed_by', 'claimed_until', 'attempts'])
+    return item
+
+
+def finish_update(pk, ok):
+    item = TelegramUpdate.objects.get(pk=pk)
+    item.processed_at = timezone.now()
+    if ok:
+        item.status = 'done'
+    elif item.attempts >= MAX_ATTEMPTS:
+        item.status = 'failed'
+    else:
+        # Временная ошибка Telegram или БД: повтор через паузу, а не на следующем опросе
+        item.status = 'pending'
+        delay = min(BASE_BACKOFF_SECONDS * 2 ** (item.attempts - 1), MAX_BACKOFF_SECONDS)
+        item.next_attempt_at = item.processed_at + timedelta(seconds=delay)
+    item.save(update_fields=['status', 'processed_at', 'next_attempt_at'])
+
+
+def purge_processed():
+    TelegramUpdate.objects.filter(status='done', processed_at__lt=timezone.now() - KEEP_PROCESSED).delete()
+
+
+async def _worker(application, worker_id, stop_event, poll_interval):
+    while not stop_event.is_set():
+        item = await sync_to_async(claim_update)(worker_id)
+        if item is None:
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        try:
+            await application.process_update(Update.de_json(item.payload, application.bot))
+        except Exception:
+            logger.exception("❌ Ошибка обработки апдейта %s", item.update_id)
+            await sync_to_async(finish_update)(item.pk, ok=False)
+        else:
+            await sync_to_async(finish_update)(item.pk, ok=True)
+
+
+async def run_webhook_workers(workers=4, poll_interval=0.5, webhook_url=None, stop_event=None):
+    """stop_event — остановить снаружи (по умолчанию — по SIGINT/SIGTERM)."""
+    application = build_application(updater=False)
+    stop_event = stop_event or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    # В фоновом потоке (run_all.py) обработчики сигналов ставить нельзя — процесс остановит главный поток
+    if threading.current_thread() is threading.main_thread():
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop_event.set)
+
+    await application.initialize()
+    # initialize()/start() хуков не вызывают — их зовёт только run_polling/run_webhook,
+    # а post_init запускает отправку уведомлений из outbox
+    if application.post_init:
+        await application.post_init(application)
+    if webhook_url:
+        await application.bot.set_webhook(
+            url=webhook_url,
+            secret_token=settings.TELEGRAM_WEBHOOK_SECRET or None,
+            allowed_updates=Update.ALL_TYPES,
+        )
+        logger.info("Webhook установлен: %s", webhook_url)
+    await application.start()
+
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info("✅ Запуск %s воркеров бота (%s)", workers, prefix)
+    tasks = [
+        asyncio.create_task(_worker(application, f"{prefix}:{n}", stop_event, poll_interval))
+        for n in range(workers)
+    ]
+    while not stop_event.is_set():
+        await sync_to_async(purge_processed)()
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=3600)
+        except asyncio.TimeoutError:
+            pass
+
+    # Мягкая остановка: воркеры дорабатывают текущий апдейт и выходят
+    logger.info("Остановка воркеров бота...")
+    await asyncio.gather(*tasks)
+    await application.stop()
+    if application.post_stop:
+        await application.post_stop(application)
+    await application.shutdown()
+    if application.post_shutdown:
+        await application.post_shutdown(application)
+
+
+def run(mode=None, workers=4, webhook_url=None):
+    """mode по умолчанию — settings.TELEGRAM_BOT_MODE."""
+    mode = mode or settings.TELEGRAM_BOT_MODE
+    if mode == 'polling':
+        start_bot()
+    else:
+        asyncio.run(run_webhook_workers(workers=workers, webhook_url=webhook_url))
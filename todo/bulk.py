@@ -0,0 +1,332 @@
+# todo/bulk.py
+"""Пакетные операции над задачами: создание, переназначение, завершение и удаление.
+
+Операции — список словарей:
+    {"op": "create", "title": "...", "assignee": 5, "deadline": "2026-11-01T18:00:00+03:00",
+     "description": "...", "priority": "high"}
+    {"op": "reassign", "task": 12, "assignee": 7}
+    {"op": "complete", "task": 13}
+    {"op": "delete", "task": 14}
+
+Вся пачка сначала проверяется целиком (несколько запросов на всю пачку); при любой
+ошибке ничего не пишется и поднимается BulkValidationError со списком ошибок по
+номерам операций. Затем всё выполняется в одной транзакции: bulk_create и UPDATE по
+спискам id вместо save() на каждую задачу.
+
+Сигналы при этом не срабатывают (а при удалении отключены), поэтому их работа
+делается здесь же, по разу на пачку: счётчики, сводка руководителя, поисковый индекс, отметки для
+дельта-синхронизации, одно событие TASKS_BULK_CHANGED (push, сброс кэша ответов)
+и по одному Telegram-сообщению на получателя вместо сообщения на задачу.
+"""
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, dashboard, events, notifications, search
+from .models import TaskModel, TaskTombstone, UserModel
+from .signals import task_signals_suppressed
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS = ('create', 'reassign', 'complete', 'delete')
+PRIORITIES = dict(TaskModel.PRIORITY_CHOICES)
+TITLE_MAX_LENGTH = TaskModel._meta.get_field('title').max_length
+# Столько id в одном IN (...): ниже лимита параметров SQLite
+CHUNK_SIZE = 500
+# Поля задач, на которые ссылается пачка: хватает для отметок, счётчиков, сводки и уведомлений
+TASK_FIELDS = (
+    'pk', 'title', 'description', 'priority', 'deadline', 'status', 'completed_at', 'assignee_id', 'created_by_id',
+)
+# Сколько ошибок возвращать клиенту; остальные только считаются
+MAX_REPORTED_ERRORS = 100
+
+
+def max_operations():
+    return getattr(settings, 'TODO_BULK_MAX_OPERATIONS', 10_000)
+
+
+def max_body_size():
+    return getattr(settings, 'TODO_BULK_MAX_BODY_SIZE', 20 * 1024 * 1024)
+
+
+class BulkValidationError(Exception):
+    def __init__(self, errors, message="Пачка не прошла проверку"):
+        super().__init__(message)
+        self.message = message
+        self.errors = errors  # [{'index': номер операции, 'error': текст}]
+
+    def as_dict(self):
+        return {
+            'error': self.message,
+            'errors': self.errors[:MAX_REPORTED_ERRORS],
+            'error_count': len(self.errors),
+        }
+
+
+@dataclass
+class BulkResult:
+    created: list = field(default_factory=list)
+    reassigned: list = field(default_factory=list)
+    completed: list = field(default_factory=list)
+    deleted: list = field(default_factory=list)
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'reassigned': len(self.reassigned),
+            'completed': len(self.completed),
+            'deleted': len(self.deleted),
+        }
+
+
+@dataclass
+class _Plan:
+    creates: list = field(default_factory=list)       # несохранённые TaskModel
+    reassign: dict = field(default_factory=dict)      # task_id -> новый assignee_id
+    complete: list = field(default_factory=list)
+    delete: list = field(default_factory=list)
+    tasks: dict = field(default_factory=dict)         # task_id -> TaskModel (только нужные поля)
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _as_id(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _existing_user_ids(ids):
+    found = set()
+    for chunk in _chunks(ids):
+        found.update(UserModel.objects.filter(pk__in=chunk).values_list('pk', flat=True))
+    return found
+
+
+def _existing_tasks(ids):
+    tasks = {}
+    for chunk in _chunks(ids):
+        for task in TaskModel.objects.filter(pk__in=chunk).only(*TASK_FIELDS):
+            tasks[task.pk] = task
+    return tasks
+
+
+def parse_deadline(value):
+    try:
+        deadline = parse_datetime(value) if isinstance(value, str) else None
+    except ValueError:
+        return None
+    if deadline is not None and timezone.is_naive(deadline):
+        deadline = timezone.make_aware(deadline)
+    return deadline
+
+
+def build_task(operation, assignee_id, user, now):
+    """Несохранённая задача по операции create или (None, текст ошибки)."""
+    title = operation.get('title')
+    description = operation.get('description', '')
+    priority = operation.get('priority', 'medium')
+    deadline = parse_deadline(operation.get('deadline'))
+    if not isinstance(title, str) or not title.strip():
+        return None, "title: обязательное поле"
+    if len(title) > TITLE_MAX_LENGTH:
+        return None, f"title: не длиннее {TITLE_MAX_LENGTH} символов"
+    if not isinstance(description, str):
+        return None, "description: ожидалась строка"
+    if priority not in PRIORITIES:
+        return None, f"priority: одно из {', '.join(PRIORITIES)}"
+    if deadline is None:
+        return None, "deadline: ожидалась дата и время в ISO 8601"
+    return TaskModel(
+        title=title, description=description, priority=priority, deadline=deadline,
+        assignee_id=assignee_id, created_by=user,
+        # Как TaskModel.save(): задача с прошедшим дедлайном сразу просрочена
+        status='overdue' if deadline < now else 'new',
+    ), None
+
+
+def validate(operations, user, now=None):
+    """Проверяет пачку целиком и возвращает план; ошибки — BulkValidationError."""
+    now = now or timezone.now()
+    if not isinstance(operations, list) or not operations:
+        raise BulkValidationError([], "Ожидался непустой список operations")
+    if len(operations) > max_operations():
+        raise BulkValidationError([], f"Не больше {max_operations()} операций за раз")
+
+    errors = []
+    parsed = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('op') not in OPERATIONS:
+            errors.append({'index': index, 'error': f"op должен быть одним из: {', '.join(OPERATIONS)}"})
+            parsed.append(None)
+            continue
+        parsed.append(operation)
+
+    # Пользователи и задачи, на которые ссылается пачка, — несколько запросов на всю пачку
+    user_ids = {_as_id(op.get('assignee')) for op in parsed if op and op['op'] in ('create', 'reassign')}
+    task_ids = {_as_id(op.get('task')) for op in parsed if op and op['op'] != 'create'}
+    users = _existing_user_ids(user_ids - {None})
+    tasks = _existing_tasks(task_ids - {None})
+
+    plan = _Plan(tasks=tasks)
+    seen_tasks = {}
+    for index, operation in enumerate(parsed):
+        if operation is None:
+            continue
+        kind = operation['op']
+        assignee_id = _as_id(operation.get('assignee'))
+        if kind in ('create', 'reassign') and assignee_id not in users:
+            errors.append({'index': index, 'error': "assignee: пользователь не найден"})
+            continue
+        if kind == 'create':
+            task, problem = build_task(operation, assignee_id, user, now)
+            if problem:
+                errors.append({'index': index, 'error': problem})
+            else:
+                plan.creates.append(task)
+            continue
+
+        task_id = _as_id(operation.get('task'))
+        if task_id not in tasks:
+            errors.append({'index': index, 'error': "task: задача не найдена"})
+        elif task_id in seen_tasks:
+            errors.append({'index': index, 'error': f"task: задача {task_id} уже есть в операции {seen_tasks[task_id]}"})
+        else:
+            seen_tasks[task_id] = index
+            if kind == 'reassign':
+                plan.reassign[task_id] = assignee_id
+            elif kind == 'complete':
+                plan.complete.append(task_id)
+            else:
+                plan.delete.append(task_id)
+
+    if errors:
+        raise BulkValidationError(errors)
+    return plan
+
+
+def apply(operations, user, now=None):
+    """Проверяет и выполняет пачку в одной транзакции. Возвращает BulkResult."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        # Проверка в той же транзакции: задачи не исчезнут между проверкой и записью
+        plan = validate(operations, user, now)
+        result = _execute(plan, user, now)
+    logger.info(
+        "Пакетная операция %s: создано %s, переназначено %s, завершено %s, удалено %s",
+        user, len(result.created), len(result.reassigned), len(result.completed), len(result.deleted),
+    )
+    return result
+
+
+def _execute(plan, user, now):
+    tasks = plan.tasks
+    result = BulkResult()
+
+    created = TaskModel.objects.bulk_create(plan.creates, batch_size=CHUNK_SIZE)
+    result.created = [task.pk for task in created]
+
+    by_assignee = defaultdict(list)
+    for task_id, assignee_id in plan.reassign.items():
+        by_assignee[assignee_id].append(task_id)
+    for assignee_id, task_ids in by_assignee.items():
+        for chunk in _chunks(task_ids):
+            TaskModel.objects.filter(pk__in=chunk).update(assignee_id=assignee_id, updated_at=now)
+    result.reassigned = list(plan.reassign)
+
+    for chunk in _chunks(plan.complete):
+        TaskModel.objects.filter(pk__in=chunk).update(
+            status='completed', completed_at=Coalesce('completed_at', Value(now)), updated_at=now,
+        )
+    result.completed = list(plan.complete)
+
+    with task_signals_suppressed():
+        for chunk in _chunks(plan.delete):
+            TaskModel.objects.filter(pk__in=chunk).delete()
+    result.deleted = list(plan.delete)
+
+    # Отметки для дельта-синхронизации: задача ушла из списка прежнего исполнителя
+    gone = plan.delete + [
+        task_id for task_id, assignee_id in plan.reassign.items() if tasks[task_id].assignee_id != assignee_id
+    ]
+    TaskTombstone.objects.bulk_create(
+        [TaskTombstone(task_id=task_id, assignee_id=tasks[task_id].assignee_id, deleted_at=now) for task_id in gone],
+        batch_size=CHUNK_SIZE,
+    )
+
+    affected = {task.assignee_id for task in created}
+    affected.update(plan.reassign.values())
+    affected.update(tasks[task_id].assignee_id for task_id in [*plan.reassign, *plan.complete, *plan.delete])
+    if counters.enabled():
+        counters.rebuild(affected)
+    if dashboard.enabled():
+        dashboard.track(_dashboard_changes(plan, created, now))
+    for chunk in _chunks(result.created):
+        search.index_tasks(chunk)
+    for chunk in _chunks(plan.delete):
+        search.remove_tasks(chunk)
+    events.publish(
+        events.TASKS_BULK_CHANGED,
+        created=result.created, reassigned=result.reassigned, completed=result.completed, deleted=result.deleted,
+        assignee_ids=sorted(affected), user_id=user.pk if user else None,
+    )
+    _enqueue_notifications(plan, created, user)
+    return result
+
+
+def _dashboard_changes(plan, created, now):
+    """Пары (было, стало) для сводки руководителя — по задаче на каждую операцию пачки."""
+    before = {task_id: dashboard.snapshot(task) for task_id, task in plan.tasks.items()}
+    changes = [(None, dashboard.snapshot(task)) for task in created]
+    for task_id, assignee_id in plan.reassign.items():
+        changes.append((before[task_id], before[task_id]._replace(assignee_id=assignee_id)))
+    for task_id in plan.complete:
+        old = before[task_id]
+        changes.append((old, old._replace(status='completed', completed_at=old.completed_at or now)))
+    changes += [(before[task_id], None) for task_id in plan.delete]
+    return changes
+
+
+def _enqueue_notifications(plan, created, user):
+    """По одному сообщению на получателя: новые задачи — исполнителю, завершённые — постановщику."""
+    tasks = plan.tasks
+    assigned = defaultdict(list)
+    for task in created:
+        assigned[task.assignee_id].append(task)
+    for task_id, assignee_id in plan.reassign.items():
+        if tasks[task_id].assignee_id != assignee_id:
+            assigned[assignee_id].append(tasks[task_id])
+    completed = defaultdict(list)
+    for task_id in plan.complete:
+        task = tasks[task_id]
+        # Постановщику, если задачу закрыл не он сам и не он же исполнитель
+        if task.created_by_id and task.created_by_id not in (task.assignee_id, getattr(user, 'pk', None)):
+            completed[task.created_by_id].append(task)
+
+    chat_ids = notifications.active_chat_ids([*assigned, *completed])
+    messages = []
+    for user_id, user_tasks in assigned.items():
+        if user_id in chat_ids:
+            if len(user_tasks) == 1:
+                text = notifications.format_new_task_message(user_tasks[0])
+            else:
+                text = notifications.format_task_list_message("✅ Новые задачи", user_tasks)
+            messages.append((chat_ids[user_id], text, user_tasks[0] if len(user_tasks) == 1 else None))
+    for user_id, user_tasks in completed.items():
+        if user_id in chat_ids:
+            messages.append((chat_ids[user_id], notifications.format_task_list_message("✅ Завершено задач", user_tasks), None))
+    notifications.enqueue_many(messages)
@@ -0,0 +1,128 @@
+# todo/consumers.py
+"""Подписчики шины доменных событий (регистрируются в TodoConfig.ready).
+
+telegram и render_cache — durable: выполняются в on_commit и событий не теряют
+(сообщение ложится в outbox, сброс кэша — несколько операций с кэшем). push и
+email ходят в сеть и работают из очереди.
+"""
+import html
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils import timezone
+
+from . import events, notifications, push, render_cache
+from .models import Comment, TaskModel
+
+PUSH_EVENT_TYPES = {
+    events.TASK_CREATED: 'created',
+    events.TASK_UPDATED: 'updated',
+    events.TASK_DELETED: 'deleted',
+}
+
+
+@events.subscribe(
+    events.TASK_CREATED, events.TASK_UPDATED, events.TASK_STATUS_CHANGED, events.TASK_DELETED,
+    name='push',
+)
+async def push_task_event(event):
+    payload = event.payload
+    if event.name == events.TASK_STATUS_CHANGED:
+        event_type = 'completed' if payload['new_status'] == 'completed' else 'updated'
+    else:
+        event_type = PUSH_EVENT_TYPES[event.name]
+    push.publish_task_event(
+        event_type, payload['task_id'], [payload.get('assignee_id'), payload.get('previous_assignee_id')],
+    )
+
+
+@events.subscribe(events.TASKS_BULK_CHANGED, name='push_bulk')
+async def push_bulk_event(event):
+    # Клиенту достаточно одного сигнала перечитать список, а не тысяч событий по задачам
+    push.publish_task_event('bulk', None, event.payload['assignee_ids'])
+
+
+@events.subscribe(
+    events.TASK_CREATED, events.TASK_UPDATED, events.TASK_STATUS_CHANGED, events.TASK_DELETED,
+    events.TASKS_BULK_CHANGED,
+    name='render_cache', durable=True,
+)
+def invalidate_render_cache(event):
+    payload = event.payload
+    if event.name == events.TASKS_BULK_CHANGED:
+        render_cache.invalidate_tasks(payload['assignee_ids'])
+    else:
+        # Прежний исполнитель тоже должен перестать видеть задачу в своём списке
+        render_cache.invalidate_tasks([payload.get('assignee_id'), payload.get('previous_assignee_id')])
+
+
+@events.subscribe(events.TASK_STATUS_CHANGED, events.COMMENT_ADDED, name='telegram', durable=True)
+def notify_telegram(event):
+    # Сообщения пишутся в outbox сразу после коммита, а не через очередь шины:
+    # при всплеске событий очередь переполняется, а уведомления терять нельзя
+    if event.name == events.COMMENT_ADDED:
+        _notify_comment_added(event.payload)
+    elif event.payload['new_status'] == 'completed':
+        _notify_task_completed(event.payload)
+
+
+def _notify_task_completed(payload):
+    # Постановщику сообщаем, что исполнитель закрыл задачу
+    if not payload.get('created_by_id') or payload['created_by_id'] == payload['assignee_id']:
+        return
+    chat_id = notifications.active_chat_ids([payload['created_by_id']]).get(payload['created_by_id'])
+    task = TaskModel.objects.filter(pk=payload['task_id']).only('title').first()
+    if chat_id and task:
+        notifications.enqueue(chat_id, f"✅ Задача завершена: {html.escape(task.title)}", task=task)
+
+
+def _notify_comment_added(payload):
+    comment = Comment.objects.select_related('task', 'author').filter(pk=payload['comment_id']).first()
+    if comment is None:
+        return
+    task = comment.task
+    recipients = {task.assignee_id, task.created_by_id} - {comment.author_id}
+    text = (
+        f"💬 {html.escape(comment.author.first_name)} "
+        f"к задаче «{html.escape(task.title)}»:\n"
+        f"{html.escape(comment.text[:200])}"
+    )
+    for chat_id in notifications.active_chat_ids(recipients).values():
+        notifications.enqueue(chat_id, text, task=task)
+
+
+@events.subscribe(events.TASK_CREATED, events.TASK_STATUS_CHANGED, name='email')
+async def notify_email(event):
+    if not getattr(settings, 'TODO_EMAIL_NOTIFICATIONS', False):
+        return
+    payload = event.payload
+    if event.name == events.TASK_CREATED:
+        await sync_to_async(_email_task_created)(payload)
+    elif payload['new_status'] == 'completed':
+        await sync_to_async(_email_task_completed)(payload)
+
+
+def _send_email(user, subject, text):
+    if user is None or not user.email or not user.is_active:
+        return
+    send_mail(subject, text, None, [user.email])
+
+
+def _email_task_created(payload):
+    if payload.get('created_by_id') == payload['assignee_id']:
+        return
+    task = TaskModel.objects.select_related('assignee').filter(pk=payload['task_id']).first()
+    if task:
+        deadline = timezone.localtime(task.deadline).strftime('%d.%m.%Y %H:%M')
+        text = f"{task.title}\n\nДедлайн: {deadline}\n\n{task.description}".strip()
+        _send_email(task.assignee, f"Новая задача: {task.title}", text)
+
+
+def _email_task_completed(payload):
+    if not payload.get('created_by_id') or payload['created_by_id'] == payload['assignee_id']:
+        return
+    task = TaskModel.objects.select_related('created_by', 'assignee').filter(pk=payload['task_id']).first()
+    if task:
+        who = task.assignee.first_name or task.assignee.username
+        _send_email(task.created_by, f"Задача завершена: {task.title}", f"{who} завершил(а) задачу «{task.title}».")
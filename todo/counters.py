@@ -0,0 +1,50 @@
+# todo/counters.py
+"""Поддержка денормализованной таблицы UserTaskCounter.
+
+Пока TODO_DENORMALIZED_TASK_COUNTERS выключена, функции ничего не делают и счётчики
+считаются условной агрегацией (UserModel.objects.with_task_counts()).
+"""
+from django.conf import settings
+from django.db.models import Count, F, Q
+
+from .models import TaskModel, UserTaskCounter
+
+COUNTER_STATUSES = ('new', 'in_progress', 'completed', 'overdue')
+
+
+def enabled():
+    return getattr(settings, 'TODO_DENORMALIZED_TASK_COUNTERS', False)
+
+
+def adjust(user_id, status, delta):
+    if user_id is None or status not in COUNTER_STATUSES:
+        return
+    updated = UserTaskCounter.objects.filter(user_id=user_id).update(**{status: F(status) + delta})
+    if not updated:
+        # Строки ещё нет — считаем пользователя целиком, это заодно учтёт текущее изменение
+        rebuild([user_id])
+
+
+def track_task_change(old_assignee_id, old_status, new_assignee_id, new_status):
+    """Переносит задачу из одной ячейки счётчиков в другую (None — задачи не было / больше нет)."""
+    if not enabled() or (old_assignee_id, old_status) == (new_assignee_id, new_status):
+        return
+    if old_assignee_id is not None:
+        adjust(old_assignee_id, old_status, -1)
+    if new_assignee_id is not None:
+        adjust(new_assignee_id, new_status, 1)
+
+
+def rebuild(user_ids=None):
+    """Пересчитывает счётчики по таблице задач (для всех пользователей или только для user_ids)."""
+    from .models import UserModel
+
+    users = UserModel.objects.all() if user_ids is None else UserModel.objects.filter(pk__in=user_ids)
+    rows = users.annotate(**{
+        status: Count('tasks', filter=Q(tasks__status=status)) for status in COUNTER_STATUSES
+    }).values_list('pk', *COUNTER_STATUSES)
+    counters = [UserTaskCounter(user_id=row[0], **dict(zip(COUNTER_STATUSES, row[1:]))) for row in rows]
+    UserTaskCounter.objects.bulk_create(
+        counters, update_conflicts=True, unique_fields=['user'], update_fields=list(COUNTER_STATUSES),
+    )
+    return len(counters)
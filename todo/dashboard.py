@@ -0,0 +1,256 @@
+# todo/dashboard.py
+"""Сводка руководителя: нагрузка по исполнителям, возраст просрочки, завершённые по неделям.
+
+Данные берутся из двух небольших таблиц, а не считаются по задачам:
+    TaskSummary     — задачи исполнителя в ячейке статус × приоритет;
+    TaskDaySummary  — просроченные задачи по дню дедлайна и завершённые по неделе завершения.
+Их размер зависит от числа пользователей (и дней), а не задач, поэтому сводка стоит
+несколько запросов на любой объём.
+
+Таблицы поддерживаются приращениями: сигналы задач передают в track() состояние до
+и после сохранения, а пакетные операции, импорт и фоновая просрочка — сразу всю
+пачку. Расхождения (правки в обход ORM, гонки) убирает rebuild(): его раз в
+TODO_DASHBOARD_RECONCILE_INTERVAL секунд вызывает фоновый процесс просрочки, а
+вручную — python manage.py rebuild_dashboard.
+
+Пока TODO_DASHBOARD_SUMMARY выключена, таблицы не ведутся, а сводка считается
+агрегацией по задачам (те же цифры, но за O(числа задач)).
+"""
+import logging
+from collections import Counter, defaultdict, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DateField, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+
+from .models import TaskDaySummary, TaskModel, TaskSummary, UserModel
+
+logger = logging.getLogger(__name__)
+
+STATUSES = [code for code, _ in TaskModel.STATUS_CHOICES]
+PRIORITIES = [code for code, _ in TaskModel.PRIORITY_CHOICES]
+# Возраст просрочки в днях от дня дедлайна: (подпись, от, до включительно или None)
+AGING_BUCKETS = (
+    ('0–2 дня', 0, 2),
+    ('3–7 дней', 3, 7),
+    ('8–30 дней', 8, 30),
+    ('больше 30 дней', 31, None),
+)
+# Сколько последних недель показывать в графике завершённых задач
+THROUGHPUT_WEEKS = 12
+
+# Состояние задачи, от которого зависит сводка
+Cell = namedtuple('Cell', 'assignee_id status priority deadline completed_at')
+
+
+def enabled():
+    return getattr(settings, 'TODO_DASHBOARD_SUMMARY', False)
+
+
+def reconcile_interval():
+    return getattr(settings, 'TODO_DASHBOARD_RECONCILE_INTERVAL', 3600)
+
+
+def week_start(moment):
+    day = timezone.localdate(moment)
+    return day - timedelta(days=day.weekday())
+
+
+def snapshot(task):
+    return Cell(*(getattr(task, name) for name in Cell._fields))
+
+
+def loaded_snapshot(task):
+    """Состояние задачи на момент загрузки из БД (в post_save — до сохранения)."""
+    return Cell(*(task.get_loaded_value(name, getattr(task, name)) for name in Cell._fields))
+
+
+# === Приращения ===
+
+def _keys(cell):
+    if cell is None or cell.assignee_id is None:
+        return []
+    keys = [(TaskSummary, cell.assignee_id, cell.status, cell.priority)]
+    if cell.status == 'overdue':
+        keys.append((TaskDaySummary, cell.assignee_id, TaskDaySummary.OVERDUE, timezone.localdate(cell.deadline)))
+    elif cell.status == 'completed' and cell.completed_at:
+        keys.append((TaskDaySummary, cell.assignee_id, TaskDaySummary.COMPLETED, week_start(cell.completed_at)))
+    return keys
+
+
+def _lookup(key):
+    model, assignee_id, first, second = key
+    if model is TaskSummary:
+        return model, {'assignee_id': assignee_id, 'status': first, 'priority': second}
+    return model, {'assignee_id': assignee_id, 'kind': first, 'day': second}
+
+
+def _apply(key, delta):
+    model, lookup = _lookup(key)
+    if model.objects.filter(**lookup).update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(count=delta, **lookup)
+    except IntegrityError:
+        # Строку только что создал параллельный запрос
+        model.objects.filter(**lookup).update(count=F('count') + delta)
+
+
+def track(changes):
+    """Применяет к сводке изменения задач: пары (было, стало) из Cell или None.
+
+    Изменения сворачиваются по ячейкам, так что пачка задач стоит по UPDATE на
+    затронутую ячейку, а правка, не меняющая ни одной ячейки, — ни одного запроса.
+    """
+    if not enabled():
+        return
+    deltas = Counter()
+    for old, new in changes:
+        for key in _keys(old):
+            deltas[key] -= 1
+        for key in _keys(new):
+            deltas[key] += 1
+    for key, delta in deltas.items():
+        if delta:
+            _apply(key, delta)
+
+
+# === Пересчёт ===
+
+def _week(field_name):
+    return TruncWeek(field_name, output_field=DateField())
+
+
+def _aggregate(tasks):
+    """Строки обеих таблиц, посчитанные по задачам."""
+    tasks = tasks.order_by()
+    summary = [
+        TaskSummary(assignee_id=assignee_id, status=status, priority=priority, count=count)
+        for assignee_id, status, priority, count
+        in tasks.values_list('assignee_id', 'status', 'priority').annotate(Count('id'))
+    ]
+    overdue = (
+        tasks.filter(status='overdue').annotate(day=TruncDate('deadline'))
+        .values_list('assignee_id', 'day').annotate(Count('id'))
+    )
+    completed = (
+        tasks.filter(status='completed', completed_at__isnull=False).annotate(day=_week('completed_at'))
+        .values_list('assignee_id', 'day').annotate(Count('id'))
+    )
+    days = [
+        TaskDaySummary(assignee_id=assignee_id, kind=kind, day=day, count=count)
+        for kind, rows in ((TaskDaySummary.OVERDUE, overdue), (TaskDaySummary.COMPLETED, completed))
+        for assignee_id, day, count in rows
+    ]
+    return summary, days
+
+
+def rebuild(user_ids=None):
+    """Пересчитывает сводку по таблице задач (для всех исполнителей или только для user_ids)."""
+    tasks = TaskModel.objects.all() if user_ids is None else TaskModel.objects.filter(assignee_id__in=user_ids)
+    with transaction.atomic():
+        summary, days = _aggregate(tasks)
+        for model in (TaskSummary, TaskDaySummary):
+            rows = model.objects.all() if user_ids is None else model.objects.filter(assignee_id__in=user_ids)
+            rows.delete()
+        TaskSummary.objects.bulk_create(summary, batch_size=1000)
+        TaskDaySummary.objects.bulk_create(days, batch_size=1000)
+    return len(summary) + len(days)
+
+
+# === Чтение ===
+
+def _aging_bucket(today):
+    """Номер корзины AGING_BUCKETS по полю day (день дедлайна)."""
+    whens = []
+    for index, (_, low, high) in enumerate(AGING_BUCKETS):
+        condition = Q(day__lte=today - timedelta(days=low))
+        if high is not None:
+            condition &= Q(day__gte=today - timedelta(days=high))
+        whens.append(When(condition, then=Value(index)))
+    # Дедлайн сегодня, но уже прошёл, — самая свежая корзина
+    return Case(*whens, default=Value(0), output_field=IntegerField())
+
+
+def _sources(today, first_week):
+    """(ячейки, возраст просрочки, завершённые по неделям) — из сводки или, если она выключена, по задачам."""
+    if enabled():
+        cells = TaskSummary.objects.filter(count__gt=0).values_list('assignee_id', 'status', 'priority', 'count')
+        overdue = TaskDaySummary.objects.filter(kind=TaskDaySummary.OVERDUE, count__gt=0)
+        completed = TaskDaySummary.objects.filter(kind=TaskDaySummary.COMPLETED, day__gte=first_week, count__gt=0)
+        total = Sum('count')
+    else:
+        tasks = TaskModel.objects.order_by()
+        cells = tasks.values_list('assignee_id', 'status', 'priority').annotate(Count('id'))
+        overdue = tasks.filter(status='overdue').annotate(day=TruncDate('deadline'))
+        completed = (
+            tasks.filter(status='completed', completed_at__isnull=False)
+            .annotate(day=_week('completed_at')).filter(day__gte=first_week)
+        )
+        total = Count('id')
+    aging = overdue.annotate(bucket=_aging_bucket(today)).values_list('assignee_id', 'bucket').annotate(total).order_by()
+    weekly = completed.values_list('assignee_id', 'day').annotate(total).order_by()
+    return cells, aging, weekly
+
+
+def _empty_row(weeks):
+    return {
+        'matrix': {status: dict.fromkeys(PRIORITIES, 0) for status in STATUSES},
+        'by_status': dict.fromkeys(STATUSES, 0),
+        'active_by_priority': dict.fromkeys(PRIORITIES, 0),
+        'total': 0,
+        'active': 0,
+        'aging': [0] * len(AGING_BUCKETS),
+        'throughput': [0] * len(weeks),
+    }
+
+
+def data(today=None, weeks=THROUGHPUT_WEEKS):
+    """Сводка для страницы и /api/dashboard/: итоги и строка на каждого исполнителя.
+
+    Четыре запроса независимо от числа задач.
+    """
+    today = today or timezone.localdate()
+    first_week = today - timedelta(days=today.weekday()) - timedelta(weeks=weeks - 1)
+    week_days = [first_week + timedelta(weeks=index) for index in range(weeks)]
+    week_index = {day: index for index, day in enumerate(week_days)}
+
+    rows = defaultdict(lambda: _empty_row(week_days))
+    totals = _empty_row(week_days)
+    cells, aging, weekly = _sources(today, first_week)
+    for assignee_id, status, priority, count in cells:
+        for row in (rows[assignee_id], totals):
+            row['matrix'][status][priority] += count
+            row['by_status'][status] += count
+            row['total'] += count
+            if status != 'completed':
+                row['active_by_priority'][priority] += count
+                row['active'] += count
+    for assignee_id, bucket, count in aging:
+        for row in (rows[assignee_id], totals):
+            row['aging'][bucket] += count
+    for assignee_id, day, count in weekly:
+        if day in week_index:
+            for row in (rows[assignee_id], totals):
+                row['throughput'][week_index[day]] += count
+
+    # Сотрудники без задач тоже попадают в сводку — им можно дать работу
+    users = (
+        UserModel.objects.filter(Q(pk__in=list(rows)) | Q(role='employee', is_active=True))
+        .order_by('first_name', 'username').values_list('pk', 'first_name', 'username')
+    )
+    assignees = [{'id': pk, 'name': first_name or username, **rows[pk]} for pk, first_name, username in users]
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'source': 'summary' if enabled() else 'tasks',
+        'statuses': dict(TaskModel.STATUS_CHOICES),
+        'priorities': dict(TaskModel.PRIORITY_CHOICES),
+        'aging_buckets': [label for label, _, _ in AGING_BUCKETS],
+        'weeks': [day.isoformat() for day in week_days],
+        'totals': totals,
+        'assignees': assignees,
+    }
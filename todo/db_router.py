@@ -0,0 +1,74 @@
+# todo/db_router.py
+"""Чтение для read-only страниц через отдельное соединение (алиас TODO_READ_DATABASE).
+
+View помечается декоратором @read_only (для классов — атрибут read_only = True);
+на время его GET/HEAD ReadOnlyViewMiddleware включает маршрутизацию чтения на
+алиас 'read'. Всё остальное — запись, страницы с побочными эффектами, бот, фоновые
+задачи — идёт в 'default'.
+
+Для SQLite 'read' — тот же файл, открытый с PRAGMA query_only: случайная запись
+из такой страницы упадёт, а не пройдёт мимо писателя. Для PostgreSQL сюда же можно
+подставить реплику.
+"""
+import contextvars
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_read_only = contextvars.ContextVar('todo_read_only_view', default=False)
+
+
+def read_alias():
+    alias = getattr(settings, 'TODO_READ_DATABASE', 'read')
+    return alias if alias in settings.DATABASES else None
+
+
+def read_only(view):
+    view.read_only = True
+    return view
+
+
+def is_read_only(view_func):
+    view_class = getattr(view_func, 'view_class', None)
+    return getattr(view_func, 'read_only', False) or getattr(view_class, 'read_only', False)
+
+
+class ReadOnlyViewRouter:
+    def db_for_read(self, model, **hints):
+        # Внутри транзакции на 'default' читаем оттуда же — иначе не увидим своих же записей
+        if _read_only.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return read_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Явно: иначе объект, прочитанный через 'read', сохранялся бы туда же
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Оба алиаса — одна и та же база
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == read_alias():
+            return False
+        return None
+
+
+class ReadOnlyViewMiddleware:
+    def __init__(self, get_response):
+        if read_alias() is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            token = getattr(request, '_read_only_token', None)
+            if token is not None:
+                _read_only.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in ('GET', 'HEAD') and is_read_only(view_func):
+            request._read_only_token = _read_only.set(True)
@@ -0,0 +1,141 @@
+# todo/downloads.py
+"""Отдача вложений: Range, ETag, условные запросы и передача файла фронт-прокси.
+
+TODO_SENDFILE_BACKEND:
+    None      — файл отдаёт Django потоком (FileResponse, под gunicorn это sendfile через
+                wsgi.file_wrapper); частичные ответы читаются кусками по CHUNK_SIZE.
+    'nginx'   — ответ с X-Accel-Redirect на TODO_SENDFILE_URL_PREFIX + путь файла;
+                nginx сам отдаёт файл и обрабатывает Range. Пример:
+                    location /protected-media/ { internal; alias /srv/todo/media/; }
+    'apache'  — X-Sendfile с абсолютным путём (mod_xsendfile, lighttpd).
+Права доступа в любом случае проверяет Django.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+
+CHUNK_SIZE = 256 * 1024
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_etag(task_file):
+    """Сильный ETag: хэш содержимого, а для старых вложений — размер и время изменения."""
+    if task_file.blob_id:
+        return f'"{task_file.blob_id}"'
+    stat = os.stat(task_file.file.path)
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """Разбирает Range с одним диапазоном. None — отдать файл целиком,
+    (start, end) — включительно, False — диапазон вне файла (416)."""
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        # Несколько диапазонов и прочие единицы не поддерживаем — по RFC 9110 можно ответить 200
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-500 — последние 500 байт
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _read_range(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _offload(response, task_file):
+    backend = getattr(settings, 'TODO_SENDFILE_BACKEND', None)
+    if backend == 'nginx':
+        prefix = getattr(settings, 'TODO_SENDFILE_URL_PREFIX', '/protected-media/')
+        # Заголовок — URI: пробелы, кириллица и «?» в имени файла должны быть закодированы
+        response['X-Accel-Redirect'] = prefix + quote(task_file.file.name)
+    elif backend == 'apache':
+        response['X-Sendfile'] = task_file.file.path
+    else:
+        return False
+    return True
+
+
+def serve(request, task_file):
+    path = task_file.file.path
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = file_etag(task_file)
+
+    last_modified = http_date(stat.st_mtime)
+
+    headers = {
+        'ETag': etag,
+        'Last-Modified': last_modified,
+        'Accept-Ranges': 'bytes',
+        # Вложения видны не всем — общие кэши их хранить не должны
+        'Cache-Control': 'private, max-age=0, must-revalidate',
+    }
+    # If-None-Match, If-Modified-Since, If-Match и If-Unmodified-Since — по правилам RFC 9110:
+    # 304 или 412 без тела
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is not None:
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    disposition = content_disposition_header(True, task_file.display_name)
+    content_type = mimetypes.guess_type(task_file.display_name)[0] or 'application/octet-stream'
+
+    response = HttpResponse(content_type=content_type)
+    if _offload(response, task_file):
+        # Тело и Range отдаст прокси
+        response['Content-Disposition'] = disposition
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    # If-Range (ETag или дата): диапазон действителен, только если файл не менялся
+    if range_header and (not if_range or if_range.strip() in (etag, last_modified)):
+        byte_range = parse_range(range_header, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(open(path, 'rb'), as_attachment=True, filename=task_file.display_name)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(_read_range(path, start, end), status=206)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Type'] = content_type
+        response['Content-Disposition'] = disposition
+    for name, value in headers.items():
+        response[name] = value
+    return response
@@ -0,0 +1,184 @@
+# todo/events.py
+"""Внутрипроцессная шина доменных событий.
+
+Сигналы и представления вызывают publish() — событие уходит в шину только после
+коммита транзакции. Каждый подписчик (async-функция, см. subscribe) получает свою
+ограниченную очередь и свою задачу в отдельном потоке с event loop, поэтому поток
+запроса никогда не ждёт подписчиков: при переполнении событие отбрасывается и
+учитывается в метриках.
+
+Подписчики, которым терять события нельзя (durable=True), — обычные функции: они
+выполняются прямо в on_commit, в потоке коммита, и должны быть быстрыми — записать
+строку в БД (outbox Telegram), сбросить ключи кэша. Долгая работа (сеть, SMTP)
+остаётся асинхронным подписчикам.
+"""
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+TASK_CREATED = 'task.created'
+TASK_UPDATED = 'task.updated'
+TASK_STATUS_CHANGED = 'task.status_changed'
+TASK_DELETED = 'task.deleted'
+COMMENT_ADDED = 'comment.added'
+FILE_ATTACHED = 'file.attached'
+# Пакетная операция (todo/bulk.py, импорт, фоновая просрочка): одно событие на пачку вместо события на задачу
+TASKS_BULK_CHANGED = 'tasks.bulk_changed'
+
+
+@dataclass(frozen=True)
+class DomainEvent:
+    name: str
+    payload: dict
+    published_at: float = field(default_factory=time.time)
+
+
+class _Consumer:
+    def __init__(self, name, handler, event_names, maxsize, durable=False):
+        self.name = name
+        self.handler = handler
+        self.event_names = set(event_names)
+        self.maxsize = maxsize
+        self.durable = durable
+        self.queue = None
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    async def handle(self, event):
+        try:
+            await self.handler(event)
+        except Exception:
+            self._record(event, failed=True)
+        else:
+            self._record(event)
+
+    def handle_now(self, event):
+        """Синхронный подписчик (durable) — сразу, в потоке коммита."""
+        try:
+            self.handler(event)
+        except Exception:
+            self._record(event, failed=True)
+        else:
+            self._record(event)
+
+    def _record(self, event, failed=False):
+        if failed:
+            self.failed += 1
+            logger.exception("Подписчик %s не обработал событие %s", self.name, event.name)
+        else:
+            self.processed += 1
+        self.last_lag = time.time() - event.published_at
+        self.max_lag = max(self.max_lag, self.last_lag)
+
+    async def run(self):
+        while True:
+            event = await self.queue.get()
+            await self.handle(event)
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("Очередь подписчика %s переполнена, событие %s отброшено", self.name, event.name)
+
+    def metrics(self):
+        return {
+            'queue_depth': self.queue.qsize() if self.queue else 0,
+            'queue_size': 0 if self.durable else self.maxsize,
+            'durable': self.durable,
+            'processed': self.processed,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'lag_seconds': round(self.last_lag, 3),
+            'max_lag_seconds': round(self.max_lag, 3),
+        }
+
+
+class EventBus:
+    def __init__(self, queue_size=1000):
+        self.queue_size = queue_size
+        self._consumers = []
+        self._loop = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+
+    def subscribe(self, *event_names, name=None, durable=False):
+        """Декоратор: регистрирует подписчика на перечисленные события.
+
+        Обычный подписчик — async-функция с очередью в фоновом потоке; durable —
+        синхронная функция, которая вызывается в on_commit и событий не теряет.
+        """
+        def decorator(handler):
+            consumer = _Consumer(name or handler.__name__, handler, event_names, self.queue_size, durable=durable)
+            with self._lock:
+                self._consumers.append(consumer)
+                if self._loop is not None and not durable:
+                    self._loop.call_soon_threadsafe(self._start_consumer, consumer)
+            return handler
+        return decorator
+
+    def publish(self, event_name, **payload):
+        event = DomainEvent(event_name, payload)
+        transaction.on_commit(lambda: self.dispatch(event))
+
+    def dispatch(self, event):
+        consumers = [consumer for consumer in self._consumers if event.name in consumer.event_names]
+        for consumer in consumers:
+            if consumer.durable:
+                consumer.handle_now(event)
+        consumers = [consumer for consumer in consumers if not consumer.durable]
+        if not consumers:
+            return
+        # TODO_EVENT_BUS_EAGER: подписчики выполняются сразу в потоке коммита (тесты, отладка)
+        if getattr(settings, 'TODO_EVENT_BUS_EAGER', False):
+            for consumer in consumers:
+                async_to_sync(consumer.handle)(event)
+            return
+        loop = self._ensure_loop()
+        for consumer in consumers:
+            loop.call_soon_threadsafe(consumer.put, event)
+
+    def metrics(self):
+        return {consumer.name: consumer.metrics() for consumer in self._consumers}
+
+    def _ensure_loop(self):
+        if self._loop is None:
+            with self._start_lock:
+                if self._loop is None:
+                    started = threading.Event()
+                    thread = threading.Thread(target=self._run_loop, args=(started,), name='todo-events', daemon=True)
+                    thread.start()
+                    started.wait()
+        return self._loop
+
+    def _run_loop(self, started):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        with self._lock:
+            self._loop = loop
+            for consumer in self._consumers:
+                if not consumer.durable:
+                    self._start_consumer(consumer)
+        started.set()
+        loop.run_forever()
+
+    def _start_consumer(self, consumer):
+        consumer.queue = asyncio.Queue(maxsize=consumer.maxsize)
+        self._loop.create_task(consumer.run())
+
+
+bus = EventBus(queue_size=getattr(settings, 'TODO_EVENT_QUEUE_SIZE', 1000))
+subscribe = bus.subscribe
+publish = bus.publish
@@ -0,0 +1,344 @@
+# todo/export.py
+"""Потоковая выгрузка задач, комментариев и вложений в CSV, JSONL и XLSX.
+
+Строки читаются QuerySet.values_list(...).iterator(chunk_size=CHUNK_SIZE) — в памяти
+одновременно только одна пачка (на PostgreSQL это серверный курсор), а файл
+отдаётся кусками по мере чтения. Поэтому память не растёт с числом строк, и
+выгрузка миллиона задач стоит столько же памяти, сколько выгрузка сотни.
+
+XLSX пишется без сторонних библиотек: zip с минимальным набором частей, строки
+листа — inline-строки, zip выводится потоком (без перемотки, с data descriptor).
+
+Текст пользователей, начинающийся с =, +, -, @ (или табуляции и перевода строки),
+табличный редактор принял бы за формулу. В CSV такие ячейки получают префикс «'»,
+в XLSX — стиль quotePrefix: ячейка остаётся текстом и при правке в Excel.
+
+Веб: /api/export/?dataset=tasks&format=csv&status=new&assignee=5&date_from=2026-01-01
+Консоль: python manage.py export_tasks --dataset comments --format xlsx -o comments.xlsx
+"""
+import csv
+import io
+import json
+import os
+import zipfile
+from datetime import datetime, time, timedelta
+from xml.sax.saxutils import escape
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Comment, TaskFile, TaskModel
+
+CHUNK_SIZE = 2000
+# Столько байт копится перед отдачей клиенту: не слать по строке за раз
+FLUSH_SIZE = 64 * 1024
+
+STATUS_LABELS = dict(TaskModel.STATUS_CHOICES)
+PRIORITY_LABELS = dict(TaskModel.PRIORITY_CHOICES)
+
+
+# С этих символов Excel, LibreOffice и Google Sheets начинают формулу
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def is_formula_like(value):
+    return isinstance(value, str) and value.startswith(FORMULA_PREFIXES)
+
+
+def _datetime(value):
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S') if value else ''
+
+
+class Dataset:
+    """Что выгружать: колонки (заголовок, поле, преобразование) и поле даты для фильтра."""
+    name = None
+    model = None
+    date_field = 'created_at'
+    columns = ()
+
+    def queryset(self, tasks):
+        # tasks — задачи, видимые пользователю и прошедшие фильтры
+        return self.model.objects.filter(task__in=tasks)
+
+    def header(self):
+        return [title for title, _, _ in self.columns]
+
+    def rows(self, tasks, date_from=None, date_to=None):
+        queryset = self.queryset(tasks)
+        if date_from:
+            queryset = queryset.filter(**{f'{self.date_field}__gte': date_from})
+        if date_to:
+            queryset = queryset.filter(**{f'{self.date_field}__lt': date_to})
+        fields = [field for _, field, _ in self.columns]
+        converters = [convert for _, _, convert in self.columns]
+        for row in queryset.order_by('pk').values_list(*fields).iterator(chunk_size=CHUNK_SIZE):
+            yield [convert(value) if convert else value for convert, value in zip(converters, row)]
+
+
+class TaskDataset(Dataset):
+    name = 'tasks'
+    model = TaskModel
+    columns = (
+        ('ID', 'pk', None),
+        ('Название', 'title', None),
+        ('Описание', 'description', None),
+        ('Статус', 'status', STATUS_LABELS.get),
+        ('Приоритет', 'priority', PRIORITY_LABELS.get),
+        ('Исполнитель', 'assignee__first_name', None),
+        ('ID исполнителя', 'assignee_id', None),
+        ('Создал', 'created_by__first_name', None),
+        ('Создана', 'created_at', _datetime),
+        ('Дедлайн', 'deadline', _datetime),
+        ('Изменена', 'updated_at', _datetime),
+    )
+
+    def queryset(self, tasks):
+        return tasks
+
+
+class CommentDataset(Dataset):
+    name = 'comments'
+    model = Comment
+    columns = (
+        ('ID', 'pk', None),
+        ('ID задачи', 'task_id', None),
+        ('Задача', 'task__title', None),
+        ('Автор', 'author__first_name', None),
+        ('Создан', 'created_at', _datetime),
+        ('Текст', 'text', None),
+    )
+
+
+class FileDataset(Dataset):
+    name = 'files'
+    model = TaskFile
+    date_field = 'uploaded_at'
+    columns = (
+        ('ID', 'pk', None),
+        ('ID задачи', 'task_id', None),
+        ('Задача', 'task__title', None),
+        ('Имя файла', 'original_name', None),
+        ('Путь', 'file', os.path.basename),
+        ('Размер, байт', 'blob__size', None),
+        ('SHA-256', 'blob_id', None),
+        ('Загружен', 'uploaded_at', _datetime),
+    )
+
+
+DATASETS = {dataset.name: dataset() for dataset in (TaskDataset, CommentDataset, FileDataset)}
+
+
+# === Форматы ===
+
+class _Buffer(io.RawIOBase):
+    """Поток, из которого накопленное забирается кусками (для csv и zipfile)."""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+
+class CsvWriter:
+    content_type = 'text/csv; charset=utf-8'
+    extension = 'csv'
+
+    def stream(self, header, rows):
+        buffer = _Buffer()
+        text = io.TextIOWrapper(buffer, encoding='utf-8', newline='', write_through=True)
+        writer = csv.writer(text)
+        # BOM: иначе Excel откроет кириллицу в cp1251
+        text.write('\ufeff')
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(["'" + value if is_formula_like(value) else value for value in row])
+            if buffer.size >= FLUSH_SIZE:
+                yield buffer.take()
+        yield buffer.take()
+
+
+class JsonlWriter:
+    content_type = 'application/x-ndjson; charset=utf-8'
+    extension = 'jsonl'
+
+    def stream(self, header, rows):
+        chunk = []
+        size = 0
+        for row in rows:
+            line = json.dumps(dict(zip(header, row)), ensure_ascii=False) + '\n'
+            chunk.append(line)
+            size += len(line)
+            if size >= FLUSH_SIZE:
+                yield ''.join(chunk).encode()
+                chunk, size = [], 0
+        yield ''.join(chunk).encode()
+
+
+class XlsxWriter:
+    content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    extension = 'xlsx'
+
+    CONTENT_TYPES = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    )
+    ROOT_RELS = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    )
+    WORKBOOK = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )
+    WORKBOOK_RELS = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+        '</Relationships>'
+    )
+    # Стиль 1 — quotePrefix: текст, похожий на формулу, так и остаётся текстом
+    STYLES = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0" quotePrefix="1"/></cellXfs>'
+        '</styleSheet>'
+    )
+    SHEET_START = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+    )
+    SHEET_END = '</sheetData></worksheet>'
+
+    def __init__(self, sheet_name='Выгрузка'):
+        self.sheet_name = sheet_name
+
+    @staticmethod
+    def _cell(value):
+        if value is None or value == '':
+            return '<c/>'
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return f'<c><v>{value}</v></c>'
+        # Управляющие символы в XML 1.0 недопустимы — Excel не откроет файл
+        text = ''.join(ch for ch in str(value) if ch in '\t\n\r' or ch >= ' ')
+        style = ' s="1"' if is_formula_like(value) else ''
+        return f'<c t="inlineStr"{style}><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+    def _row(self, values):
+        return '<row>' + ''.join(self._cell(value) for value in values) + '</row>'
+
+    def stream(self, header, rows):
+        buffer = _Buffer()
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('[Content_Types].xml', self.CONTENT_TYPES)
+            archive.writestr('_rels/.rels', self.ROOT_RELS)
+            archive.writestr('xl/workbook.xml', self.WORKBOOK.format(name=escape(self.sheet_name)))
+            archive.writestr('xl/_rels/workbook.xml.rels', self.WORKBOOK_RELS)
+            archive.writestr('xl/styles.xml', self.STYLES)
+            with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+                sheet.write((self.SHEET_START + self._row(header)).encode())
+                for row in rows:
+                    sheet.write(self._row(row).encode())
+                    if buffer.size >= FLUSH_SIZE:
+                        yield buffer.take()
+                sheet.write(self.SHEET_END.encode())
+        yield buffer.take()
+
+
+FORMATS = {'csv': CsvWriter, 'jsonl': JsonlWriter, 'xlsx': XlsxWriter}
+
+
+# === Фильтры ===
+
+def _parse_moment(value, name):
+    """Дата (начало дня) или дата-время; для date_to дата означает «до конца дня»."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError(f"{name}: ожидалась дата YYYY-MM-DD или дата-время ISO 8601")
+        moment = datetime.combine(day, time.min)
+        if name == 'date_to':
+            moment += timedelta(days=1)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def parse_filters(params):
+    """statuses, assignee_id, date_from, date_to из GET-параметров или опций команды."""
+    statuses = [status for status in params.get('status', []) if status]
+    unknown = set(statuses) - set(STATUS_LABELS)
+    if unknown:
+        raise ValidationError(f"status: неизвестные значения {', '.join(sorted(unknown))}")
+    assignee = params.get('assignee')
+    try:
+        assignee_id = int(assignee) if assignee else None
+    except ValueError:
+        raise ValidationError("assignee: ожидался id пользователя")
+    return {
+        'statuses': statuses,
+        'assignee_id': assignee_id,
+        'date_from': _parse_moment(params['date_from'], 'date_from') if params.get('date_from') else None,
+        'date_to': _parse_moment(params['date_to'], 'date_to') if params.get('date_to') else None,
+    }
+
+
+def filter_tasks(tasks, statuses=(), assignee_id=None):
+    if statuses:
+        tasks = tasks.filter(status__in=statuses)
+    if assignee_id is not None:
+        tasks = tasks.filter(assignee_id=assignee_id)
+    return tasks
+
+
+def export(dataset_name, format_name, tasks, statuses=(), assignee_id=None, date_from=None, date_to=None):
+    """(writer, генератор байтов). tasks — QuerySet видимых задач."""
+    dataset = DATASETS[dataset_name]
+    writer = FORMATS[format_name]()
+    rows = dataset.rows(filter_tasks(tasks, statuses, assignee_id), date_from, date_to)
+    return writer, writer.stream(dataset.header(), rows)
+
+
+def filename(dataset_name, format_name):
+    return f"{dataset_name}-{timezone.localdate():%Y%m%d}.{FORMATS[format_name].extension}"
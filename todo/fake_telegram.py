@@ -0,0 +1,102 @@
+# todo/fake_telegram.py
+"""Локальная замена Telegram Bot API для тестов и бенчмарков.
+
+    with FakeTelegramServer() as server:
+        bot = Bot(token, base_url=server.base_url)
+        ...
+        server.calls  # [(method, params), ...]
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8')
+        if self.headers.get('Content-Type', '').startswith('application/json'):
+            params = json.loads(body or '{}')
+        else:
+            params = dict(parse_qsl(body))
+        method = self.path.rsplit('/', 1)[-1]
+        status, payload = self.server.fake.handle(method, params)
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST
+
+
+class FakeTelegramServer:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+        # Сколько следующих sendMessage ответить 429 Too Many Requests
+        self.rate_limit_next = 0
+        self.retry_after = 1
+        # sendMessage с этой подстрокой в тексте — 400 Bad Request, как на битую HTML-разметку
+        self.reject_text = None
+        self._lock = threading.Lock()
+        self._message_id = 0
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address
+        return f'http://{host}:{port}/bot'
+
+    def sent_messages(self):
+        return [params for method, params in self.calls if method == 'sendMessage']
+
+    def handle(self, method, params):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls.append((method, params))
+            if method == 'getMe':
+                return 200, {'ok': True, 'result': {
+                    'id': 1, 'is_bot': True, 'first_name': 'Fake', 'username': 'fake_bot',
+                }}
+            if method == 'sendMessage' and self.rate_limit_next:
+                self.rate_limit_next -= 1
+                return 429, {
+                    'ok': False, 'error_code': 429, 'description': 'Too Many Requests',
+                    'parameters': {'retry_after': self.retry_after},
+                }
+            if method == 'sendMessage' and self.reject_text and self.reject_text in params.get('text', ''):
+                return 400, {'ok': False, 'error_code': 400, 'description': "Bad Request: can't parse entities"}
+            if method in ('sendMessage', 'editMessageText'):
+                self._message_id += 1
+                return 200, {'ok': True, 'result': {
+                    'message_id': self._message_id,
+                    'date': int(time.time()),
+                    'chat': {'id': int(params.get('chat_id', 0)), 'type': 'private'},
+                    'text': params.get('text', ''),
+                }}
+            return 200, {'ok': True, 'result': True}
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
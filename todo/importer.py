@@ -0,0 +1,246 @@
+# todo/importer.py
+"""Импорт задач из CSV или JSONL — для переноса отдела целиком вместо ввода по одной.
+
+Колонки (ключи JSONL): title, assignee, deadline, description, priority.
+    assignee — логин или email пользователя;
+    deadline — дата и время ISO 8601 («2026-11-01 18:00»); без часового пояса
+               считается в текущем, как в TaskCreateView.form_valid;
+    priority — код (high) или подпись (Высокий), по умолчанию medium.
+CSV — UTF-8 (BOM допускается) с заголовком, разделитель «,» или «;».
+
+Файл читается потоком: исполнители разрешаются по словарю, загруженному одним
+запросом, строки проверяются тем же build_task, что и пакетные операции, и
+пишутся bulk_create пачками по CHUNK_SIZE — каждая пачка в своей транзакции.
+В памяти одновременно только пачка, первые MAX_REPORTED_ERRORS ошибок и сводка по
+исполнителям, поэтому миллион строк импортируется так же, как сотня.
+
+Строки с ошибками пропускаются и попадают в отчёт (номер строки, текст ошибки);
+остальные импортируются. dry_run проверяет файл целиком, ничего не записывая.
+
+Консоль: python manage.py import_tasks tasks.csv --user boss --errors errors.csv
+Веб: POST /api/tasks/import/ (multipart: file, dry_run) — для файлов поменьше.
+"""
+import csv
+import io
+import itertools
+import json
+import logging
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters, dashboard, events, notifications, search
+from .bulk import MAX_REPORTED_ERRORS, build_task
+from .models import TaskModel, UserModel
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'jsonl')
+COLUMNS = ('title', 'assignee', 'deadline', 'description', 'priority')
+REQUIRED_COLUMNS = ('title', 'assignee', 'deadline')
+# Подписи приоритетов (как в выгрузке) тоже принимаются
+PRIORITY_CODES = {label.lower(): code for code, label in TaskModel.PRIORITY_CHOICES}
+CHUNK_SIZE = 1000
+# Сколько названий задач показывать исполнителю в итоговом уведомлении
+NOTIFY_SAMPLE = 10
+
+_AMBIGUOUS = object()
+
+
+class ImportFormatError(ValueError):
+    """Файл нельзя прочитать целиком: не та кодировка, нет нужных колонок."""
+
+
+@dataclass
+class ImportResult:
+    dry_run: bool = False
+    rows: int = 0
+    created: int = 0        # при dry_run — сколько было бы создано
+    errors: list = field(default_factory=list)  # первые MAX_REPORTED_ERRORS: {'line', 'error'}
+    error_count: int = 0
+
+    def add_error(self, line, error):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': error})
+
+    def as_dict(self):
+        return {
+            'dry_run': self.dry_run,
+            'rows': self.rows,
+            'created': self.created,
+            'errors': self.errors,
+            'error_count': self.error_count,
+        }
+
+
+def detect_format(name):
+    extension = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+    return {'ndjson': 'jsonl', 'json': 'jsonl'}.get(extension, extension) if extension else None
+
+
+def assignee_lookup():
+    """логин и email (без учёта регистра) -> id пользователя; одним запросом на весь импорт."""
+    by_username = {}
+    by_email = {}
+    for pk, username, email in UserModel.objects.filter(is_active=True).values_list('pk', 'username', 'email'):
+        by_username[username] = pk
+        if email:
+            email = email.lower()
+            by_email[email] = _AMBIGUOUS if email in by_email else pk
+    # Логин важнее совпавшего с ним чужого email
+    return {**by_email, **by_username}
+
+
+# === Чтение файла ===
+
+def _csv_records(stream):
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        first = text.readline()
+        # Excel с русской локалью сохраняет CSV через «;»
+        delimiter = ';' if first.count(';') > first.count(',') else ','
+        reader = csv.reader(itertools.chain([first], text), delimiter=delimiter)
+        header = [name.strip().lower() for name in next(reader, [])]
+        missing = [name for name in REQUIRED_COLUMNS if name not in header]
+        if missing:
+            raise ImportFormatError(f"В заголовке CSV нет колонок: {', '.join(missing)}")
+        for values in reader:
+            if not any(value.strip() for value in values):
+                continue
+            yield reader.line_num, dict(zip(header, values))
+    except UnicodeDecodeError:
+        raise ImportFormatError("Файл должен быть в кодировке UTF-8")
+
+
+def _jsonl_records(stream):
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, "некорректный JSON"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, "ожидался JSON-объект"
+            continue
+        yield line_number, {str(key).lower(): value for key, value in record.items()}
+
+
+def read_records(stream, format_name):
+    """(номер строки, словарь колонок или текст ошибки) — по одной записи за раз."""
+    if format_name not in FORMATS:
+        raise ImportFormatError(f"Формат должен быть одним из: {', '.join(FORMATS)}")
+    return _csv_records(stream) if format_name == 'csv' else _jsonl_records(stream)
+
+
+# === Проверка и запись ===
+
+def _build(record, lookup, user, now):
+    """Несохранённая задача по записи файла или (None, текст ошибки)."""
+    values = {}
+    for name in COLUMNS:
+        value = record.get(name)
+        if isinstance(value, str):
+            value = value.strip()
+        if value not in (None, ''):
+            values[name] = value
+
+    assignee = values.pop('assignee', None)
+    assignee_id = None
+    if isinstance(assignee, str):
+        assignee_id = lookup.get(assignee) or lookup.get(assignee.lower())
+    if assignee_id is None:
+        return None, f"assignee: пользователь «{assignee or ''}» не найден"
+    if assignee_id is _AMBIGUOUS:
+        return None, f"assignee: email {assignee} у нескольких пользователей, укажите логин"
+    priority = values.get('priority')
+    if isinstance(priority, str):
+        values['priority'] = PRIORITY_CODES.get(priority.lower(), priority)
+    return build_task(values, assignee_id, user, now)
+
+
+class _Summary:
+    """Что нужно после импорта: затронутые исполнители и по несколько их задач для уведомления."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.samples = defaultdict(list)
+
+    def add(self, tasks):
+        for task in tasks:
+            self.counts[task.assignee_id] += 1
+            if len(self.samples[task.assignee_id]) < NOTIFY_SAMPLE:
+                self.samples[task.assignee_id].append(task)
+
+
+def _save_chunk(tasks):
+    with transaction.atomic():
+        created = TaskModel.objects.bulk_create(tasks)
+        search.index_tasks([task.pk for task in created])
+        if counters.enabled():
+            for (assignee_id, status), count in Counter((task.assignee_id, task.status) for task in created).items():
+                counters.adjust(assignee_id, status, count)
+        dashboard.track((None, dashboard.snapshot(task)) for task in created)
+    return created
+
+
+def import_tasks(stream, format_name, user, dry_run=False, on_error=None, now=None, chunk_size=CHUNK_SIZE):
+    """Импортирует задачи из потока байтов. on_error(line, error) — для полного отчёта об ошибках."""
+    now = now or timezone.now()
+    lookup = assignee_lookup()
+    result = ImportResult(dry_run=dry_run)
+    summary = _Summary()
+    chunk = []
+
+    def flush():
+        if not dry_run:
+            summary.add(_save_chunk(chunk))
+        result.created += len(chunk)
+        chunk.clear()
+
+    for line, record in read_records(stream, format_name):
+        result.rows += 1
+        task, problem = (None, record) if isinstance(record, str) else _build(record, lookup, user, now)
+        if problem:
+            result.add_error(line, problem)
+            if on_error:
+                on_error(line, problem)
+            continue
+        chunk.append(task)
+        if len(chunk) >= chunk_size:
+            flush()
+    flush()
+
+    if not dry_run and summary.counts:
+        _finish(summary, user)
+    logger.info(
+        "Импорт задач %s%s: строк %s, создано %s, ошибок %s",
+        user, " (проверка)" if dry_run else "", result.rows, result.created, result.error_count,
+    )
+    return result
+
+
+def _finish(summary, user):
+    """То, что сигналы сделали бы по задаче, — один раз на весь импорт."""
+    affected = sorted(summary.counts)
+    events.publish(
+        events.TASKS_BULK_CHANGED,
+        created=[], reassigned=[], completed=[], deleted=[],
+        imported=sum(summary.counts.values()), assignee_ids=affected, user_id=user.pk if user else None,
+    )
+    chat_ids = notifications.active_chat_ids(affected)
+    messages = []
+    for assignee_id, count in summary.counts.items():
+        if assignee_id not in chat_ids:
+            continue
+        tasks = summary.samples[assignee_id]
+        if count == 1:
+            text = notifications.format_new_task_message(tasks[0])
+        else:
+            text = notifications.format_task_list_message("✅ Новые задачи", tasks, limit=NOTIFY_SAMPLE, total=count)
+        messages.append((chat_ids[assignee_id], text, tasks[0] if count == 1 else None))
+    notifications.enqueue_many(messages)
@@ -0,0 +1,60 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from todo import bulk
+from todo.models import UserModel
+
+
+class Command(BaseCommand):
+    help = "Пакетные операции над задачами из JSON-файла (формат — см. todo/bulk.py)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='JSON: {"operations": [...]} или просто список; «-» — stdin')
+        parser.add_argument('--user', required=True, help="Руководитель, от имени которого создаются задачи")
+        parser.add_argument('--dry-run', action='store_true', help="Только проверить пачку, ничего не записывая")
+
+    def handle(self, *args, **options):
+        try:
+            user = UserModel.objects.get(username=options['user'])
+        except UserModel.DoesNotExist:
+            raise CommandError(f"Пользователь {options['user']} не найден")
+        operations = self.read(options['file'])
+        if isinstance(operations, dict):
+            operations = operations.get('operations')
+
+        start = time.perf_counter()
+        try:
+            if options['dry_run']:
+                with transaction.atomic():
+                    plan = bulk.validate(operations, user)
+                self.stdout.write(self.style.SUCCESS(
+                    f"Пачка корректна: создать {len(plan.creates)}, переназначить {len(plan.reassign)}, "
+                    f"завершить {len(plan.complete)}, удалить {len(plan.delete)}"
+                ))
+                return
+            result = bulk.apply(operations, user)
+        except bulk.BulkValidationError as e:
+            for error in e.errors[:bulk.MAX_REPORTED_ERRORS]:
+                self.stderr.write(f"  #{error['index']}: {error['error']}")
+            raise CommandError(f"{e.message} (ошибок: {len(e.errors)})")
+        summary = result.as_dict()
+        self.stdout.write(self.style.SUCCESS(
+            f"Создано {len(summary['created'])}, переназначено {summary['reassigned']}, "
+            f"завершено {summary['completed']}, удалено {summary['deleted']} "
+            f"за {time.perf_counter() - start:.2f} с"
+        ))
+
+    def read(self, path):
+        try:
+            if path == '-':
+                return json.load(sys.stdin)
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except OSError as e:
+            raise CommandError(f"Не удалось прочитать {path}: {e}")
+        except ValueError as e:
+            raise CommandError(f"{path}: некорректный JSON ({e})")
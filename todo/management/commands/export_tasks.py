@@ -0,0 +1,43 @@
+import sys
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from todo import export
+from todo.models import TaskModel
+
+
+class Command(BaseCommand):
+    help = "Потоковая выгрузка задач, комментариев или вложений в CSV, JSONL или XLSX"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', choices=sorted(export.DATASETS), default='tasks')
+        parser.add_argument('--format', choices=sorted(export.FORMATS), default='csv')
+        parser.add_argument('-o', '--output', help="Файл (по умолчанию — stdout)")
+        parser.add_argument('--status', action='append', default=[], help="Статус задачи; можно несколько раз")
+        parser.add_argument('--assignee', help="ID исполнителя")
+        parser.add_argument('--date-from', help="С даты (YYYY-MM-DD или ISO 8601)")
+        parser.add_argument('--date-to', help="По дату включительно")
+
+    def handle(self, *args, **options):
+        try:
+            filters = export.parse_filters(options)
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+        _, content = export.export(options['dataset'], options['format'], TaskModel.objects.all(), **filters)
+
+        start = time.perf_counter()
+        size = 0
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for chunk in content:
+                output.write(chunk)
+                size += len(chunk)
+        finally:
+            if options['output']:
+                output.close()
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Записано {size / 1024 / 1024:.1f} МБ в {options['output']} за {time.perf_counter() - start:.1f} с"
+            ))
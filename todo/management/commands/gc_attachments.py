@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from todo.attachments import collect_garbage
+
+
+class Command(BaseCommand):
+    help = "Удаляет файлы вложений, на которые не ссылается ни одна задача, и брошенные загрузки"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recount', action='store_true', help="Сначала пересчитать счётчики ссылок")
+
+    def handle(self, *args, **options):
+        blobs, uploads = collect_garbage(recount=options['recount'])
+        self.stdout.write(self.style.SUCCESS(f"Удалено файлов: {blobs}, брошенных загрузок: {uploads}"))
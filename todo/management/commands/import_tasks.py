@@ -0,0 +1,57 @@
+import csv
+import sys
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from todo import importer
+from todo.models import UserModel
+
+
+class Command(BaseCommand):
+    help = "Импорт задач из CSV или JSONL (колонки — см. todo/importer.py)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="CSV или JSONL; «-» — stdin (тогда нужен --format)")
+        parser.add_argument('--format', choices=importer.FORMATS, help="По умолчанию — по расширению файла")
+        parser.add_argument('--user', required=True, help="Руководитель, от имени которого создаются задачи")
+        parser.add_argument('--dry-run', action='store_true', help="Только проверить файл, ничего не записывая")
+        parser.add_argument('--errors', help="Записать все ошибки в CSV (строка, ошибка)")
+
+    def handle(self, *args, **options):
+        try:
+            user = UserModel.objects.get(username=options['user'])
+        except UserModel.DoesNotExist:
+            raise CommandError(f"Пользователь {options['user']} не найден")
+        path = options['file']
+        format_name = options['format'] or importer.detect_format(path)
+        if format_name not in importer.FORMATS:
+            raise CommandError("Не удалось определить формат, укажите --format")
+
+        report = open(options['errors'], 'w', encoding='utf-8', newline='') if options['errors'] else None
+        on_error = None
+        if report:
+            writer = csv.writer(report)
+            writer.writerow(['line', 'error'])
+            on_error = lambda line, error: writer.writerow([line, error])
+        start = time.perf_counter()
+        try:
+            with nullcontext(sys.stdin.buffer) if path == '-' else open(path, 'rb') as stream:
+                result = importer.import_tasks(stream, format_name, user, dry_run=options['dry_run'], on_error=on_error)
+        except OSError as e:
+            raise CommandError(f"Не удалось прочитать {path}: {e}")
+        except importer.ImportFormatError as e:
+            raise CommandError(str(e))
+        finally:
+            if report:
+                report.close()
+
+        if not report:
+            for error in result.errors:
+                self.stderr.write(f"  строка {error['line']}: {error['error']}")
+        verb = "Можно создать" if result.dry_run else "Создано"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result.created} задач из {result.rows} строк, ошибок {result.error_count} "
+            f"за {time.perf_counter() - start:.1f} с"
+        ))
@@ -0,0 +1,71 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import Resolver404, resolve
+
+from todo import profiling
+from todo.models import UserModel
+
+
+class Command(BaseCommand):
+    help = "Сводка журнала профилирования или разовый замер страницы (--url)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', help="Журнал JSONL (по умолчанию TODO_PROFILING_LOG)")
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--url', help="Профилировать этот адрес, например /api/tasks/")
+        parser.add_argument('--user', help="Имя пользователя, от которого делать запросы к --url")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if options['url']:
+            records = self.profile_url(options['url'], options['user'], options['repeat'])
+        else:
+            path = options['log'] or getattr(settings, 'TODO_PROFILING_LOG', None)
+            if not path or not profiling.log_files(path):
+                raise CommandError("Журнал профилирования не найден — включите TODO_PROFILING или укажите --log")
+            records = profiling.read_log(path)
+        self.print_summary(profiling.summarize(records, options['top']))
+
+    def profile_url(self, url, username, repeat):
+        try:
+            resolve(url.split('?')[0])
+        except Resolver404:
+            raise CommandError(f"Адрес {url} не найден")
+        client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost')
+        if username:
+            try:
+                client.force_login(UserModel.objects.get(username=username))
+            except UserModel.DoesNotExist:
+                raise CommandError(f"Пользователь {username} не найден")
+        # Запросы middleware и шаблонов иначе приписывались бы этой команде
+        profiling.IGNORED_FILES.add(os.path.abspath(__file__))
+        records = []
+        for _ in range(repeat):
+            recorder = profiling.QueryRecorder()
+            start = time.perf_counter()
+            with profiling.record_queries(recorder):
+                response = client.get(url)
+            records.append(profiling.build_record(response.wsgi_request, response, time.perf_counter() - start, recorder))
+        return records
+
+    def print_summary(self, summary):
+        self.stdout.write(self.style.MIGRATE_HEADING("View (по убыванию p95)"))
+        for row in summary['views']:
+            self.stdout.write(
+                f"  {row['view']:<40} запросов {row['requests']:>6}  p50 {row['p50_ms']:>8.1f} мс  "
+                f"p95 {row['p95_ms']:>8.1f} мс  SQL/запрос {row['avg_queries']}"
+            )
+        if summary['duplicates']:
+            self.stdout.write(self.style.MIGRATE_HEADING("Повторяющиеся запросы (N+1)"))
+            for item in summary['duplicates']:
+                self.stdout.write(f"  {item['count']:>4}× {item['view']}  {item['origin'] or '?'}")
+                self.stdout.write(f"        {item['sql'][:200]}")
+        if summary['slow_queries']:
+            self.stdout.write(self.style.MIGRATE_HEADING("Самые медленные SQL"))
+            for item in summary['slow_queries']:
+                self.stdout.write(f"  {item['ms']:>8.1f} мс  {item['view']}  {item['origin'] or '?'}")
+                self.stdout.write(f"        {item['sql'][:200]}")
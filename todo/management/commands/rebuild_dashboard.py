@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from todo.dashboard import rebuild
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает сводку руководителя (TaskSummary, TaskDaySummary) по таблице задач"
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Строк сводки: {count}"))
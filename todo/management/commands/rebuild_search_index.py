@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from todo import search
+
+
+class Command(BaseCommand):
+    help = "Переиндексирует все задачи для полнотекстового поиска"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if not search.available():
+            self.stdout.write(self.style.WARNING("Индекс поиска недоступен для этой СУБД — поиск работает через icontains"))
+            return
+        count = search.rebuild(batch_size=options['batch_size'], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f"Проиндексировано задач: {count}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from todo.counters import rebuild
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает таблицу счётчиков задач пользователей (UserTaskCounter)"
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано пользователей: {count}"))
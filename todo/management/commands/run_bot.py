@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from todo.bot_runner import run
+
+
+class Command(BaseCommand):
+    help = "Запускает Telegram-бота отдельным процессом (webhook-воркеры или long polling)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode', choices=['webhook', 'polling'], help="По умолчанию — TELEGRAM_BOT_MODE из настроек",
+        )
+        parser.add_argument('--workers', type=int, default=4, help="Сколько апдейтов обрабатывать параллельно")
+        parser.add_argument(
+            '--set-webhook', metavar='URL',
+            help="Зарегистрировать webhook в Telegram, например https://example.com/api/telegram/webhook/",
+        )
+
+    def handle(self, *args, **options):
+        run(mode=options['mode'], workers=options['workers'], webhook_url=options['set_webhook'])
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from todo.overdue import run_forever, sweep_overdue
+
+
+class Command(BaseCommand):
+    help = "Переводит задачи с прошедшим дедлайном в статус «Просрочена»"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Сколько задач обновлять за один UPDATE")
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help="Повторять каждые N секунд (0 — один проход и выход)",
+        )
+
+    def handle(self, *args, **options):
+        if options['interval']:
+            run_forever(interval=options['interval'], batch_size=options['batch_size'])
+        else:
+            count = sweep_overdue(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"Просрочено задач: {count}"))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0012_telegramusermodel_username'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskmodel',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now, verbose_name='Изменена'),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField(verbose_name='ID задачи')),
+                ('assignee_id', models.BigIntegerField(blank=True, null=True, verbose_name='ID исполнителя')),
+                ('deleted_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Удалена')),
+            ],
+            options={
+                'verbose_name': 'Удалённая задача',
+                'verbose_name_plural': 'Удалённые задачи',
+                'ordering': ['-deleted_at'],
+            },
+        ),
+    ]
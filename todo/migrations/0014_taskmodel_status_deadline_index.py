@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0013_taskmodel_updated_at_tasktombstone'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taskmodel',
+            index=models.Index(fields=['status', 'deadline'], name='todo_task_status_deadline_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0014_taskmodel_status_deadline_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taskmodel',
+            index=models.Index(condition=models.Q(('status__in', ['new', 'in_progress', 'overdue'])), fields=['assignee', 'status', 'deadline'], name='todo_task_active_assignee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskmodel',
+            index=models.Index(fields=['-created_at'], name='todo_task_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskmodel',
+            index=models.Index(fields=['assignee', '-created_at'], name='todo_task_assignee_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskmodel',
+            index=models.Index(fields=['assignee', 'updated_at'], name='todo_task_assignee_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasktombstone',
+            index=models.Index(fields=['assignee_id', 'deleted_at'], name='todo_tombstone_assignee_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:20
+
+import django.db.models.deletion
+import todo.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0015_task_access_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTaskCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('new', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('overdue', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Счётчик задач',
+                'verbose_name_plural': 'Счётчики задач',
+            },
+        ),
+        migrations.AlterModelManagers(
+            name='usermodel',
+            managers=[
+                ('objects', todo.models.TaskUserManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0017_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelegramUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('update_id', models.BigIntegerField(unique=True, verbose_name='Update ID')),
+                ('payload', models.JSONField(verbose_name='Данные')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает'), ('processing', 'Обрабатывается'), ('done', 'Обработан'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток')),
+                ('claimed_by', models.CharField(blank=True, max_length=100, verbose_name='Воркер')),
+                ('claimed_until', models.DateTimeField(blank=True, null=True, verbose_name='Аренда до')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Получен')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Обработан')),
+            ],
+            options={
+                'verbose_name': 'Telegram-апдейт',
+                'verbose_name_plural': 'Telegram-апдейты',
+                'ordering': ['update_id'],
+                'indexes': [models.Index(fields=['status', 'update_id'], name='todo_tgupdate_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:27
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0018_telegramupdate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskfile',
+            name='original_name',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Имя файла'),
+        ),
+        migrations.AlterField(
+            model_name='taskfile',
+            name='file',
+            field=models.FileField(max_length=255, upload_to='task_files/', verbose_name='Файл'),
+        ),
+        migrations.CreateModel(
+            name='FileBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='SHA-256')),
+                ('file', models.FileField(max_length=255, upload_to='blobs/', verbose_name='Файл')),
+                ('size', models.BigIntegerField(verbose_name='Размер')),
+                ('ref_count', models.IntegerField(default=0, verbose_name='Ссылок')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создан')),
+            ],
+            options={
+                'verbose_name': 'Содержимое файла',
+                'verbose_name_plural': 'Содержимое файлов',
+                'indexes': [models.Index(fields=['ref_count', 'created_at'], name='todo_blob_orphan_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='taskfile',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='task_files', to='todo.fileblob', verbose_name='Содержимое'),
+        ),
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='Имя файла')),
+                ('size', models.BigIntegerField(verbose_name='Размер')),
+                ('offset', models.BigIntegerField(default=0, verbose_name='Получено байт')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Начата')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлена')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Загрузка',
+                'verbose_name_plural': 'Незавершённые загрузки',
+            },
+        ),
+    ]
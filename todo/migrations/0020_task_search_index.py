@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                # Без FTS5 поиск работает через icontains (см. todo/search.py)
+                return
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE todo_task_search USING fts5("
+            "title, body, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE todo_task_search ("
+            "task_id bigint PRIMARY KEY, document tsvector NOT NULL)"
+        )
+        schema_editor.execute("CREATE INDEX todo_task_search_gin ON todo_task_search USING gin (document)")
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute("DROP TABLE IF EXISTS todo_task_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0019_content_addressed_attachments'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+# Только для PostgreSQL: очереди в основном состоят из отправленных/обработанных строк,
+# а забирают из них лишь «живые». Частичный индекс содержит только их и остаётся
+# маленьким, сколько бы ни копилось истории. На SQLite планировщик не применяет
+# частичный индекс к запросу с параметрами вместо литералов, поэтому там остаются
+# обычные индексы из models.py.
+PARTIAL_INDEXES = [
+    (
+        'todo_outbox_pending_idx', 'todo_notificationoutbox', '(next_attempt_at, id)',
+        "status = 'pending'",
+    ),
+    (
+        'todo_tgupdate_available_idx', 'todo_telegramupdate', '(update_id)',
+        "status IN ('pending', 'processing')",
+    ),
+    (
+        'todo_task_overdue_candidates_idx', 'todo_taskmodel', '(deadline)',
+        "status IN ('new', 'in_progress')",
+    ),
+    (
+        'todo_blob_orphan_pending_idx', 'todo_fileblob', '(created_at)',
+        'ref_count <= 0',
+    ),
+]
+
+
+def create_partial_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, columns, condition in PARTIAL_INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} {columns} WHERE {condition}')
+
+
+def drop_partial_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, *_ in PARTIAL_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0020_task_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_partial_indexes, drop_partial_indexes),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0021_postgres_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['task', '-created_at', '-id'], name='todo_comment_task_created_idx'),
+        ),
+    ]
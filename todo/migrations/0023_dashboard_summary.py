@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_completed_at(apps, schema_editor):
+    # Для уже завершённых задач точного времени нет — берём время последнего изменения
+    TaskModel = apps.get_model('todo', 'TaskModel')
+    TaskModel.objects.filter(status='completed').update(completed_at=models.F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0022_comment_task_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskmodel',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Завершена'),
+        ),
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='TaskDaySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('overdue', 'Просрочены (день дедлайна)'), ('completed', 'Завершены (начало недели)')], max_length=10)),
+                ('day', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('assignee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Сводка задач по дням',
+                'verbose_name_plural': 'Сводка задач по дням',
+                'indexes': [models.Index(fields=['kind', 'day'], name='todo_task_day_summary_kind_idx')],
+                'constraints': [models.UniqueConstraint(fields=('assignee', 'kind', 'day'), name='todo_task_day_summary_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('new', 'Новая'), ('in_progress', 'В работе'), ('completed', 'Завершена'), ('overdue', 'Просрочена')], max_length=15)),
+                ('priority', models.CharField(choices=[('low', 'Низкий'), ('medium', 'Средний'), ('high', 'Высокий'), ('urgent', 'Срочно')], max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('assignee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Сводка задач',
+                'verbose_name_plural': 'Сводка задач',
+                'constraints': [models.UniqueConstraint(fields=('assignee', 'status', 'priority'), name='todo_task_summary_cell_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+from django.db.models import Count, DateField
+from django.db.models.functions import TruncDate, TruncWeek
+
+
+def fill_dashboard_summary(apps, schema_editor):
+    # То же, что dashboard.rebuild(): иначе до первой сверки сводка показывала бы
+    # только изменения после выкладки
+    TaskModel = apps.get_model('todo', 'TaskModel')
+    TaskSummary = apps.get_model('todo', 'TaskSummary')
+    TaskDaySummary = apps.get_model('todo', 'TaskDaySummary')
+    tasks = TaskModel.objects.order_by()
+
+    TaskSummary.objects.all().delete()
+    TaskDaySummary.objects.all().delete()
+    TaskSummary.objects.bulk_create([
+        TaskSummary(assignee_id=assignee_id, status=status, priority=priority, count=count)
+        for assignee_id, status, priority, count
+        in tasks.values_list('assignee_id', 'status', 'priority').annotate(Count('id'))
+    ], batch_size=1000)
+    overdue = (
+        tasks.filter(status='overdue').annotate(day=TruncDate('deadline'))
+        .values_list('assignee_id', 'day').annotate(Count('id'))
+    )
+    completed = (
+        tasks.filter(status='completed', completed_at__isnull=False)
+        .annotate(day=TruncWeek('completed_at', output_field=DateField()))
+        .values_list('assignee_id', 'day').annotate(Count('id'))
+    )
+    TaskDaySummary.objects.bulk_create([
+        TaskDaySummary(assignee_id=assignee_id, kind=kind, day=day, count=count)
+        for kind, rows in (('overdue', overdue), ('completed', completed))
+        for assignee_id, day, count in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0023_dashboard_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_dashboard_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0024_fill_dashboard_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='telegramupdate',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Следующая попытка'),
+        ),
+    ]
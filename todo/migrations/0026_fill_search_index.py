@@ -0,0 +1,65 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+from todo import stemmer
+
+BATCH_SIZE = 2000
+
+
+def _documents(TaskModel, Comment, task_ids):
+    comments = defaultdict(list)
+    for task_id, text in Comment.objects.filter(task_id__in=task_ids).order_by('id').values_list('task_id', 'text'):
+        comments[task_id].append(text)
+    return [
+        (task_id, title, '\n'.join([description or '', *comments[task_id]]))
+        for task_id, title, description in TaskModel.objects.filter(pk__in=task_ids).values_list('id', 'title', 'description')
+    ]
+
+
+def fill_search_index(apps, schema_editor):
+    # То же, что search.rebuild(): 0020 создала пустой индекс, и задачи, созданные до
+    # выкладки, не находились бы до ручного rebuild_search_index
+    connection = schema_editor.connection
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    if 'todo_task_search' not in connection.introspection.table_names():
+        # SQLite без FTS5 — поиск через icontains
+        return
+    TaskModel = apps.get_model('todo', 'TaskModel')
+    Comment = apps.get_model('todo', 'Comment')
+
+    last_id = 0
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM todo_task_search')
+        while True:
+            ids = list(TaskModel.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:BATCH_SIZE])
+            if not ids:
+                break
+            documents = _documents(TaskModel, Comment, ids)
+            if connection.vendor == 'sqlite':
+                cursor.executemany(
+                    'INSERT INTO todo_task_search (rowid, title, body) VALUES (%s, %s, %s)',
+                    [
+                        (task_id, ' '.join(stemmer.tokens(title)), ' '.join(stemmer.tokens(body)))
+                        for task_id, title, body in documents
+                    ],
+                )
+            else:
+                cursor.executemany(
+                    "INSERT INTO todo_task_search (task_id, document) VALUES "
+                    "(%s, setweight(to_tsvector('russian', %s), 'A') || setweight(to_tsvector('russian', %s), 'B'))",
+                    documents,
+                )
+            last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0025_telegram_update_backoff'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,56 @@
 from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.conf import settings
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.db.models import Count, Q
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 from django.utils import timezone
+from datetime import timedelta
 import logging
+import os
+import uuid
 
 logger = logging.getLogger(__name__)
 
+# Задачи, которые ещё висят на исполнителе (их показывают список, календарь и бот)
+ACTIVE_TASK_STATUSES = ['new', 'in_progress', 'overdue']
+
+# Какие счётчики задач считаются для пользователя: имя аннотации → условие по статусу
+TASK_COUNTER_FILTERS = {
+    'tasks_total': None,
+    'tasks_completed': Q(tasks__status='completed'),
+    'tasks_in_progress': Q(tasks__status='in_progress'),
+    'tasks_overdue': Q(tasks__status='overdue'),
+    'tasks_active': ~Q(tasks__status='completed'),
+}
+
+
+class UserQuerySet(models.QuerySet):
+    def with_task_counts(self):
+        """Все счётчики задач одним запросом (условная агрегация или таблица UserTaskCounter)."""
+        if getattr(settings, 'TODO_DENORMALIZED_TASK_COUNTERS', False):
+            counter = 'task_counter__'
+            return self.annotate(
+                tasks_completed=Coalesce(models.F(counter + 'completed'), 0),
+                tasks_in_progress=Coalesce(models.F(counter + 'in_progress'), 0),
+                tasks_overdue=Coalesce(models.F(counter + 'overdue'), 0),
+                tasks_active=Coalesce(
+                    models.F(counter + 'new') + models.F(counter + 'in_progress') + models.F(counter + 'overdue'), 0
+                ),
+                tasks_total=Coalesce(
+                    models.F(counter + 'new') + models.F(counter + 'in_progress')
+                    + models.F(counter + 'overdue') + models.F(counter + 'completed'), 0
+                ),
+            )
+        return self.annotate(**{
+            name: Count('tasks', filter=condition) for name, condition in TASK_COUNTER_FILTERS.items()
+        })
+
+
+class TaskUserManager(UserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 # Create your models here.
 class UserModel(AbstractUser):
     ROLE_CHOICES = [
@@ -16,25 +61,40 @@ class UserModel(AbstractUser):
     email = models.EmailField(unique=True, verbose_name='Email')
     telegram_link_code = models.CharField(max_length=32, blank=True, null=True, unique=True)
     telegram_link_expires = models.DateTimeField(blank=True, null=True)
-    
+
+    objects = TaskUserManager()
+
+    def _task_count(self, name):
+        # Если пользователь загружен через with_task_counts(), отдельный COUNT не нужен
+        if name not in self.__dict__:
+            condition = TASK_COUNTER_FILTERS[name]
+            self.__dict__[name] = UserModel.objects.filter(pk=self.pk).aggregate(
+                value=Count('tasks', filter=condition)
+            )['value']
+        return self.__dict__[name]
+
+    @property
+    def total_tasks_count(self):
+        return self._task_count('tasks_total')
+
     @property
     def completed_tasks_count(self):
-        return self.tasks.filter(status='completed').count()
+        return self._task_count('tasks_completed')
 
     @property
     def in_progress_tasks_count(self):
-        return self.tasks.filter(status='in_progress').count()
+        return self._task_count('tasks_in_progress')
 
     @property
     def overdue_tasks_count(self):
-        return self.tasks.filter(status='overdue').count()
+        return self._task_count('tasks_overdue')
 
     def __str__(self):
         return f"{self.first_name} ({self.get_role_display()})"
     
     @property
     def active_tasks_count(self):
-        return self.tasks.exclude(status='completed').count()
+        return self._task_count('tasks_active')
     
 class TaskModel(models.Model):
     PRIORITY_CHOICES = [
@@ -59,22 +119,162 @@ class TaskModel(models.Model):
     deadline = models.DateTimeField(verbose_name="Дедлайн")
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='medium', verbose_name="Приоритет")
     status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='new', verbose_name='Статус')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Изменена")
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name="Завершена")
+
+    ACTIVE_STATUSES = ACTIVE_TASK_STATUSES
+    # Статусы, которые автоматически становятся «просрочена» после дедлайна
+    OVERDUE_CANDIDATE_STATUSES = ('new', 'in_progress')
 
     class Meta:
         verbose_name = "Задача"
         verbose_name_plural = "Задачи"
         ordering = ['-created_at']
+        indexes = [
+            # Диапазонный проход по дедлайнам для фонового поиска просроченных задач
+            models.Index(fields=['status', 'deadline'], name='todo_task_status_deadline_idx'),
+            # Активные задачи исполнителя: /api/tasks/, календарь, бот.
+            # Частичный индекс работает там, где Django подставляет литералы (PostgreSQL);
+            # SQLite с параметрами запроса его не выбирает и идёт по assignee_created_idx
+            models.Index(
+                fields=['assignee', 'status', 'deadline'],
+                condition=models.Q(status__in=ACTIVE_TASK_STATUSES),
+                name='todo_task_active_assignee_idx',
+            ),
+            # Списки руководителя и /api/tasks/ без фильтра по исполнителю, сортировка по умолчанию
+            models.Index(fields=['-created_at'], name='todo_task_created_idx'),
+            # Списки и история сотрудника в порядке создания
+            models.Index(fields=['assignee', '-created_at'], name='todo_task_assignee_created_idx'),
+            # Дельта-синхронизация: что изменилось у исполнителя после since
+            models.Index(fields=['assignee', 'updated_at'], name='todo_task_assignee_updated_idx'),
+        ]
 
     def __str__(self):
         return f"[{self.get_status_display()}] {self.title} → {self.assignee}"
+
+    @property
+    def effective_status(self):
+        """Статус с учётом дедлайна, даже если фоновая проверка ещё не успела его обновить."""
+        if self.status in self.OVERDUE_CANDIDATE_STATUSES and self.deadline < timezone.now():
+            return 'overdue'
+        return self.status
+
+    def get_effective_status_display(self):
+        return dict(self.STATUS_CHOICES).get(self.effective_status, self.effective_status)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем исходные значения, чтобы сигналы видели, что именно изменилось
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_loaded_value(self, field_name, default=None):
+        """Значение поля на момент загрузки из БД (None для новых объектов)."""
+        return getattr(self, '_loaded_values', {}).get(field_name, default)
     
     def save(self, *args, **kwargs):
-        logger.info(f"Сохраняем задачу {self.id}: status={self.status}, deadline={self.deadline}, now={timezone.now()}")
+        # Аргументы, а не f-строка: при выключенном DEBUG строка даже не форматируется
+        logger.debug("Сохраняем задачу %s: status=%s, deadline=%s", self.id, self.status, self.deadline)
         if self.deadline < timezone.now() and self.status != 'completed':
-            logger.info(f"Задача {self.id} просрочена → меняем статус на 'overdue'")
+            logger.info("Задача %s просрочена → меняем статус на 'overdue'", self.id)
             self.status = 'overdue'
+        # Неделя завершения — для сводки руководителя (todo/dashboard.py)
+        if self.status == 'completed':
+            self.completed_at = self.completed_at or timezone.now()
+        else:
+            self.completed_at = None
         super().save(*args, **kwargs)
+        # После сохранения текущие значения становятся «исходными» для следующего save()
+        self._loaded_values = {f.attname: getattr(self, f.attname) for f in self._meta.concrete_fields}
     
+class UserTaskCounter(models.Model):
+    """Денормализованные счётчики задач пользователя по статусам.
+
+    Включается настройкой TODO_DENORMALIZED_TASK_COUNTERS; поддерживается сигналами
+    (см. todo/counters.py), пересобирается командой rebuild_task_counters.
+    """
+    user = models.OneToOneField(UserModel, on_delete=models.CASCADE, primary_key=True, related_name='task_counter')
+    new = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    overdue = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Счётчик задач"
+        verbose_name_plural = "Счётчики задач"
+
+    def __str__(self):
+        return f"{self.user}: {self.new}/{self.in_progress}/{self.completed}/{self.overdue}"
+
+class TaskSummary(models.Model):
+    """Число задач исполнителя в ячейке статус × приоритет — для сводки руководителя.
+
+    Поддерживается приращениями при смене статуса (см. todo/dashboard.py) и
+    периодически сверяется с таблицей задач.
+    """
+    assignee = models.ForeignKey(UserModel, on_delete=models.CASCADE, related_name='+')
+    status = models.CharField(max_length=15, choices=TaskModel.STATUS_CHOICES)
+    priority = models.CharField(max_length=10, choices=TaskModel.PRIORITY_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Сводка задач"
+        verbose_name_plural = "Сводка задач"
+        constraints = [
+            models.UniqueConstraint(fields=['assignee', 'status', 'priority'], name='todo_task_summary_cell_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.assignee_id}: {self.status}/{self.priority} = {self.count}"
+
+class TaskDaySummary(models.Model):
+    """Число задач исполнителя по дням: просроченные — по дню дедлайна, завершённые — по неделе завершения."""
+    OVERDUE = 'overdue'
+    COMPLETED = 'completed'
+    KIND_CHOICES = [(OVERDUE, 'Просрочены (день дедлайна)'), (COMPLETED, 'Завершены (начало недели)')]
+
+    assignee = models.ForeignKey(UserModel, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    day = models.DateField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Сводка задач по дням"
+        verbose_name_plural = "Сводка задач по дням"
+        constraints = [
+            models.UniqueConstraint(fields=['assignee', 'kind', 'day'], name='todo_task_day_summary_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'day'], name='todo_task_day_summary_kind_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.assignee_id}: {self.kind} {self.day} = {self.count}"
+
+class TaskTombstone(models.Model):
+    """Отметка об исчезновении задачи из выборки пользователя (удаление или смена исполнителя).
+
+    Нужна для дельта-синхронизации /api/tasks/: клиент узнаёт, какие задачи убрать из списка.
+    """
+    task_id = models.BigIntegerField(verbose_name="ID задачи")
+    assignee_id = models.BigIntegerField(null=True, blank=True, verbose_name="ID исполнителя")
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name="Удалена")
+
+    # Сколько хранить отметки: клиент с более старым курсором получает полный список
+    RETENTION = timedelta(days=7)
+
+    class Meta:
+        verbose_name = "Удалённая задача"
+        verbose_name_plural = "Удалённые задачи"
+        ordering = ['-deleted_at']
+        indexes = [
+            models.Index(fields=['assignee_id', 'deleted_at'], name='todo_tombstone_assignee_idx'),
+        ]
+
+    def __str__(self):
+        return f"Задача {self.task_id} удалена {self.deleted_at}"
+
 class TelegramUserModel(models.Model):
     user = models.OneToOneField(UserModel, on_delete=models.CASCADE, related_name="telegram_profile", null=True, blank=True)
     telegram_id = models.CharField(max_length=50, unique=True, verbose_name="Telegram ID")
@@ -91,13 +291,63 @@ class TelegramUserModel(models.Model):
             return f"{self.user.username} → @{self.username}"
         return f"{self.user.username} → {self.telegram_id}"
     
+class FileBlob(models.Model):
+    """Содержимое вложения, хранится один раз по SHA-256 (см. todo/attachments.py).
+
+    ref_count — сколько TaskFile на него ссылаются; блобы с нулём удаляет gc_attachments."""
+    sha256 = models.CharField(max_length=64, primary_key=True, verbose_name="SHA-256")
+    file = models.FileField(upload_to='blobs/', max_length=255, verbose_name="Файл")
+    size = models.BigIntegerField(verbose_name="Размер")
+    ref_count = models.IntegerField(default=0, verbose_name="Ссылок")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создан")
+
+    class Meta:
+        verbose_name = "Содержимое файла"
+        verbose_name_plural = "Содержимое файлов"
+        indexes = [
+            models.Index(fields=['ref_count', 'created_at'], name='todo_blob_orphan_idx'),
+        ]
+
+    def __str__(self):
+        return self.sha256
+
+
 class TaskFile(models.Model):
     task = models.ForeignKey(TaskModel, on_delete=models.CASCADE, related_name='files', verbose_name='Задача')
-    file = models.FileField(upload_to='task_files/', verbose_name='Файл')
+    # Для новых вложений file указывает на тот же путь, что и blob.file
+    file = models.FileField(upload_to='task_files/', max_length=255, verbose_name='Файл')
+    blob = models.ForeignKey(FileBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='task_files', verbose_name='Содержимое')
+    original_name = models.CharField(max_length=255, blank=True, verbose_name='Имя файла')
     uploaded_at = models.DateTimeField(auto_now_add=True, verbose_name='Загружен')
 
     def __str__(self):
-        return self.file.name
+        return self.display_name
+
+    @property
+    def display_name(self):
+        return self.original_name or os.path.basename(self.file.name)
+
+    def get_absolute_url(self):
+        return reverse('todo:download_file', kwargs={'file_id': self.pk})
+
+
+class UploadSession(models.Model):
+    """Загрузка файла по частям. Части дописываются в файл во временном каталоге,
+    клиент может продолжить с offset после обрыва связи."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255, verbose_name="Имя файла")
+    size = models.BigIntegerField(verbose_name="Размер")
+    offset = models.BigIntegerField(default=0, verbose_name="Получено байт")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Начата")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлена")
+
+    class Meta:
+        verbose_name = "Загрузка"
+        verbose_name_plural = "Незавершённые загрузки"
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
     
 class Comment(models.Model):
     task = models.ForeignKey(TaskModel, related_name='comments', on_delete=models.CASCADE)
@@ -105,8 +355,77 @@ class Comment(models.Model):
     text = models.TextField(max_length=10000)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Страница комментариев карточки задачи: от новых к старым по курсору
+            models.Index(fields=['task', '-created_at', '-id'], name='todo_comment_task_created_idx'),
+        ]
+
     def __str__(self):
         return f'Комментарий от {self.author.first_name} к задаче {self.task.title}'
     
 def get_absolute_url(self):
-    return reverse('todo:task_detail', kwargs={'pk': self.pk})
\ No newline at end of file
+    return reverse('todo:task_detail', kwargs={'pk': self.pk})
+
+class NotificationOutbox(models.Model):
+    """Исходящее Telegram-уведомление. Пишется в одной транзакции с задачей,
+    отправляется фоновым воркером бота (todo/notifications.py)."""
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает отправки'),
+        ('sent', 'Отправлено'),
+        ('failed', 'Ошибка'),
+    ]
+
+    chat_id = models.CharField(max_length=50, verbose_name="Telegram chat ID")
+    text = models.TextField(verbose_name="Текст")
+    task = models.ForeignKey(TaskModel, on_delete=models.SET_NULL, null=True, blank=True, related_name='notifications', verbose_name="Задача")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name="Статус")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Попыток")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Следующая попытка")
+    last_error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Отправлено")
+
+    class Meta:
+        verbose_name = "Уведомление"
+        verbose_name_plural = "Очередь уведомлений"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='todo_outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.chat_id}: {self.text[:30]} ({self.get_status_display()})"
+
+
+class TelegramUpdate(models.Model):
+    """Апдейт, полученный через webhook. Уникальный update_id отсекает повторную доставку,
+    а аренда (claimed_until) не даёт двум воркерам бота обработать его одновременно."""
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает'),
+        ('processing', 'Обрабатывается'),
+        ('done', 'Обработан'),
+        ('failed', 'Ошибка'),
+    ]
+
+    update_id = models.BigIntegerField(unique=True, verbose_name="Update ID")
+    payload = models.JSONField(verbose_name="Данные")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name="Статус")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Попыток")
+    claimed_by = models.CharField(max_length=100, blank=True, verbose_name="Воркер")
+    claimed_until = models.DateTimeField(null=True, blank=True, verbose_name="Аренда до")
+    # После ошибки апдейт возвращается в очередь не сразу, а с растущей задержкой
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Следующая попытка")
+    received_at = models.DateTimeField(auto_now_add=True, verbose_name="Получен")
+    processed_at = models.DateTimeField(null=True, blank=True, verbose_name="Обработан")
+
+    class Meta:
+        verbose_name = "Telegram-апдейт"
+        verbose_name_plural = "Telegram-апдейты"
+        ordering = ['update_id']
+        indexes = [
+            models.Index(fields=['status', 'update_id'], name='todo_tgupdate_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.update_id} ({self.get_status_display()})"
@@ -0,0 +1,266 @@
+# todo/notifications.py
+"""Очередь Telegram-уведомлений (transactional outbox).
+
+Представления только пишут строки NotificationOutbox — в той же транзакции, что и
+задача. Отправляет их OutboxWorker внутри процесса бота, через его же Bot/httpx-клиент:
+с учётом лимитов Telegram, повторами с экспоненциальной задержкой и склейкой
+нескольких сообщений в один чат в одно.
+"""
+import asyncio
+import html
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+from django.utils import timezone
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+
+from .models import NotificationOutbox, TelegramUserModel
+
+logger = logging.getLogger(__name__)
+
+# Лимиты Telegram Bot API: ~30 сообщений в секунду всего и ~1 в секунду в один чат
+GLOBAL_RATE_PER_SECOND = 30
+PER_CHAT_INTERVAL = 1.0
+MAX_MESSAGE_LENGTH = 4096
+MAX_ATTEMPTS = 8
+BASE_BACKOFF_SECONDS = 5
+MAX_BACKOFF_SECONDS = 30 * 60
+# На это время строка «забирается» воркером; если он упадёт, её подхватит другой
+CLAIM_LEASE = timedelta(minutes=2)
+
+
+def enqueue(chat_id, text, task=None):
+    """Ставит сообщение в очередь. Вызывать внутри транзакции, которая меняет задачу."""
+    return NotificationOutbox.objects.create(chat_id=str(chat_id), text=text, task=task)
+
+
+def enqueue_many(messages):
+    """Пачка сообщений [(chat_id, text, task), ...] одним INSERT (пакетные операции)."""
+    return NotificationOutbox.objects.bulk_create(
+        [NotificationOutbox(chat_id=str(chat_id), text=text, task=task) for chat_id, text, task in messages],
+        batch_size=500,
+    )
+
+
+def active_chat_ids(user_ids):
+    """user_id -> telegram_id для пользователей с привязанным Telegram."""
+    return dict(
+        TelegramUserModel.objects
+        .filter(user_id__in=[pk for pk in set(user_ids) if pk], is_active=True)
+        .values_list('user_id', 'telegram_id')
+    )
+
+
+def format_task_list_message(header, tasks, limit=10, total=None):
+    """Одно сообщение о нескольких задачах: заголовок и первые limit названий.
+
+    total — сколько задач всего, если в tasks передана только их часть (импорт).
+    """
+    total = len(tasks) if total is None else total
+    lines = [f"{header}: {total}"]
+    lines += [f"• {html.escape(task.title)}" for task in tasks[:limit]]
+    if total > limit:
+        lines.append(f"…и ещё {total - limit}")
+    return '\n'.join(lines)
+
+
+def format_new_task_message(task):
+    description = task.description[:50] + "..." if len(task.description) > 50 else task.description
+    return (
+        f"✅ Новая задача!\n"
+        f"• {html.escape(task.title)}\n"
+        f"Дедлайн: {timezone.localtime(task.deadline).strftime('%d.%m.%Y %H:%M')}\n"
+        f"Приоритет: {task.get_priority_display()}\n"
+        f"Описание: {html.escape(description) or '—'}"
+    )
+
+
+def notify_task_assigned(task):
+    """Уведомление исполнителю о новой задаче, если у него привязан Telegram."""
+    telegram_id = (
+        TelegramUserModel.objects
+        .filter(user_id=task.assignee_id, is_active=True)
+        .values_list('telegram_id', flat=True)
+        .first()
+    )
+    if telegram_id:
+        enqueue(telegram_id, format_new_task_message(task), task=task)
+
+
+class RateLimiter:
+    """Глобальное ограничение «N в секунду» плюс минимальный интервал для каждого чата."""
+
+    def __init__(self, per_second=GLOBAL_RATE_PER_SECOND, per_chat_interval=PER_CHAT_INTERVAL):
+        self.min_interval = 1.0 / per_second
+        self.per_chat_interval = per_chat_interval
+        self._next_global = 0.0
+        self._next_per_chat = {}
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, chat_id):
+        async with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_global, self._next_per_chat.get(chat_id, 0.0))
+            self._next_global = start + self.min_interval
+            self._next_per_chat[chat_id] = start + self.per_chat_interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+def split_text(text, limit=MAX_MESSAGE_LENGTH):
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind('\n', 0, limit)
+        cut = cut if cut > 0 else limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip('\n')
+    chunks.append(text)
+    return chunks
+
+
+def pack_messages(items, limit=MAX_MESSAGE_LENGTH):
+    """Склеивает уведомления одного чата в сообщения не длиннее limit.
+
+    Возвращает [(строки outbox, [текст сообщения, ...]), ...]: обычно одна группа —
+    одно сообщение; слишком длинное уведомление само режется на несколько.
+    """
+    groups = []
+    current = []
+    size = 0
+    for item in items:
+        if len(item.text) > limit:
+            if current:
+                groups.append(current)
+                current, size = [], 0
+            groups.append([item])
+            continue
+        extra = len(item.text) + (2 if current else 0)
+        if current and size + extra > limit:
+            groups.append(current)
+            current, size = [], 0
+            extra = len(item.text)
+        current.append(item)
+        size += extra
+    if current:
+        groups.append(current)
+    return [
+        (group, split_text(group[0].text, limit) if len(group) == 1 else ["\n\n".join(item.text for item in group)])
+        for group in groups
+    ]
+
+
+@sync_to_async
+def claim_due(batch_size):
+    """Забирает пачку готовых к отправке строк, продлевая им next_attempt_at на время аренды."""
+    now = timezone.now()
+    due = NotificationOutbox.objects.filter(status='pending', next_attempt_at__lte=now).order_by('id')
+    if connection.features.has_select_for_update_skip_locked:
+        # PostgreSQL: строки, уже взятые другим воркером, пропускаются без ожидания — один UPDATE на пачку
+        with transaction.atomic():
+            claimed = list(due.select_for_update(skip_locked=True)[:batch_size])
+            NotificationOutbox.objects.filter(pk__in=[item.pk for item in claimed]).update(next_attempt_at=now + CLAIM_LEASE)
+        return claimed
+    due = list(due[:batch_size])
+    claimed = []
+    for item in due:
+        # Условный UPDATE: строку получит только один воркер
+        if NotificationOutbox.objects.filter(
+            pk=item.pk, status='pending', next_attempt_at=item.next_attempt_at,
+        ).update(next_attempt_at=now + CLAIM_LEASE):
+            claimed.append(item)
+    return claimed
+
+
+@sync_to_async
+def mark_sent(ids):
+    NotificationOutbox.objects.filter(pk__in=ids).update(status='sent', sent_at=timezone.now(), last_error='')
+
+
+@sync_to_async
+def mark_failed(ids, error, retry_in=None, permanent=False, count_attempt=True):
+    """count_attempt=False — отложить без попытки (Telegram просит подождать: сообщение не виновато)."""
+    for item in NotificationOutbox.objects.filter(pk__in=ids):
+        if count_attempt:
+            item.attempts += 1
+        item.last_error = str(error)[:1000]
+        if permanent or item.attempts >= MAX_ATTEMPTS:
+            item.status = 'failed'
+        else:
+            delay = retry_in or min(BASE_BACKOFF_SECONDS * 2 ** (item.attempts - 1), MAX_BACKOFF_SECONDS)
+            item.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        item.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+class OutboxWorker:
+    def __init__(self, bot, batch_size=100, poll_interval=1.0, rate_limiter=None):
+        self.bot = bot
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self._stop = asyncio.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    async def run(self):
+        logger.info("✅ Запуск отправки уведомлений из очереди")
+        while not self._stop.is_set():
+            try:
+                processed = await self.drain_once()
+            except Exception:
+                logger.exception("❌ Ошибка при разборе очереди уведомлений")
+                processed = 0
+            if not processed:
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def drain_once(self):
+        """Один проход по очереди. Возвращает число обработанных строк."""
+        items = await claim_due(self.batch_size)
+        by_chat = defaultdict(list)
+        for item in items:
+            by_chat[item.chat_id].append(item)
+        # Чаты независимы: шлём параллельно, а темп задаёт RateLimiter
+        await asyncio.gather(*(self._send_chat(chat_id, chat_items) for chat_id, chat_items in by_chat.items()))
+        return len(items)
+
+    async def _send_chat(self, chat_id, items, coalesce=True):
+        # Пачка уведомлений в один чат уходит одним сообщением (в пределах MAX_MESSAGE_LENGTH)
+        groups = pack_messages(items) if coalesce else [([item], split_text(item.text)) for item in items]
+        for index, (group, texts) in enumerate(groups):
+            ids = [item.pk for item in group]
+            # Эта группа и все следующие — если дальше слать в этот чат бессмысленно
+            rest = ids + [item.pk for later, _ in groups[index + 1:] for item in later]
+            try:
+                for text in texts:
+                    await self.rate_limiter.acquire(chat_id)
+                    await self.bot.send_message(chat_id=chat_id, text=text, parse_mode='HTML')
+            except RetryAfter as e:
+                retry_after = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else e.retry_after
+                logger.warning("Telegram просит подождать %s с (чат %s)", retry_after, chat_id)
+                await mark_failed(rest, e, retry_in=retry_after, count_attempt=False)
+                return
+            except Forbidden as e:
+                # Бот заблокирован или чат не существует — не дойдёт ни одно сообщение в этот чат
+                logger.warning("Уведомления в чат %s не доставлены: %s", chat_id, e)
+                await mark_failed(rest, e, permanent=True)
+                return
+            except BadRequest as e:
+                if len(group) > 1:
+                    # Склейку отклонили — шлём по одному, чтобы не доставить только виноватое
+                    await self._send_chat(chat_id, group, coalesce=False)
+                else:
+                    logger.warning("Уведомление %s в чат %s отклонено: %s", ids[0], chat_id, e)
+                    await mark_failed(ids, e, permanent=True)
+            except TelegramError as e:
+                logger.warning("Временная ошибка Telegram (чат %s): %s", chat_id, e)
+                await mark_failed(rest, e)
+                return
+            else:
+                await mark_sent(ids)
@@ -0,0 +1,88 @@
+# todo/overdue.py
+"""Фоновая отметка просроченных задач.
+
+Вместо UPDATE на каждом GET задачи переводятся в «overdue» пачками. Выборка идёт по
+индексу (status, deadline): после очередного прохода под условие попадают только
+задачи, чей дедлайн истёк с тех пор.
+"""
+import logging
+import time
+
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import counters, dashboard, events
+from .models import TaskModel, TaskTombstone
+
+logger = logging.getLogger(__name__)
+
+
+def sweep_overdue(now=None, batch_size=500):
+    """Переводит в «overdue» все незавершённые задачи с прошедшим дедлайном. Возвращает их число."""
+    now = now or timezone.now()
+    candidates = TaskModel.objects.filter(
+        status__in=TaskModel.OVERDUE_CANDIDATE_STATUSES,
+        deadline__lt=now,
+    ).order_by('deadline')
+
+    total = 0
+    while True:
+        with transaction.atomic():
+            # Задачи, заблокированные другим sweeper'ом или правкой, пропускаем до следующего
+            # прохода (SKIP LOCKED; на SQLite select_for_update ничего не делает)
+            batch = list(
+                candidates.select_for_update(skip_locked=True)
+                .values_list('id', 'assignee_id', 'status', 'priority', 'deadline')[:batch_size]
+            )
+            if not batch:
+                break
+            total += TaskModel.objects.filter(
+                id__in=[row[0] for row in batch],
+                status__in=TaskModel.OVERDUE_CANDIDATE_STATUSES,
+            ).update(status='overdue', updated_at=now)
+            if counters.enabled():
+                counters.rebuild({row[1] for row in batch})
+            dashboard.track(
+                (dashboard.Cell(assignee_id, status, priority, deadline, None),
+                 dashboard.Cell(assignee_id, 'overdue', priority, deadline, None))
+                for _, assignee_id, status, priority, deadline in batch
+            )
+            # update() сигналов не шлёт. Одно событие на пачку, как в bulk.py: сотни событий по
+            # задачам переполнили бы очереди подписчиков, а кэш ответов сбрасывался бы по разу на задачу
+            events.publish(
+                events.TASKS_BULK_CHANGED,
+                created=[], reassigned=[], completed=[], deleted=[],
+                overdue=[row[0] for row in batch],
+                assignee_ids=sorted({row[1] for row in batch}), user_id=None,
+            )
+        if len(batch) < batch_size:
+            break
+
+    # Заодно чистим устаревшие отметки об удалении для дельта-синхронизации
+    TaskTombstone.objects.filter(deleted_at__lt=now - TaskTombstone.RETENTION).delete()
+    if total:
+        logger.info("Отмечено просроченных задач: %s", total)
+    return total
+
+
+def run_forever(interval=60, batch_size=500):
+    """Цикл для отдельного процесса или фонового потока (см. run_all.py).
+
+    Заодно сверяет сводку руководителя с задачами: сразу при запуске (правки, сделанные,
+    пока процесс не работал, иначе ждали бы час) и затем раз в TODO_DASHBOARD_RECONCILE_INTERVAL секунд.
+    """
+    logger.info("✅ Запуск проверки просроченных задач (раз в %s с)", interval)
+    reconciled_at = None
+    while True:
+        try:
+            sweep_overdue(batch_size=batch_size)
+            if dashboard.enabled() and (
+                reconciled_at is None or time.monotonic() - reconciled_at >= dashboard.reconcile_interval()
+            ):
+                reconciled_at = time.monotonic()
+                logger.info("Сводка руководителя пересчитана: %s строк", dashboard.rebuild())
+        except Exception:
+            logger.exception("❌ Ошибка при проверке просроченных задач")
+        finally:
+            close_old_connections()
+        time.sleep(interval)
@@ -0,0 +1,164 @@
+# todo/pagination.py
+"""Постраничный вывод по курсору (keyset) вместо OFFSET.
+
+Страница выбирается условием «после последней строки предыдущей страницы» по ключу
+сортировки и id, поэтому сотая страница стоит столько же, сколько первая, а общий
+COUNT(*) не нужен. Курсор — непрозрачная строка для параметра ?cursor=.
+"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+
+SORT_KEY = '_sort_key'
+# До скольких строк считать точно, если оценки от планировщика нет
+COUNT_CAP = 1000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _json_default(value):
+    # Полная точность: DjangoJSONEncoder обрезает микросекунды, и курсор пропускал бы строки
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} нельзя положить в курсор")
+
+
+def encode_cursor(values, backwards=False):
+    raw = json.dumps({'v': values, 'b': backwards}, default=_json_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        key, pk = data['v']
+        return key, pk, bool(data['b'])
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise InvalidCursor(cursor)
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """ordering — одно поле как в order_by ('-created_at'); id добавляется для однозначности.
+
+    null_default — чем заменять NULL в поле сортировки (например, '' для имени
+    исполнителя через LEFT JOIN): сравнение с NULL в условии курсора не работает.
+    """
+
+    def __init__(self, queryset, ordering, per_page, null_default=None):
+        self.descending = ordering.startswith('-')
+        self.field = ordering.lstrip('-')
+        self.per_page = per_page
+        key = F(self.field)
+        if null_default is not None:
+            key = Coalesce(key, Value(null_default))
+        self.queryset = queryset.annotate(**{SORT_KEY: key})
+
+    def _ordered(self, backwards):
+        descending = self.descending != backwards
+        prefix = '-' if descending else ''
+        return self.queryset.order_by(prefix + SORT_KEY, prefix + 'pk'), descending
+
+    def page(self, cursor=None, values_list=None):
+        """values_list — вернуть кортежи этих полей вместо объектов (как QuerySet.values_list)."""
+        backwards = False
+        queryset, descending = self._ordered(backwards)
+        if cursor:
+            key, pk, backwards = decode_cursor(cursor)
+            queryset, descending = self._ordered(backwards)
+            op = 'lt' if descending else 'gt'
+            try:
+                queryset = queryset.filter(
+                    Q(**{f'{SORT_KEY}__{op}': key}) | Q(**{SORT_KEY: key, f'pk__{op}': pk})
+                )
+            except (ValidationError, ValueError, TypeError):
+                # Курсор от другой сортировки или подделанный
+                raise InvalidCursor(cursor)
+
+        if values_list:
+            queryset = queryset.values_list(*values_list, SORT_KEY, 'pk')
+            position = lambda row: list(row[-2:])
+        else:
+            position = lambda obj: [getattr(obj, SORT_KEY), obj.pk]
+
+        # Лишняя строка показывает, есть ли что-то дальше
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or backwards:
+                next_cursor = encode_cursor(position(rows[-1]))
+            if cursor and (has_more or not backwards):
+                previous_cursor = encode_cursor(position(rows[0]), backwards=True)
+        if values_list:
+            rows = [row[:-2] for row in rows]
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def estimate_count(queryset, cap=COUNT_CAP):
+    """Примерное число строк: оценка планировщика PostgreSQL или точный подсчёт до cap.
+
+    Возвращает (число, точное ли оно).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows']), False
+    count = queryset.order_by()[:cap + 1].count()
+    return min(count, cap), count <= cap
+
+
+class KeysetPaginationMixin:
+    """Для ListView: ?cursor= вместо ?page=, без COUNT(*).
+
+    В контексте page_obj — KeysetPage (has_next, next_cursor, previous_cursor...),
+    paginator — None. Поле сортировки берётся из get_ordering().
+    """
+    null_defaults = {}
+
+    def paginate_queryset(self, queryset, page_size):
+        ordering = self.get_ordering()
+        paginator = KeysetPaginator(queryset, ordering, page_size, null_default=self.null_defaults.get(ordering.lstrip('-')))
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            page = paginator.page()
+        return None, page, page.object_list, page.has_other_pages()
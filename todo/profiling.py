@@ -0,0 +1,327 @@
+# todo/profiling.py
+"""Профилирование запросов: время view, число SQL, повторяющиеся запросы (N+1) и
+самые медленные SQL с местом в коде, откуда они пришли.
+
+Включается настройкой TODO_PROFILING; выключенный ProfilingMiddleware поднимает
+MiddlewareNotUsed и в цепочку не попадает. TODO_PROFILING_SAMPLE_RATE — доля
+профилируемых запросов (в продакшене, например, 0.05).
+
+Результаты:
+    /api/profiling/metrics/ — счётчики в текстовом формате Prometheus (на процесс;
+                              при нескольких воркерах каждый отдаёт свои);
+    TODO_PROFILING_LOG      — JSONL по каждому профилированному запросу с ротацией.
+Сводка по журналу или разовый замер URL: python manage.py profile_report
+"""
+import json
+import logging
+import logging.handlers
+import os
+import random
+import threading
+import time
+import traceback
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+request_log = logging.getLogger('todo.profiling.requests')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOWEST_PER_REQUEST = 5
+SQL_PREVIEW = 500
+UNRESOLVED_VIEW = '<unresolved>'
+
+
+def enabled():
+    return getattr(settings, 'TODO_PROFILING', False)
+
+
+def sample_rate():
+    return getattr(settings, 'TODO_PROFILING_SAMPLE_RATE', 1.0)
+
+
+def slow_query_seconds():
+    return getattr(settings, 'TODO_PROFILING_SLOW_QUERY_MS', 100) / 1000
+
+
+def duplicate_threshold():
+    return getattr(settings, 'TODO_PROFILING_DUPLICATE_THRESHOLD', 5)
+
+
+_PROJECT_DIR = str(settings.BASE_DIR)
+# Кадры из этих файлов местом происхождения запроса не считаются
+IGNORED_FILES = {os.path.abspath(__file__)}
+
+
+def _origin():
+    """Ближайший к запросу кадр из кода проекта (не Django и не site-packages)."""
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if filename in IGNORED_FILES or 'site-packages' in filename or not filename.startswith(_PROJECT_DIR):
+            continue
+        return f'{os.path.relpath(filename, _PROJECT_DIR)}:{frame.lineno} in {frame.name}'
+    return None
+
+
+class QueryRecorder:
+    """execute_wrapper: время каждого SQL; одинаковый текст (параметры не в счёт) — один ключ."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.by_sql = {}   # sql -> [число, суммарное время, место в коде]
+        self.slowest = []  # (время, sql, место в коде)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.total += elapsed
+            entry = self.by_sql.get(sql)
+            if entry is None:
+                # Стек снимаем один раз на текст запроса — повторы берут то же место
+                entry = self.by_sql[sql] = [0, 0.0, _origin()]
+            entry[0] += 1
+            entry[1] += elapsed
+            if len(self.slowest) < SLOWEST_PER_REQUEST or elapsed > self.slowest[-1][0]:
+                origin = entry[2] if elapsed < slow_query_seconds() else _origin()
+                self.slowest.append((elapsed, sql, origin))
+                self.slowest.sort(key=lambda item: item[0], reverse=True)
+                del self.slowest[SLOWEST_PER_REQUEST:]
+
+    def duplicates(self, threshold):
+        return sorted(
+            (
+                {'sql': sql[:SQL_PREVIEW], 'count': count, 'ms': round(total * 1000, 2), 'origin': origin}
+                for sql, (count, total, origin) in self.by_sql.items() if count >= threshold
+            ),
+            key=lambda item: item['count'], reverse=True,
+        )
+
+    def slow_queries(self):
+        return [
+            {'sql': sql[:SQL_PREVIEW], 'ms': round(elapsed * 1000, 2), 'origin': origin}
+            for elapsed, sql, origin in self.slowest
+        ]
+
+
+def record_queries(recorder):
+    """Контекст, подключающий recorder ко всем соединениям с БД."""
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(recorder))
+    return stack
+
+
+class Metrics:
+    """Агрегаты по view для /api/profiling/metrics/."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = defaultdict(int)             # (view, method, status) -> n
+            self.buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+            self.duration_sum = defaultdict(float)
+            self.duration_count = defaultdict(int)
+            self.queries = defaultdict(int)
+            self.query_seconds = defaultdict(float)
+            self.duplicate_requests = defaultdict(int)  # запросы с N+1
+            self.slow_queries = defaultdict(int)
+
+    def observe(self, record):
+        view = record['view']
+        duration = record['duration_ms'] / 1000
+        with self._lock:
+            self.requests[(view, record['method'], str(record['status']))] += 1
+            buckets = self.buckets[view]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    buckets[i] += 1
+            self.duration_sum[view] += duration
+            self.duration_count[view] += 1
+            self.queries[view] += record['queries']
+            self.query_seconds[view] += record['query_ms'] / 1000
+            if record['duplicates']:
+                self.duplicate_requests[view] += 1
+            self.slow_queries[view] += sum(1 for query in record['slow_queries'] if query['ms'] >= slow_query_seconds() * 1000)
+
+    def render(self):
+        lines = []
+
+        def family(name, kind, help_text, samples, suffix=''):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                lines.append(_sample(name + suffix, labels, value))
+
+        with self._lock:
+            family('todo_requests_total', 'counter', 'Профилированные запросы.', [
+                ({'view': view, 'method': method, 'status': status}, n)
+                for (view, method, status), n in sorted(self.requests.items())
+            ])
+            family('todo_request_duration_seconds', 'histogram', 'Время обработки запроса.', [
+                ({'view': view, 'le': le}, n)
+                for view in sorted(self.buckets)
+                for le, n in [*zip(map(repr, DURATION_BUCKETS), self.buckets[view]), ('+Inf', self.duration_count[view])]
+            ], suffix='_bucket')
+            for view in sorted(self.buckets):
+                lines.append(_sample('todo_request_duration_seconds_sum', {'view': view}, f'{self.duration_sum[view]:.6f}'))
+                lines.append(_sample('todo_request_duration_seconds_count', {'view': view}, self.duration_count[view]))
+            for name, help_text, values in (
+                ('todo_db_queries_total', 'SQL-запросы, выполненные view.', self.queries),
+                ('todo_db_query_seconds_total', 'Суммарное время SQL.', self.query_seconds),
+                ('todo_duplicate_query_requests_total', 'Запросы с повторяющимся SQL (N+1).', self.duplicate_requests),
+                ('todo_slow_queries_total', 'SQL дольше TODO_PROFILING_SLOW_QUERY_MS.', self.slow_queries),
+            ):
+                family(name, 'counter', help_text, [({'view': view}, n) for view, n in sorted(values.items())])
+        return '\n'.join(lines) + '\n'
+
+
+def _sample(name, labels, value):
+    label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+    if isinstance(value, float):
+        value = f'{value:.6f}'
+    return f'{name}{{{label_text}}} {value}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+metrics = Metrics()
+
+
+def _configure_request_log():
+    path = getattr(settings, 'TODO_PROFILING_LOG', None)
+    if not path or request_log.handlers:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(
+        path,
+        maxBytes=getattr(settings, 'TODO_PROFILING_LOG_MAX_BYTES', 10 * 1024 * 1024),
+        backupCount=getattr(settings, 'TODO_PROFILING_LOG_BACKUP_COUNT', 5),
+        encoding='utf-8',
+    )
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    request_log.addHandler(handler)
+    request_log.setLevel(logging.INFO)
+    request_log.propagate = False
+
+
+def build_record(request, response, duration, recorder):
+    match = getattr(request, 'resolver_match', None)
+    # Не путь, а имя маршрута: иначе каждый /tasks/<id>/ стал бы отдельной серией метрик
+    view = (match.view_name if match else None) or UNRESOLVED_VIEW
+    return {
+        'ts': round(time.time(), 3),
+        'view': view,
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 2),
+        'queries': recorder.count,
+        'query_ms': round(recorder.total * 1000, 2),
+        'duplicates': recorder.duplicates(duplicate_threshold()),
+        'slow_queries': recorder.slow_queries(),
+    }
+
+
+def report(record):
+    metrics.observe(record)
+    if request_log.handlers:
+        request_log.info(json.dumps(record, ensure_ascii=False))
+    if record['duplicates']:
+        worst = record['duplicates'][0]
+        logger.warning(
+            "N+1 в %s: запрос выполнен %s раз (%s)", record['view'], worst['count'], worst['origin'] or '?',
+        )
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        _configure_request_log()
+
+    def __call__(self, request):
+        if random.random() >= sample_rate():
+            return self.get_response(request)
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with record_queries(recorder):
+            response = self.get_response(request)
+        # Для потоковых ответов это время до начала отдачи тела
+        report(build_record(request, response, time.perf_counter() - start, recorder))
+        return response
+
+
+# === Сводка для profile_report ===
+
+def log_files(path):
+    """Журнал и его ротированные копии, от старых к новым."""
+    backups = getattr(settings, 'TODO_PROFILING_LOG_BACKUP_COUNT', 5)
+    candidates = [f'{path}.{i}' for i in range(backups, 0, -1)] + [path]
+    return [name for name in candidates if os.path.exists(name)]
+
+
+def read_log(path):
+    for name in log_files(path):
+        with open(name, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def summarize(records, top=10):
+    durations = defaultdict(list)
+    queries = defaultdict(list)
+    duplicates = {}
+    slow = {}
+    for record in records:
+        view = record['view']
+        durations[view].append(record['duration_ms'])
+        queries[view].append(record['queries'])
+        for item in record['duplicates']:
+            key = (view, item['origin'], item['sql'])
+            worst = duplicates.get(key)
+            if worst is None or item['count'] > worst['count']:
+                duplicates[key] = dict(item, view=view)
+        for item in record['slow_queries']:
+            key = (item['origin'], item['sql'])
+            if key not in slow or item['ms'] > slow[key]['ms']:
+                slow[key] = dict(item, view=view)
+
+    views = [
+        {
+            'view': view,
+            'requests': len(values),
+            'p50_ms': _percentile(values, 0.5),
+            'p95_ms': _percentile(values, 0.95),
+            'avg_queries': round(sum(queries[view]) / len(values), 1),
+        }
+        for view, values in durations.items()
+    ]
+    views.sort(key=lambda item: item['p95_ms'], reverse=True)
+    return {
+        'views': views[:top],
+        'duplicates': sorted(duplicates.values(), key=lambda item: item['count'], reverse=True)[:top],
+        'slow_queries': sorted(slow.values(), key=lambda item: item['ms'], reverse=True)[:top],
+    }
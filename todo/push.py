@@ -0,0 +1,145 @@
+# todo/push.py
+"""Рассылка событий о задачах открытым вкладкам (Server-Sent Events).
+
+Бэкенд выбирается настройкой TODO_PUSH_BACKEND. InMemoryPushBackend живёт внутри
+одного процесса; RedisPushBackend пересылает события через Redis pub/sub, чтобы
+несколько ASGI-воркеров видели изменения друг друга.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Признак переполнения очереди подписчика: клиенту нужно перечитать список целиком
+RESYNC = object()
+
+
+class Subscription:
+    """Очередь событий одного подключённого клиента."""
+
+    def __init__(self, backend, maxsize=100):
+        self.backend = backend
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, event):
+        # publish() вызывается из синхронных потоков Django — передаём событие в цикл подписчика
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Медленный клиент: выбрасываем накопленное и просим полную перезагрузку
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.backend.unsubscribe(self)
+
+
+class BasePushBackend:
+    def publish(self, event):
+        raise NotImplementedError
+
+    def subscribe(self):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InMemoryPushBackend(BasePushBackend):
+    """Подписчики хранятся в памяти текущего процесса."""
+
+    def __init__(self, **options):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.deliver(event)
+            except RuntimeError:
+                # Цикл подписчика уже закрыт
+                self.unsubscribe(subscription)
+
+    def subscribe(self):
+        subscription = Subscription(self)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+
+class RedisPushBackend(InMemoryPushBackend):
+    """Общий канал через Redis: каждый воркер слушает канал и раздаёт события своим подписчикам."""
+
+    def __init__(self, url='redis://localhost:6379/0', channel='todo:tasks', **options):
+        super().__init__()
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("Для RedisPushBackend нужен пакет redis")
+        self.channel = channel
+        self._redis = redis.Redis.from_url(url)
+        self._listener = threading.Thread(target=self._listen, daemon=True)
+        self._listener.start()
+
+    def publish(self, event):
+        self._redis.publish(self.channel, json.dumps(event))
+
+    def _listen(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        for message in pubsub.listen():
+            try:
+                super().publish(json.loads(message['data']))
+            except Exception:
+                logger.exception("Ошибка разбора push-события из Redis")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_class = import_string(getattr(settings, 'TODO_PUSH_BACKEND', 'todo.push.InMemoryPushBackend'))
+                _backend = backend_class(**getattr(settings, 'TODO_PUSH_OPTIONS', {}))
+    return _backend
+
+
+def publish_task_event(event_type, task_id, assignee_ids):
+    """event_type: created / updated / completed / deleted."""
+    event = {
+        'type': event_type,
+        'task_id': task_id,
+        'assignee_ids': sorted({pk for pk in assignee_ids if pk is not None}),
+    }
+    try:
+        get_backend().publish(event)
+    except Exception:
+        logger.exception("Не удалось разослать push-событие %s", event)
+
+
+def is_visible(event, user):
+    return user.role == 'manager' or user.pk in event['assignee_ids']
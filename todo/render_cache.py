@@ -0,0 +1,154 @@
+# todo/render_cache.py
+"""Кэш готовых JSON-ответов списка задач и календаря.
+
+Ключ — вид ответа, пользователь, его роль, параметры запроса и номера поколений:
+    'all'        — общее поколение (например, сменилось имя автора задач);
+    'managers'   — всё, что видят руководители;
+    'user:<id>'  — задачи конкретного сотрудника.
+Изменение задачи увеличивает поколения её исполнителя (прежнего и нового) и
+руководителей — старые записи просто перестают читаться и вытесняются по TTL.
+Для задач это делает подписчик шины render_cache (todo/consumers.py) после коммита,
+поэтому запрос, успевший закэшировать состояние до коммита, не будет прочитан.
+invalidate() внутри транзакции меняет поколения сразу и ещё раз после коммита.
+
+TODO_RENDER_CACHE — алиас из CACHES (None — кэш выключен). LocMemCache годится для
+одного процесса (runserver, run_all.py); если задачи меняют несколько процессов
+(gunicorn с воркерами, отдельный run_bot), нужен общий бэкенд — Redis или Memcached,
+иначе процесс не узнает об изменениях, сделанных другим, до истечения TTL.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+KEY_PREFIX = 'todo:render'
+ALL = 'all'
+MANAGERS = 'managers'
+
+
+def _alias():
+    return getattr(settings, 'TODO_RENDER_CACHE', 'default')
+
+
+def enabled():
+    return _alias() is not None and timeout() > 0
+
+
+def timeout():
+    return getattr(settings, 'TODO_RENDER_CACHE_TIMEOUT', 60)
+
+
+def get_cache():
+    return caches[_alias()]
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def scopes_for(user):
+    return [ALL, MANAGERS if user.role != 'employee' else user_scope(user.pk)]
+
+
+def _generation_key(scope):
+    return f'{KEY_PREFIX}:gen:{scope}'
+
+
+def generations(scopes):
+    cache = get_cache()
+    keys = [_generation_key(scope) for scope in scopes]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            # Поколение вытеснено или ещё не создано: начинаем с текущего времени, чтобы
+            # не совпасть с номером, под которым лежат старые записи
+            cache.add(key, time.time_ns(), None)
+            values[key] = cache.get(key)
+    return [values[key] for key in keys]
+
+
+def _bump(scopes):
+    cache = get_cache()
+    for scope in scopes:
+        try:
+            cache.incr(_generation_key(scope))
+        except ValueError:
+            # Ключа нет — при следующем чтении поколение начнётся заново
+            pass
+
+
+def invalidate(*scopes):
+    if enabled() and scopes:
+        _bump(scopes)
+        transaction.on_commit(lambda: _bump(scopes))
+
+
+def invalidate_tasks(assignee_ids):
+    """Задачи этих исполнителей изменились: сбросить их ключи и ключи руководителей."""
+    invalidate(MANAGERS, *(user_scope(pk) for pk in set(assignee_ids) if pk is not None))
+
+
+def invalidate_all():
+    invalidate(ALL)
+
+
+# === Метрики (на процесс) ===
+
+_lock = threading.Lock()
+_hits = Counter()
+_misses = Counter()
+
+
+def _count(counter, kind):
+    with _lock:
+        counter[kind] += 1
+
+
+def metrics():
+    with _lock:
+        kinds = sorted(set(_hits) | set(_misses))
+        result = {}
+        for kind in kinds:
+            total = _hits[kind] + _misses[kind]
+            result[kind] = {
+                'hits': _hits[kind],
+                'misses': _misses[kind],
+                'hit_ratio': round(_hits[kind] / total, 3) if total else None,
+            }
+    return {'enabled': enabled(), 'backend': type(get_cache()).__name__ if enabled() else None, 'kinds': result}
+
+
+def reset_metrics():
+    with _lock:
+        _hits.clear()
+        _misses.clear()
+
+
+def get_or_build(kind, user, variant, build):
+    """Готовое тело ответа из кэша или build().
+
+    build() возвращает (content, ttl): ttl — через сколько секунд содержимое устареет
+    само по себе (None — не раньше TODO_RENDER_CACHE_TIMEOUT).
+    """
+    if not enabled():
+        return build()[0]
+    scopes = scopes_for(user)
+    versions = '.'.join(str(gen) for gen in generations(scopes))
+    # Параметры запроса хэшируем: в курсоре могут быть символы, недопустимые в ключах memcached
+    variant = hashlib.md5(variant.encode()).hexdigest()
+    key = f'{KEY_PREFIX}:{kind}:{user.pk}:{user.role}:{variant}:{versions}'
+    cache = get_cache()
+    content = cache.get(key)
+    if content is not None:
+        _count(_hits, kind)
+        return content
+    _count(_misses, kind)
+    content, ttl = build()
+    ttl = timeout() if ttl is None else min(ttl, timeout())
+    if ttl > 0:
+        cache.set(key, content, ttl)
+    return content
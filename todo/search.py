@@ -0,0 +1,162 @@
+# todo/search.py
+"""Полнотекстовый поиск по задачам и комментариям.
+
+Индекс — отдельная таблица todo_task_search (создаётся миграцией 0020):
+    SQLite      — виртуальная таблица FTS5 (rowid = id задачи); русские слова
+                  заранее сводятся к основе (todo/stemmer.py), ранжирование bm25;
+    PostgreSQL  — task_id + tsvector с GIN-индексом, словарь 'russian', ts_rank.
+На других СУБД поиск падает на icontains без индекса.
+
+Индекс обновляется в той же транзакции сигналами (todo/signals.py) при изменении
+названия/описания задачи и комментариев. Уже существующие задачи индексирует
+миграция 0026; пересобрать индекс заново (правки в обход ORM, смена стеммера):
+    python manage.py rebuild_search_index
+"""
+import logging
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from . import stemmer
+from .models import Comment, TaskModel
+
+logger = logging.getLogger(__name__)
+
+INDEX_TABLE = 'todo_task_search'
+# Вес совпадения в названии относительно описания и комментариев (SQLite bm25)
+TITLE_WEIGHT = 10.0
+MAX_QUERY_TOKENS = 16
+
+_available = {}
+
+
+def available():
+    """Есть ли индекс в текущей базе (например, SQLite без FTS5 его не получит)."""
+    key = (connection.vendor, connection.settings_dict['NAME'])
+    if key not in _available:
+        supported = connection.vendor in ('sqlite', 'postgresql')
+        _available[key] = supported and INDEX_TABLE in connection.introspection.table_names()
+    return _available[key]
+
+
+def _documents(task_ids):
+    """{id: (название, описание + комментарии)} для индексации."""
+    comments = defaultdict(list)
+    for task_id, text in Comment.objects.filter(task_id__in=task_ids).order_by('id').values_list('task_id', 'text'):
+        comments[task_id].append(text)
+    return {
+        task_id: (title, '\n'.join([description or '', *comments[task_id]]))
+        for task_id, title, description in TaskModel.objects.filter(pk__in=task_ids).values_list('id', 'title', 'description')
+    }
+
+
+def index_tasks(task_ids):
+    task_ids = list(task_ids)
+    if not task_ids or not available():
+        return
+    documents = _documents(task_ids)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {INDEX_TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+                [
+                    (task_id, ' '.join(stemmer.tokens(title)), ' '.join(stemmer.tokens(body)))
+                    for task_id, (title, body) in documents.items()
+                ],
+            )
+        else:
+            cursor.executemany(
+                f"INSERT INTO {INDEX_TABLE} (task_id, document) VALUES "
+                f"(%s, setweight(to_tsvector('russian', %s), 'A') || setweight(to_tsvector('russian', %s), 'B')) "
+                f"ON CONFLICT (task_id) DO UPDATE SET document = EXCLUDED.document",
+                [(task_id, title, body) for task_id, (title, body) in documents.items()],
+            )
+    # Задачи, которых уже нет (удалены в той же транзакции)
+    remove_tasks(set(task_ids) - set(documents))
+
+
+def remove_tasks(task_ids):
+    task_ids = list(task_ids)
+    if not task_ids or not available():
+        return
+    column = 'rowid' if connection.vendor == 'sqlite' else 'task_id'
+    placeholders = ', '.join(['%s'] * len(task_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {INDEX_TABLE} WHERE {column} IN ({placeholders})', task_ids)
+
+
+def rebuild(batch_size=2000, log=None):
+    """Переиндексирует все задачи пачками. Возвращает их число."""
+    if not available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {INDEX_TABLE}')
+    total = 0
+    last_id = 0
+    while True:
+        ids = list(TaskModel.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        # Одна транзакция на пачку: в autocommit каждая строка индекса — отдельный коммит
+        with transaction.atomic():
+            index_tasks(ids)
+        total += len(ids)
+        last_id = ids[-1]
+        if log:
+            log(f'  проиндексировано: {total}')
+    return total
+
+
+def _fts5_query(query):
+    terms = stemmer.tokens(query)[:MAX_QUERY_TOKENS]
+    # Каждое слово — префикс в кавычках: спецсинтаксис FTS5 из ввода не выполняется
+    return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+def search_task_ids(user, query, limit=20):
+    """id задач, видимых пользователю, в порядке релевантности."""
+    query = (query or '').strip()
+    if not query:
+        return []
+    if not available():
+        return _fallback_ids(user, query, limit)
+
+    tasks_table = TaskModel._meta.db_table
+    visibility, params = '', []
+    if user.role == 'employee':
+        visibility, params = 'AND t.assignee_id = %s', [user.pk]
+
+    if connection.vendor == 'sqlite':
+        match = _fts5_query(query)
+        if not match:
+            return []
+        sql = (
+            f'SELECT s.rowid FROM {INDEX_TABLE} s JOIN {tasks_table} t ON t.id = s.rowid '
+            f'WHERE {INDEX_TABLE} MATCH %s {visibility} '
+            f'ORDER BY bm25({INDEX_TABLE}, {TITLE_WEIGHT}, 1.0) LIMIT %s'
+        )
+        params = [match, *params, limit]
+    else:
+        sql = (
+            f"SELECT s.task_id FROM {INDEX_TABLE} s JOIN {tasks_table} t ON t.id = s.task_id, "
+            f"websearch_to_tsquery('russian', %s) q "
+            f"WHERE s.document @@ q {visibility} "
+            f"ORDER BY ts_rank(s.document, q) DESC, s.task_id DESC LIMIT %s"
+        )
+        params = [query, *params, limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _fallback_ids(user, query, limit):
+    tasks = TaskModel.objects.all() if user.role != 'employee' else TaskModel.objects.filter(assignee=user)
+    matches = Q(title__icontains=query) | Q(description__icontains=query) | Q(comments__text__icontains=query)
+    return list(tasks.filter(matches).order_by('-created_at').values_list('pk', flat=True).distinct()[:limit])
+
+
+def search_tasks(user, query, limit=20):
+    ids = search_task_ids(user, query, limit)
+    tasks = TaskModel.objects.select_related('assignee').in_bulk(ids)
+    return [tasks[pk] for pk in ids if pk in tasks]
@@ -1,15 +1,145 @@
-from django.db.models.signals import post_save
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import TaskModel
-import asyncio
-from asgiref.sync import async_to_sync
+from .models import Comment, TaskFile, TaskModel, TaskTombstone, UserModel
+from . import attachments, counters, dashboard, events, render_cache, search
+
+_suppressed = contextvars.ContextVar('todo_task_signals_suppressed', default=False)
+
+
+@contextmanager
+def task_signals_suppressed():
+    """Отключает обработчики задач и комментариев: пакетные операции (todo/bulk.py)
+    выполняют ту же работу сами — по запросу на пачку, а не на каждую строку."""
+    token = _suppressed.set(True)
+    try:
+        yield
+    finally:
+        _suppressed.reset(token)
+
+
+def _unless_suppressed(handler):
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        if not _suppressed.get():
+            return handler(*args, **kwargs)
+    return wrapper
+
+
+@receiver(post_save, sender=TaskModel)
+@_unless_suppressed
+def publish_task_saved(sender, instance, created, **kwargs):
+    # События уходят подписчикам (Telegram, push...) только после коммита — см. todo/events.py
+    if created:
+        events.publish(
+            events.TASK_CREATED,
+            task_id=instance.pk, assignee_id=instance.assignee_id, created_by_id=instance.created_by_id,
+        )
+        return
+    details = dict(
+        task_id=instance.pk,
+        assignee_id=instance.assignee_id,
+        previous_assignee_id=instance.get_loaded_value('assignee_id'),
+        created_by_id=instance.created_by_id,
+    )
+    old_status = instance.get_loaded_value('status')
+    if old_status != instance.status:
+        events.publish(events.TASK_STATUS_CHANGED, old_status=old_status, new_status=instance.status, **details)
+    else:
+        events.publish(events.TASK_UPDATED, **details)
+
+@receiver(post_delete, sender=TaskModel)
+@_unless_suppressed
+def publish_task_deleted(sender, instance, **kwargs):
+    events.publish(events.TASK_DELETED, task_id=instance.pk, assignee_id=instance.assignee_id)
+
+@receiver(post_save, sender=Comment)
+@_unless_suppressed
+def publish_comment_added(sender, instance, created, **kwargs):
+    if created:
+        events.publish(events.COMMENT_ADDED, comment_id=instance.pk, task_id=instance.task_id, author_id=instance.author_id)
+
+@receiver(post_save, sender=TaskFile)
+def publish_file_attached(sender, instance, created, **kwargs):
+    if created:
+        events.publish(events.FILE_ATTACHED, file_id=instance.pk, task_id=instance.task_id)
+
+@receiver(post_delete, sender=TaskFile)
+def release_blob_on_delete(sender, instance, **kwargs):
+    # Файл на диске не трогаем: его удалит gc_attachments, когда ссылок не останется
+    attachments.release(instance)
 
 @receiver(post_save, sender=TaskModel)
-def send_telegram_notification_on_new_task(sender, instance, created, **kwargs):
+@_unless_suppressed
+def create_tombstone_on_reassign(sender, instance, created, **kwargs):
+    # Задача ушла к другому исполнителю — прежний должен убрать её из своего списка
+    old_assignee_id = instance.get_loaded_value('assignee_id')
+    if not created and old_assignee_id is not None and old_assignee_id != instance.assignee_id:
+        TaskTombstone.objects.create(task_id=instance.pk, assignee_id=old_assignee_id)
+
+@receiver(post_delete, sender=TaskModel)
+@_unless_suppressed
+def create_tombstone_on_delete(sender, instance, **kwargs):
+    TaskTombstone.objects.create(task_id=instance.pk, assignee_id=instance.assignee_id)
+
+@receiver(post_save, sender=TaskModel)
+@_unless_suppressed
+def update_task_counters_on_save(sender, instance, created, **kwargs):
     if created:
-        # Запускаем асинхронную функцию в текущем event loop или создаём новый
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        counters.track_task_change(None, None, instance.assignee_id, instance.status)
+    else:
+        counters.track_task_change(
+            instance.get_loaded_value('assignee_id'), instance.get_loaded_value('status'),
+            instance.assignee_id, instance.status,
+        )
+
+@receiver(post_delete, sender=TaskModel)
+@_unless_suppressed
+def update_task_counters_on_delete(sender, instance, **kwargs):
+    counters.track_task_change(
+        instance.get_loaded_value('assignee_id', instance.assignee_id),
+        instance.get_loaded_value('status', instance.status),
+        None, None,
+    )
+
+@receiver(post_save, sender=TaskModel)
+@_unless_suppressed
+def update_dashboard_on_save(sender, instance, created, **kwargs):
+    # Проверка заранее: прежнее состояние отложенных (only/defer) полей стоит запроса
+    if dashboard.enabled():
+        dashboard.track([(None if created else dashboard.loaded_snapshot(instance), dashboard.snapshot(instance))])
+
+@receiver(post_delete, sender=TaskModel)
+@_unless_suppressed
+def update_dashboard_on_delete(sender, instance, **kwargs):
+    if dashboard.enabled():
+        dashboard.track([(dashboard.loaded_snapshot(instance), None)])
+
+@receiver(post_save, sender=TaskModel)
+@_unless_suppressed
+def update_search_index_on_save(sender, instance, created, **kwargs):
+    # Смена статуса и прочих полей индекс не затрагивает
+    if created or any(
+        instance.get_loaded_value(field) != getattr(instance, field) for field in ('title', 'description')
+    ):
+        search.index_tasks([instance.pk])
+
+@receiver(post_delete, sender=TaskModel)
+@_unless_suppressed
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_tasks([instance.pk])
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@_unless_suppressed
+def update_search_index_on_comment(sender, instance, **kwargs):
+    search.index_tasks([instance.task_id])
+
+@receiver(post_save, sender=UserModel)
+def invalidate_render_cache_on_rename(sender, instance, created, update_fields=None, **kwargs):
+    # Имена автора и исполнителя входят в ответ; вход в систему (last_login) его не меняет
+    if not created and (update_fields is None or 'first_name' in update_fields):
+        render_cache.invalidate_all()
@@ -0,0 +1,135 @@
+# todo/stemmer.py
+"""Стеммер для русского языка (алгоритм Snowball Russian).
+
+Нужен поиску на SQLite: у FTS5 нет русской морфологии, поэтому в индекс и в запрос
+попадают уже обрезанные до основы слова. На PostgreSQL то же самое делает
+to_tsvector('russian', ...), и этот модуль там не используется.
+"""
+import re
+from functools import lru_cache
+
+VOWELS = set('аеиоуыэюя')
+
+
+def _longest_first(*suffixes):
+    # _strip берёт первое подходящее окончание — значит, самое длинное
+    return tuple(sorted(suffixes, key=len, reverse=True))
+
+
+PERFECTIVE_GERUND_1 = _longest_first('вшись', 'вши', 'в')
+PERFECTIVE_GERUND_2 = _longest_first('ившись', 'ывшись', 'ивши', 'ывши', 'ив', 'ыв')
+ADJECTIVE = _longest_first(
+    'ими', 'ыми', 'его', 'ого', 'ему', 'ому',
+    'ее', 'ие', 'ые', 'ое', 'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом',
+    'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею',
+)
+PARTICIPLE_1 = _longest_first('ем', 'нн', 'вш', 'ющ', 'щ')
+PARTICIPLE_2 = _longest_first('ивш', 'ывш', 'ующ')
+REFLEXIVE = _longest_first('ся', 'сь')
+VERB_1 = _longest_first('ете', 'йте', 'ешь', 'нно', 'ла', 'на', 'ли', 'ем', 'ло', 'но', 'ет', 'ют', 'ны', 'ть', 'й', 'л', 'н')
+VERB_2 = _longest_first(
+    'ейте', 'уйте', 'ила', 'ыла', 'ена', 'ите', 'или', 'ыли', 'ило', 'ыло', 'ено', 'ует', 'уют',
+    'ены', 'ить', 'ыть', 'ишь', 'ей', 'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ят', 'ит', 'ыт', 'ую', 'ю',
+)
+NOUN = _longest_first(
+    'иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях',
+    'ев', 'ов', 'ие', 'ье', 'еи', 'ии', 'ей', 'ой', 'ий', 'ям', 'ем', 'ам', 'ом', 'ах', 'ях', 'ию', 'ью', 'ия', 'ья',
+    'а', 'е', 'и', 'й', 'о', 'у', 'ы', 'ь', 'ю', 'я',
+)
+DERIVATIONAL = _longest_first('ость', 'ост')
+SUPERLATIVE = _longest_first('ейше', 'ейш')
+
+_WORD_RE = re.compile(r'\w+')
+_CYRILLIC_RE = re.compile('[а-я]')
+
+
+def _regions(word):
+    """Начало RV и R2 (индексы в слове)."""
+    rv = len(word)
+    for i, char in enumerate(word):
+        if char in VOWELS:
+            rv = i + 1
+            break
+
+    def next_region(start):
+        for i in range(start + 1, len(word)):
+            if word[i] not in VOWELS and word[i - 1] in VOWELS:
+                return i + 1
+        return len(word)
+
+    r1 = next_region(0)
+    r2 = next_region(r1)
+    return rv, r2
+
+
+def _strip(word, start, suffixes, preceded_by_a=False):
+    """Отрезает самое длинное окончание из suffixes, лежащее целиком после start.
+
+    preceded_by_a — окончание засчитывается, только если перед ним «а» или «я» (тоже после start).
+    """
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) - len(suffix) >= start:
+            if preceded_by_a:
+                before = len(word) - len(suffix) - 1
+                if before < start or word[before] not in 'ая':
+                    continue
+            return word[:-len(suffix)]
+    return None
+
+
+def _strip_group(word, start, group_1, group_2):
+    # Сравниваем обе группы: побеждает самое длинное окончание
+    candidates = [
+        result for result in (_strip(word, start, group_1, True), _strip(word, start, group_2))
+        if result is not None
+    ]
+    return min(candidates, key=len) if candidates else None
+
+
+@lru_cache(maxsize=100_000)
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+
+    # Шаг 1
+    result = _strip_group(word, rv, PERFECTIVE_GERUND_1, PERFECTIVE_GERUND_2)
+    if result is not None:
+        word = result
+    else:
+        word = _strip(word, rv, REFLEXIVE) or word
+        adjective = _strip(word, rv, ADJECTIVE)
+        if adjective is not None:
+            word = _strip_group(adjective, rv, PARTICIPLE_1, PARTICIPLE_2) or adjective
+        else:
+            verb = _strip_group(word, rv, VERB_1, VERB_2)
+            if verb is not None:
+                word = verb
+            else:
+                word = _strip(word, rv, NOUN) or word
+
+    # Шаг 2
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    # Шаг 3
+    word = _strip(word, r2, DERIVATIONAL) or word
+
+    # Шаг 4
+    superlative = _strip(word, rv, SUPERLATIVE)
+    if superlative is not None:
+        word = superlative
+        if word.endswith('нн') and len(word) - 1 >= rv:
+            word = word[:-1]
+    elif word.endswith('нн') and len(word) - 1 >= rv:
+        word = word[:-1]
+    elif word.endswith('ь') and len(word) - 1 >= rv:
+        word = word[:-1]
+    return word
+
+
+def tokens(text):
+    """Слова текста в нижнем регистре; русские — сведённые к основе."""
+    result = []
+    for token in _WORD_RE.findall(text.lower()):
+        result.append(stem(token) if _CYRILLIC_RE.search(token) else token)
+    return result
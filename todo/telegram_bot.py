@@ -4,15 +4,40 @@ from telegram import Update
 from telegram.ext import Application
 from django.conf import settings
 from .bot import register_handlers, set_bot
+from .notifications import OutboxWorker
 
 logger = logging.getLogger(__name__)
 
+async def start_outbox_worker(application):
+    # Очередь уведомлений разбирается в том же цикле и тем же httpx-клиентом, что и бот
+    worker = OutboxWorker(application.bot)
+    application.bot_data['outbox_worker'] = worker
+    application.create_task(worker.run())
+
+async def stop_outbox_worker(application):
+    worker = application.bot_data.get('outbox_worker')
+    if worker:
+        worker.stop()
+
+def build_application(updater=True):
+    builder = (
+        Application.builder()
+        .token(settings.TELEGRAM_BOT_TOKEN)
+        .post_init(start_outbox_worker)
+        .post_stop(stop_outbox_worker)
+    )
+    if not updater:
+        # Webhook-воркеры получают апдейты из БД, а не через getUpdates
+        builder = builder.updater(None)
+    application = builder.build()
+    set_bot(application.bot)  # ← сохраняем ссылку на бота
+    register_handlers(application)
+    return application
+
 def start_bot():
     try:
-        application = Application.builder().token(settings.TELEGRAM_BOT_TOKEN).build()
-        set_bot(application.bot)  # ← сохраняем ссылку на бота
-        register_handlers(application)
+        application = build_application()
         logger.info("✅ Запуск Telegram-бота...")
         application.run_polling(allowed_updates=Update.ALL_TYPES)
     except Exception as e:
-        logger.exception(f"❌ Ошибка запуска бота: {e}")
\ No newline at end of file
+        logger.exception(f"❌ Ошибка запуска бота: {e}")
@@ -1,3 +1,1173 @@
-from django.test import TestCase
+import asyncio
+import csv
+import importlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import zipfile
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core import mail
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from telegram import Bot, Update
+from telegram.ext import Application
+from todo_comp import config, database, urls as project_urls
+
+from . import bot as bot_module, bot_runner, db_router, push, telegram_bot, views
+from .overdue import sweep_overdue
+from . import attachments, bulk, counters, dashboard, downloads, events, importer, notifications, profiling, render_cache, search
+from .fake_telegram import FakeTelegramServer
+from .bot_runner import claim_update, finish_update
+from .models import (
+    Comment, FileBlob, NotificationOutbox, TaskDaySummary, TaskModel, TaskSummary, TaskTombstone, TelegramUpdate,
+    TelegramUserModel, UploadSession, UserModel,
+)
+from .notifications import OutboxWorker, RateLimiter
+
+
+# Манифест статики появляется только после collectstatic — в тестах он не нужен
+PLAIN_STATIC_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+def make_user(username, role='employee'):
+    return UserModel.objects.create_user(
+        username=username, email=f'{username}@example.com', password='pass', first_name=username, role=role
+    )
+
+
+def make_task(assignee, created_by=None, **kwargs):
+    kwargs.setdefault('title', 'Задача')
+    kwargs.setdefault('deadline', timezone.now() + timedelta(days=1))
+    return TaskModel.objects.create(assignee=assignee, created_by=created_by or assignee, **kwargs)
+
+
+class TasksDeltaSyncTests(TestCase):
+    def setUp(self):
+        render_cache.get_cache().clear()
+        self.manager = make_user('boss', role='manager')
+        self.employee = make_user('worker')
+        self.url = reverse('todo:api_tasks')
+
+    def test_full_response_then_not_modified(self):
+        make_task(self.employee, self.manager)
+        self.client.force_login(self.employee)
+        response = self.client.get(self.url)
+        data = response.json()
+        self.assertTrue(data['full'])
+        self.assertEqual(len(data['tasks']), 1)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(TODO_DELTA_SYNC_OVERLAP=0)
+    def test_delta_contains_changes_and_removals(self):
+        kept = make_task(self.employee, self.manager, title='Старая')
+        done = make_task(self.employee, self.manager, title='Завершим')
+        gone = make_task(self.employee, self.manager, title='Удалим')
+        moved = make_task(self.employee, self.manager, title='Передадим')
+        self.client.force_login(self.employee)
+        since = self.client.get(self.url).json()['since']
+
+        # Кэш ответов сбрасывается после коммита (подписчик render_cache)
+        with self.captureOnCommitCallbacks(execute=True):
+            fresh = make_task(self.employee, self.manager, title='Новая')
+            done.status = 'completed'
+            done.save()
+            gone_id = gone.id
+            gone.delete()
+            moved.assignee = self.manager
+            moved.save()
+
+        data = self.client.get(self.url, {'since': since}).json()
+        self.assertFalse(data['full'])
+        self.assertEqual([task['id'] for task in data['tasks']], [fresh.id])
+        self.assertEqual(data['removed'], sorted([done.id, gone_id, moved.id]))
+        self.assertNotIn(kept.id, data['removed'])
+
+    def test_delta_rereads_window_before_cursor(self):
+        late = make_task(self.employee, self.manager, title='Было')
+        make_task(self.employee, self.manager)
+        self.client.force_login(self.employee)
+        response = self.client.get(self.url)
+        since = response.json()['since']
+        first = self.client.get(self.url, {'since': since})
+
+        # Транзакция, закоммиченная после выдачи курсора, но с updated_at раньше него
+        TaskModel.objects.filter(pk=late.pk).update(title='Стало', updated_at=parse_datetime(since) - timedelta(seconds=5))
+
+        response = self.client.get(self.url, {'since': since}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Стало', [task['title'] for task in response.json()['tasks']])
+
+
+class TaskPushTests(TestCase):
+    async def test_in_memory_backend_delivers_to_subscribers(self):
+        backend = push.InMemoryPushBackend()
+        subscription = backend.subscribe()
+        backend.publish({'type': 'created', 'task_id': 1, 'assignee_ids': [5]})
+        event = await asyncio.wait_for(subscription.get(), timeout=1)
+        self.assertEqual(event['task_id'], 1)
+        subscription.close()
+        self.assertFalse(backend._subscribers)
+
+    @override_settings(TODO_EVENT_BUS_EAGER=True)
+    def test_events_published_after_commit(self):
+        manager = make_user('boss', role='manager')
+        employee = make_user('worker')
+        published = []
+        original = push.publish_task_event
+        push.publish_task_event = lambda *args: published.append(args)
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                task = make_task(employee, manager)
+            with self.captureOnCommitCallbacks(execute=True):
+                task.status = 'completed'
+                task.save()
+        finally:
+            push.publish_task_event = original
+
+        self.assertEqual([event[0] for event in published], ['created', 'completed'])
+        event = {'assignee_ids': published[0][2]}
+        self.assertTrue(push.is_visible(event, employee))
+        self.assertTrue(push.is_visible(event, manager))
+        self.assertFalse(push.is_visible(event, make_user('other')))
+
+
+class TaskApiQueryCountTests(TestCase):
+    def setUp(self):
+        render_cache.get_cache().clear()
+        self.manager = make_user('boss', role='manager')
+        self.employee = make_user('worker')
+        self.client.force_login(self.manager)
+
+    def count_queries(self, url_name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_tasks(self):
+        for url_name in ('todo:api_tasks', 'todo:calendar_events'):
+            make_task(self.employee, self.manager)
+            few = self.count_queries(url_name)
+            with self.captureOnCommitCallbacks(execute=True):
+                for _ in range(10):
+                    make_task(self.employee, self.manager)
+            self.assertEqual(self.count_queries(url_name), few, url_name)
+
+    def test_payload_uses_labels_and_detail_urls(self):
+        task = make_task(self.employee, self.manager, priority='urgent')
+        data = self.client.get(reverse('todo:api_tasks')).json()
+        self.assertEqual(data['tasks'][0]['priority_display'], 'Срочно')
+        self.assertEqual(data['tasks'][0]['assignee__first_name'], 'worker')
+        events = self.client.get(reverse('todo:calendar_events')).json()
+        self.assertEqual(events[0]['url'], reverse('todo:task_detail', args=[task.id]))
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class TaskDetailQueryCountTests(TestCase):
+    def setUp(self):
+        self.manager = make_user('boss', role='manager')
+        self.task = make_task(make_user('worker'), self.manager)
+        self.client.force_login(self.manager)
+
+    def add_comments(self, n):
+        for i in range(n):
+            Comment.objects.create(task=self.task, author=make_user(f'author{Comment.objects.count()}'), text=f'#{i}')
+
+    def count_queries(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('todo:task_detail', args=[self.task.pk]), params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_query_count_does_not_grow_with_comments(self):
+        self.add_comments(2)
+        few, _ = self.count_queries()
+        self.add_comments(10)
+        self.assertEqual(self.count_queries()[0], few)
+
+    @mock.patch.object(views.TaskDetailView, 'comments_per_page', 3)
+    def test_comments_are_paginated_newest_first(self):
+        self.add_comments(5)
+        _, response = self.count_queries()
+        page = response.context['comments_page']
+        self.assertEqual([comment.text for comment in page], ['#4', '#3', '#2'])
+        self.assertContains(response, 'Комментарии (5)')
+        _, response = self.count_queries(comments=page.next_cursor)
+        self.assertEqual([comment.text for comment in response.context['comments_page']], ['#1', '#0'])
+
+    def test_unchanged_page_is_revalidated_by_etag(self):
+        url = reverse('todo:task_detail', args=[self.task.pk])
+        # Первый ответ выдаёт CSRF-cookie, от которой зависит ETag
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        # Страница комментариев не выбирается
+        self.assertLess(len(queries), self.count_queries()[0])
+        self.add_comments(1)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+
+class RenderCacheTests(TestCase):
+    def setUp(self):
+        render_cache.get_cache().clear()
+        render_cache.reset_metrics()
+        self.manager = make_user('boss', role='manager')
+        self.employee = make_user('worker')
+        self.other = make_user('other')
+        self.url = reverse('todo:api_tasks')
+
+    def fetch(self, user, url=None):
+        self.client.force_login(user)
+        return self.client.get(url or self.url).json()
+
+    def test_repeated_poll_is_served_from_cache(self):
+        make_task(self.employee, self.manager)
+        self.fetch(self.employee)
+        self.client.force_login(self.employee)
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(self.url).json()
+        self.assertEqual(len(data['tasks']), 1)
+        self.assertFalse(any('ORDER BY' in query['sql'] for query in queries), 'список задач выбран заново')
+        self.assertEqual(render_cache.metrics()['kinds']['tasks'], {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_task_change_invalidates_assignee_and_managers_only(self):
+        task = make_task(self.employee, self.manager, title='Было')
+        make_task(self.other, self.manager)
+        for user in (self.manager, self.employee, self.other):
+            self.fetch(user)
+            self.fetch(user, reverse('todo:calendar_events'))
+        render_cache.reset_metrics()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task.title = 'Стало'
+            task.save()
+
+        titles = [item['title'] for item in self.fetch(self.manager)['tasks']]
+        self.assertIn('Стало', titles)
+        self.assertEqual(self.fetch(self.employee)['tasks'][0]['title'], 'Стало')
+        self.assertEqual(self.fetch(self.employee, reverse('todo:calendar_events'))[0]['title'], 'Стало')
+        self.fetch(self.other)
+        kinds = render_cache.metrics()['kinds']
+        self.assertEqual((kinds['tasks']['hits'], kinds['tasks']['misses']), (1, 2))
+
+    def test_entry_expires_when_deadline_passes(self):
+        make_task(self.employee, self.manager, deadline=timezone.now() + timedelta(seconds=2))
+        original = render_cache.get_cache().set
+        timeouts = []
+        render_cache.get_cache().set = lambda key, value, timeout: timeouts.append(timeout)
+        try:
+            self.fetch(self.employee)
+        finally:
+            render_cache.get_cache().set = original
+        self.assertLessEqual(timeouts[0], 2)
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.log_dir)
+        self.log_path = os.path.join(self.log_dir, 'profiling.jsonl')
+        profiling.metrics.reset()
+        self.addCleanup(self.close_log)
+
+    def close_log(self):
+        for handler in list(profiling.request_log.handlers):
+            profiling.request_log.removeHandler(handler)
+            handler.close()
+
+    def test_disabled_middleware_is_not_loaded(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            profiling.ProfilingMiddleware(lambda request: None)
+
+    def test_recorder_reports_repeated_queries_with_origin(self):
+        employee = make_user('worker')
+        tasks = [make_task(employee) for _ in range(4)]
+        recorder = profiling.QueryRecorder()
+        with profiling.record_queries(recorder):
+            for task in TaskModel.objects.filter(pk__in=[task.pk for task in tasks]):
+                task.assignee.first_name
+        self.assertEqual(recorder.count, 5)
+        duplicate, = recorder.duplicates(threshold=3)
+        self.assertEqual(duplicate['count'], 4)
+        self.assertIn('todo/tests.py', duplicate['origin'])
+
+    def test_profiled_request_goes_to_metrics_and_log(self):
+        manager = make_user('boss', role='manager')
+        manager.is_staff = True
+        manager.save()
+        make_task(manager)
+        with override_settings(TODO_PROFILING=True, TODO_PROFILING_LOG=self.log_path):
+            self.client.force_login(manager)
+            self.assertEqual(self.client.get(reverse('todo:api_tasks')).status_code, 200)
+            text = self.client.get(reverse('todo:profiling_metrics')).content.decode()
+
+        self.assertIn('todo_requests_total{view="todo:api_tasks",method="GET",status="200"} 1', text)
+        self.assertIn('todo_request_duration_seconds_bucket{view="todo:api_tasks",le="+Inf"} 1', text)
+        with open(self.log_path, encoding='utf-8') as f:
+            record = json.loads(f.readline())
+        self.assertEqual(record['view'], 'todo:api_tasks')
+        self.assertGreater(record['queries'], 0)
+
+
+class ReadOnlyRoutingTests(SimpleTestCase):
+    def test_reads_of_read_only_views_go_to_read_alias(self):
+        router = db_router.ReadOnlyViewRouter()
+        self.assertIsNone(router.db_for_read(TaskModel))
+        token = db_router._read_only.set(True)
+        try:
+            self.assertEqual(router.db_for_read(TaskModel), 'read')
+            self.assertEqual(router.db_for_write(TaskModel), 'default')
+        finally:
+            db_router._read_only.reset(token)
+        self.assertFalse(router.allow_migrate('read', 'todo'))
+
+    def test_views_with_side_effects_are_not_read_only(self):
+        self.assertTrue(db_router.is_read_only(views.TaskListView.as_view()))
+        self.assertTrue(db_router.is_read_only(views.get_tasks_json))
+        # GET карточки задачи переводит новую задачу в работу
+        self.assertFalse(db_router.is_read_only(views.TaskDetailView.as_view()))
+
+
+class DatabaseConfigTests(SimpleTestCase):
+    def test_environment_overrides_settings_json(self):
+        config = database.load_config(
+            {'engine': 'postgresql', 'host': 'db', 'pool': {'max_size': 4}},
+            {'TODO_DB_HOST': 'db2', 'TODO_DB_POOL_MIN_SIZE': '1', 'TODO_DB_DISABLE_SERVER_SIDE_CURSORS': 'true'},
+        )
+        self.assertTrue(database.is_postgresql(config))
+        self.assertEqual(config['host'], 'db2')
+        self.assertEqual(config['pool'], {'min_size': 1, 'max_size': 4, 'timeout': 10.0})
+        self.assertTrue(config['disable_server_side_cursors'])
+        self.assertFalse(database.is_postgresql(database.load_config()))
+
+    def test_postgres_aliases_use_pool_and_read_only_replica(self):
+        databases = database.postgres_databases(database.load_config({'engine': 'postgresql', 'read_host': 'replica'}))
+        self.assertEqual(databases['default']['CONN_MAX_AGE'], 0)
+        self.assertIn('pool', databases['default']['OPTIONS'])
+        self.assertEqual(databases['read']['HOST'], 'replica')
+        self.assertIn('default_transaction_read_only', databases['read']['OPTIONS']['options'])
+        self.assertEqual(databases['read']['TEST'], {'MIRROR': 'default'})
+
+
+class AppConfigTests(SimpleTestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'settings.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.path))
+        self.write({'SECRET_KEY': 'k', 'telegram_bot_token': '1:a', 'smtp_PORT': 2525})
+        previous = config._current
+        self.addCleanup(setattr, config, '_current', previous)
+
+    def write(self, data):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def test_environment_overrides_and_validation(self):
+        loaded = config.load(self.path, {'TODO_SMTP_PORT': '587', 'TODO_PROFILING': 'true'})
+        self.assertEqual((loaded.smtp_port, loaded.profiling), (587, True))
+        with self.assertRaisesMessage(ImproperlyConfigured, 'smtp_PORT'):
+            config.load(self.path, {'TODO_SMTP_PORT': 'много'})
+
+    @override_settings()
+    def test_reload_applies_new_values_and_keeps_old_on_error(self):
+        with mock.patch.dict(os.environ, {'TODO_SETTINGS_FILE': self.path}):
+            self.write({'SECRET_KEY': 'k', 'telegram_bot_token': '1:a', 'telegram_webhook_secret': 'new'})
+            with self.assertLogs('todo_comp.config', 'INFO'):
+                self.assertEqual(config.reload().telegram_webhook_secret, 'new')
+            self.assertEqual(settings.TELEGRAM_WEBHOOK_SECRET, 'new')
+            self.write({'SECRET_KEY': ''})
+            with self.assertLogs('todo_comp.config', 'ERROR'):
+                self.assertEqual(config.reload().telegram_webhook_secret, 'new')
+
+
+@unittest.skipUnless(connection.features.has_select_for_update_skip_locked, "нужен SKIP LOCKED (PostgreSQL)")
+class SkipLockedClaimTests(TransactionTestCase):
+    def test_locked_update_is_skipped_by_other_worker(self):
+        for update_id in (1, 2):
+            TelegramUpdate.objects.create(update_id=update_id, payload={})
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_first_row():
+            with transaction.atomic():
+                TelegramUpdate.objects.select_for_update().get(update_id=1)
+                locked.set()
+                release.wait(10)
+            connection.close()
+
+        holder = threading.Thread(target=hold_first_row)
+        holder.start()
+        try:
+            locked.wait(10)
+            self.assertEqual(claim_update('b').update_id, 2)
+        finally:
+            release.set()
+            holder.join()
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class OverdueSweepTests(TestCase):
+    def setUp(self):
+        self.employee = make_user('worker')
+        self.late = make_task(self.employee)
+        self.on_time = make_task(self.employee)
+        TaskModel.objects.filter(pk=self.late.pk).update(deadline=timezone.now() - timedelta(hours=1))
+
+    def test_list_views_do_not_write(self):
+        self.client.force_login(self.employee)
+        self.client.get(reverse('todo:task_list'))
+        self.client.get(reverse('todo:history_list'))
+        late = TaskModel.objects.get(pk=self.late.pk)
+        self.assertEqual(late.status, 'new')
+        self.assertEqual(late.effective_status, 'overdue')
+
+    def test_sweep_marks_only_expired_tasks(self):
+        self.assertEqual(sweep_overdue(batch_size=1), 1)
+        self.assertEqual(TaskModel.objects.get(pk=self.late.pk).status, 'overdue')
+        self.assertEqual(TaskModel.objects.get(pk=self.on_time.pk).status, 'new')
+        self.assertEqual(sweep_overdue(), 0)
+
+    def test_sweep_publishes_one_event_per_batch(self):
+        other = make_user('other')
+        second = make_task(other)
+        TaskModel.objects.filter(pk=second.pk).update(deadline=timezone.now() - timedelta(hours=2))
+        with mock.patch.object(events, 'publish') as publish:
+            self.assertEqual(sweep_overdue(), 2)
+        publish.assert_called_once()
+        name, payload = publish.call_args.args[0], publish.call_args.kwargs
+        self.assertEqual(name, events.TASKS_BULK_CHANGED)
+        self.assertEqual(sorted(payload['overdue']), sorted([self.late.pk, second.pk]))
+        self.assertEqual(payload['assignee_ids'], sorted({self.employee.pk, other.pk}))
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class UserTaskCountersTests(TestCase):
+    def setUp(self):
+        self.manager = make_user('boss', role='manager')
+        self.employee = make_user('worker')
+        make_task(self.employee, self.manager)
+        make_task(self.employee, self.manager, status='in_progress')
+        done = make_task(self.employee, self.manager)
+        done.status = 'completed'
+        done.save()
+
+    def assert_counts(self):
+        user = UserModel.objects.with_task_counts().get(pk=self.employee.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.total_tasks_count, 3)
+            self.assertEqual(user.completed_tasks_count, 1)
+            self.assertEqual(user.in_progress_tasks_count, 1)
+            self.assertEqual(user.active_tasks_count, 2)
+            self.assertEqual(user.overdue_tasks_count, 0)
+
+    def test_annotated_counts(self):
+        self.assert_counts()
+
+    @override_settings(TODO_DENORMALIZED_TASK_COUNTERS=True)
+    def test_denormalized_counts_follow_changes(self):
+        counters.rebuild()
+        task = make_task(self.employee, self.manager)
+        task.assignee = self.manager
+        task.save()
+        task.delete()
+        self.assert_counts()
+
+    def test_user_list_query_count_is_constant(self):
+        self.client.force_login(self.manager)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse('todo:user_list'))
+        for i in range(5):
+            make_task(make_user(f'extra{i}'), self.manager)
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(reverse('todo:user_list'))
+        self.assertEqual(len(many), len(few))
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.manager = make_user('boss', role='manager')
+        self.employee = make_user('worker')
+        self.mine = make_task(self.employee, self.manager, title='Моя, "с кавычками"')
+        self.done = make_task(self.employee, self.manager, title='Готово', status='completed')
+        self.foreign = make_task(make_user('other'), self.manager, title='Чужая')
+        Comment.objects.create(task=self.mine, author=self.manager, text='Комментарий')
+
+    def download(self, user, **params):
+        self.client.force_login(user)
+        response = self.client.get(reverse('todo:export'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_csv_respects_visibility_and_filters(self):
+        rows = list(csv.reader(io.StringIO(self.download(self.employee).decode('utf-8-sig'))))
+        self.assertEqual(rows[0][:2], ['ID', 'Название'])
+        self.assertEqual({row[1] for row in rows[1:]}, {self.mine.title, 'Готово'})
+        rows = list(csv.reader(io.StringIO(self.download(self.manager, status='completed').decode('utf-8-sig'))))
+        self.assertEqual([row[1] for row in rows[1:]], ['Готово'])
+
+    def test_jsonl_and_xlsx(self):
+        lines = self.download(self.manager, dataset='comments', format='jsonl').decode().splitlines()
+        self.assertEqual(json.loads(lines[0])['Текст'], 'Комментарий')
+        content = self.download(self.manager, format='xlsx', assignee=self.employee.pk)
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertIsNone(archive.testzip())
+            sheet = archive.read('xl/worksheets/sheet1.xml').decode()
+        self.assertIn('Готово', sheet)
+        self.assertNotIn('Чужая', sheet)
+
+    def test_formula_like_values_stay_text(self):
+        make_task(self.employee, self.manager, title='=HYPERLINK("http://evil","x")')
+        rows = list(csv.reader(io.StringIO(self.download(self.employee).decode('utf-8-sig'))))
+        self.assertIn('\'=HYPERLINK("http://evil","x")', [row[1] for row in rows])
+        content = self.download(self.employee, format='xlsx')
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            sheet = archive.read('xl/worksheets/sheet1.xml').decode()
+            self.assertIn('quotePrefix="1"', archive.read('xl/styles.xml').decode())
+        self.assertIn('<c t="inlineStr" s="1"><is><t xml:space="preserve">=HYPERLINK', sheet)
+        self.assertNotIn('<f>', sheet)
+
+    def test_bad_filter_is_rejected(self):
+        self.client.force_login(self.manager)
+        self.assertEqual(self.client.get(reverse('todo:export'), {'date_from': 'вчера'}).status_code, 400)
+
+
+class BulkTaskTests(TestCase):
+    def setUp(self):
+        self.manager = make_user('boss', role='manager')
+        self.employee = make_user('worker')
+        self.other = make_user('other')
+        TelegramUserModel.objects.create(user=self.other, telegram_id='777')
+        self.client.force_login(self.manager)
+
+    def post(self, operations):
+        return self.client.post(reverse('todo:api_tasks_bulk'), {'operations': operations}, content_type='application/json')
+
+    def test_batch_is_applied_with_aggregated_side_effects(self):
+        moved, done, gone = (make_task(self.employee, self.manager) for _ in range(3))
+        deadline = (timezone.now() + timedelta(days=2)).isoformat()
+        operations = [
+            {'op': 'create', 'title': f'Спринт {i}', 'assignee': self.other.pk, 'deadline': deadline}
+            for i in range(20)
+        ]
+        operations += [
+            {'op': 'reassign', 'task': moved.pk, 'assignee': self.other.pk},
+            {'op': 'complete', 'task': done.pk},
+            {'op': 'delete', 'task': gone.pk},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post(operations)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['created']), 20)
+        self.assertLess(len(queries), 40)
+        self.assertEqual(TaskModel.objects.filter(assignee=self.other).count(), 21)
+        self.assertEqual(TaskModel.objects.get(pk=done.pk).status, 'completed')
+        self.assertFalse(TaskModel.objects.filter(pk=gone.pk).exists())
+        self.assertEqual(
+            set(TaskTombstone.objects.filter(assignee_id=self.employee.pk).values_list('task_id', flat=True)),
+            {moved.pk, gone.pk},
+        )
+        # Одно сообщение на все новые задачи исполнителя
+        self.assertIn('Новые задачи: 21', NotificationOutbox.objects.get(chat_id='777').text)
+
+    @override_settings(TODO_BULK_MAX_BODY_SIZE=100)
+    def test_body_size_is_checked_defensively(self):
+        url = reverse('todo:api_tasks_bulk')
+        operations = [{'op': 'complete', 'task_id': n} for n in range(10)]
+        self.assertEqual(self.post(operations).status_code, 413)
+        response = self.client.post(url, {'operations': []}, content_type='application/json', CONTENT_LENGTH='abc')
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_batch_writes_nothing(self):
+        task = make_task(self.employee, self.manager)
+        response = self.post([
+            {'op': 'complete', 'task': task.pk},
+            {'op': 'create', 'title': '', 'assignee': self.employee.pk, 'deadline': 'завтра'},
+            {'op': 'delete', 'task': task.pk},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.json()['errors']], [1, 2])
+        self.assertEqual(TaskModel.objects.get(pk=task.pk).status, 'new')
+
+    def test_employees_are_forbidden(self):
+        self.client.force_login(self.employee)
+        self.assertEqual(self.post([{'op': 'complete', 'task': 1}]).status_code, 403)
+
+
+class TaskImportTests(TestCase):
+    def setUp(self):
+        self.manager = make_user('boss', role='manager')
+        self.employee = make_user('worker')
+        TelegramUserModel.objects.create(user=self.employee, telegram_id='555')
+        self.client.force_login(self.manager)
+
+    def upload(self, name, content, **data):
+        return self.client.post(
+            reverse('todo:api_tasks_import'), {'file': SimpleUploadedFile(name, content.encode()), **data},
+        )
+
+    def test_csv_is_imported_in_chunks_with_error_report(self):
+        rows = ['\ufefftitle;assignee;deadline;priority']
+        rows += [f'Задача {i};WORKER@example.com;2026-12-01 18:00;Высокий' for i in range(25)]
+        rows += [';worker;2026-12-01 18:00;', 'Без исполнителя;nobody;2026-12-01 18:00;', 'Без срока;worker;завтра;']
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                result = importer.import_tasks(io.BytesIO('\n'.join(rows).encode()), 'csv', self.manager, chunk_size=10)
+        self.assertEqual((result.rows, result.created, result.error_count), (28, 25, 3))
+        self.assertEqual([error['line'] for error in result.errors], [27, 28, 29])
+        self.assertLess(len(queries), 40)
+        task = TaskModel.objects.filter(assignee=self.employee).first()
+        self.assertEqual(task.priority, 'high')
+        self.assertTrue(timezone.is_aware(task.deadline))
+        self.assertIn('Новые задачи: 25', NotificationOutbox.objects.get(chat_id='555').text)
+
+    def test_dry_run_upload_writes_nothing(self):
+        lines = [
+            json.dumps({'title': 'Отчёт', 'assignee': 'worker', 'deadline': '2026-12-01T10:00'}),
+            'не json',
+        ]
+        response = self.upload('tasks.jsonl', '\n'.join(lines), dry_run='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(response.json()['errors'], [{'line': 2, 'error': 'некорректный JSON'}])
+        self.assertFalse(TaskModel.objects.exists())
+
+    def test_missing_columns_and_employees_are_rejected(self):
+        self.assertEqual(self.upload('tasks.csv', 'title,deadline\nA,2026-12-01 10:00').status_code, 400)
+        self.client.force_login(self.employee)
+        self.assertEqual(self.upload('tasks.csv', 'title,assignee,deadline').status_code, 403)
+
+
+@override_settings(TODO_DASHBOARD_SUMMARY=True, STORAGES=PLAIN_STATIC_STORAGES)
+class DashboardTests(TestCase):
+    def setUp(self):
+        self.manager = make_user('boss', role='manager')
+        self.employee = make_user('worker')
+        self.other = make_user('other')
+        self.client.force_login(self.manager)
+
+    def summary_rows(self):
+        return (
+            set(TaskSummary.objects.filter(count__gt=0).values_list('assignee_id', 'status', 'priority', 'count')),
+            set(TaskDaySummary.objects.filter(count__gt=0).values_list('assignee_id', 'kind', 'day', 'count')),
+        )
+
+    def test_incremental_summary_matches_rebuild(self):
+        tasks = [make_task(self.employee, self.manager, priority=priority) for priority in ('low', 'high', 'high', 'urgent')]
+        tasks[0].status = 'completed'
+        tasks[0].save()
+        tasks[1].assignee = self.other
+        tasks[1].save()
+        tasks[2].delete()
+        # Дедлайн истёк — просрочку проставит фоновый проход
+        late = make_task(self.other, self.manager)
+        TaskModel.objects.filter(pk=late.pk).update(deadline=timezone.now() - timedelta(days=5))
+        sweep_overdue()
+        deadline = (timezone.now() + timedelta(days=1)).isoformat()
+        bulk.apply([
+            {'op': 'create', 'title': 'Из пачки', 'assignee': self.other.pk, 'deadline': deadline, 'priority': 'low'},
+            {'op': 'complete', 'task': tasks[3].pk},
+        ], self.manager)
+        importer.import_tasks(io.BytesIO(f'title,assignee,deadline\nИмпорт,worker,{deadline}'.encode()), 'csv', self.manager)
+
+        incremental = self.summary_rows()
+        dashboard.rebuild()
+        self.assertEqual(incremental, self.summary_rows())
+        self.assertIn((self.other.pk, 'overdue', 'medium', 1), incremental[0])
+        self.assertEqual(TaskSummary.objects.filter(assignee=self.employee, status='completed').count(), 2)
+
+    def test_api_reads_summary_in_constant_queries(self):
+        make_task(self.employee, self.manager, status='completed')
+        overdue = make_task(self.other, self.manager)
+        TaskModel.objects.filter(pk=overdue.pk).update(deadline=timezone.now() - timedelta(days=10))
+        sweep_overdue()
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('todo:api_dashboard'))
+        for _ in range(20):
+            make_task(self.employee, self.manager)
+        with CaptureQueriesContext(connection) as large:
+            data = self.client.get(reverse('todo:api_dashboard')).json()
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(data['totals']['by_status'], {'new': 20, 'in_progress': 0, 'completed': 1, 'overdue': 1})
+        self.assertEqual(data['totals']['aging'], [0, 0, 1, 0])
+        self.assertEqual(data['totals']['throughput'][-1], 1)
+        worker = next(row for row in data['assignees'] if row['id'] == self.employee.pk)
+        self.assertEqual(worker['active_by_priority']['medium'], 20)
+        # Без сводки те же цифры считаются по задачам
+        with self.settings(TODO_DASHBOARD_SUMMARY=False):
+            live = dashboard.data()
+        self.assertEqual((live['totals'], live['assignees']), (data['totals'], data['assignees']))
+
+    def test_page_is_for_managers_only(self):
+        self.assertEqual(self.client.get(reverse('todo:dashboard')).status_code, 200)
+        self.client.force_login(self.employee)
+        self.assertRedirects(self.client.get(reverse('todo:dashboard')), reverse('todo:task_list'))
+        self.assertEqual(self.client.get(reverse('todo:api_dashboard')).status_code, 403)
+
+
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        self.manager = make_user('boss', role='manager')
+        self.employee = make_user('worker')
+        TelegramUserModel.objects.create(user=self.employee, telegram_id='555')
+
+    def test_task_creation_enqueues_notification(self):
+        self.client.force_login(self.manager)
+        response = self.client.post(reverse('todo:task_create'), {
+            'title': 'Отчёт <срочно>',
+            'description': 'Собрать цифры',
+            'assignee': self.employee.pk,
+            'deadline': (timezone.localtime() + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M'),
+            'priority': 'high',
+        })
+        self.assertEqual(response.status_code, 302)
+        item = NotificationOutbox.objects.get()
+        self.assertEqual(item.chat_id, '555')
+        self.assertIn('Отчёт &lt;срочно&gt;', item.text)
+        self.assertEqual(item.status, 'pending')
+
+    async def drain(self, server):
+        async with Bot('123:abc', base_url=server.base_url) as bot:
+            worker = OutboxWorker(bot, rate_limiter=RateLimiter(per_chat_interval=0))
+            return await worker.drain_once()
+
+    async def test_worker_coalesces_messages_per_chat(self):
+        create = sync_to_async(NotificationOutbox.objects.create)
+        await create(chat_id='555', text='первое')
+        await create(chat_id='555', text='второе')
+        with FakeTelegramServer() as server:
+            self.assertEqual(await self.drain(server), 2)
+        messages = server.sent_messages()
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0]['text'], 'первое\n\nвторое')
+        statuses = await sync_to_async(list)(NotificationOutbox.objects.values_list('status', flat=True))
+        self.assertEqual(statuses, ['sent', 'sent'])
+
+    async def test_webhook_workers_deliver_outbox(self):
+        item = await sync_to_async(NotificationOutbox.objects.create)(chat_id='555', text='из outbox')
+        stop = asyncio.Event()
+        with FakeTelegramServer() as server:
+            def build_application(updater=True):
+                # Как telegram_bot.build_application, но с ботом на фейковом сервере
+                return (
+                    Application.builder().token('123:abc').base_url(server.base_url).updater(None)
+                    .post_init(telegram_bot.start_outbox_worker).post_stop(telegram_bot.stop_outbox_worker)
+                    .build()
+                )
+
+            with mock.patch.object(bot_runner, 'build_application', build_application):
+                runner = asyncio.create_task(bot_runner.run_webhook_workers(workers=1, stop_event=stop))
+                for _ in range(50):
+                    if server.sent_messages():
+                        break
+                    await asyncio.sleep(0.1)
+                stop.set()
+                await asyncio.wait_for(runner, timeout=10)
+        self.assertEqual([message['text'] for message in server.sent_messages()], ['из outbox'])
+        await sync_to_async(item.refresh_from_db)()
+        self.assertEqual(item.status, 'sent')
+
+    async def test_rate_limited_message_is_retried_later(self):
+        item = await sync_to_async(NotificationOutbox.objects.create)(chat_id='555', text='текст')
+        with FakeTelegramServer() as server:
+            server.rate_limit_next = 1
+            server.retry_after = 30
+            await self.drain(server)
+            # Повтор ещё не наступил — второй проход ничего не берёт
+            self.assertEqual(await self.drain(server), 0)
+        await sync_to_async(item.refresh_from_db)()
+        self.assertEqual(item.status, 'pending')
+        # Ожидание по просьбе Telegram попыткой не считается
+        self.assertEqual(item.attempts, 0)
+        self.assertGreater(item.next_attempt_at, timezone.now() + timedelta(seconds=20))
+
+    async def test_long_batches_are_split_at_telegram_limit(self):
+        create = sync_to_async(NotificationOutbox.objects.create)
+        for n in range(3):
+            await create(chat_id='555', text=f'{n}' * 3000)
+        await create(chat_id='555', text='длинное\n' * 1000)
+        with FakeTelegramServer() as server:
+            self.assertEqual(await self.drain(server), 4)
+        lengths = [len(message['text']) for message in server.sent_messages()]
+        self.assertTrue(all(length <= notifications.MAX_MESSAGE_LENGTH for length in lengths), lengths)
+        self.assertEqual(len(lengths), 5)
+        statuses = await sync_to_async(list)(NotificationOutbox.objects.values_list('status', flat=True))
+        self.assertEqual(statuses, ['sent'] * 4)
+
+    async def test_bad_request_fails_only_the_offending_item(self):
+        create = sync_to_async(NotificationOutbox.objects.create)
+        good = await create(chat_id='555', text='нормальное')
+        bad = await create(chat_id='555', text='битое <b>')
+        with FakeTelegramServer() as server:
+            server.reject_text = '<b>'
+            await self.drain(server)
+        statuses = dict(await sync_to_async(list)(NotificationOutbox.objects.values_list('pk', 'status')))
+        self.assertEqual(statuses, {good.pk: 'sent', bad.pk: 'failed'})
+        # Склейку отклонили — каждое сообщение отправлено отдельно
+        self.assertEqual(
+            [message['text'] for message in server.sent_messages()],
+            ['нормальное\n\nбитое <b>', 'нормальное', 'битое <b>'],
+        )
+
+
+class EventBusTests(TestCase):
+    def test_full_queue_drops_instead_of_blocking(self):
+        bus = events.EventBus(queue_size=1)
+        received = []
+
+        @bus.subscribe('ping', name='slow')
+        async def slow(event):
+            received.append(event)
+
+        consumer = bus._consumers[0]
+        consumer.queue = asyncio.Queue(maxsize=1)
+        event = events.DomainEvent('ping', {})
+        consumer.put(event)
+        consumer.put(event)
+        self.assertEqual(bus.metrics()['slow']['queue_depth'], 1)
+        self.assertEqual(bus.metrics()['slow']['dropped'], 1)
+
+    def test_durable_consumer_runs_on_commit_without_queue(self):
+        bus = events.EventBus(queue_size=1)
+        received = []
+
+        @bus.subscribe('ping', name='outbox', durable=True)
+        def outbox(event):
+            received.append(event.payload['n'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for n in range(5):
+                bus.publish('ping', n=n)
+        # Очередь на одно событие, но ни одно не потеряно и фоновый поток не нужен
+        self.assertEqual(received, [0, 1, 2, 3, 4])
+        self.assertIsNone(bus._loop)
+        self.assertEqual(bus.metrics()['outbox']['processed'], 5)
+        self.assertEqual(bus.metrics()['outbox']['dropped'], 0)
+
+    @override_settings(TODO_EVENT_BUS_EAGER=True, TODO_EMAIL_NOTIFICATIONS=True)
+    def test_email_consumer_notifies_assignee(self):
+        manager = make_user('boss', role='manager')
+        employee = make_user('worker')
+        employee.email = 'worker@example.com'
+        employee.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_task(employee, manager, title='Отчёт')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['worker@example.com'])
+        self.assertIn('Отчёт', mail.outbox[0].subject)
+
+    @override_settings(TODO_EVENT_BUS_EAGER=True)
+    def test_comment_notifies_assignee_via_outbox(self):
+        manager = make_user('boss', role='manager')
+        employee = make_user('worker')
+        TelegramUserModel.objects.create(user=employee, telegram_id='777')
+        task = make_task(employee, manager)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(task=task, author=manager, text='Посмотри, пожалуйста')
+        item = NotificationOutbox.objects.get()
+        self.assertEqual(item.chat_id, '777')
+        self.assertIn('Посмотри', item.text)
+        self.assertGreaterEqual(events.bus.metrics()['telegram']['processed'], 1)
+
+
+@override_settings(TELEGRAM_WEBHOOK_SECRET='s3cret')
+class TelegramWebhookTests(TestCase):
+    def post_update(self, update_id, secret='s3cret'):
+        return self.client.post(
+            reverse('todo:telegram_webhook'),
+            data={'update_id': update_id, 'message': {'text': '/start'}},
+            content_type='application/json',
+            headers={'X-Telegram-Bot-Api-Secret-Token': secret},
+        )
+
+    def test_duplicate_delivery_is_stored_once(self):
+        self.assertEqual(self.post_update(10).status_code, 200)
+        self.assertEqual(self.post_update(10).status_code, 200)
+        self.assertEqual(TelegramUpdate.objects.count(), 1)
+
+    def test_wrong_secret_is_rejected(self):
+        self.assertEqual(self.post_update(11, secret='nope').status_code, 403)
+        self.assertFalse(TelegramUpdate.objects.exists())
+
+    def test_update_is_claimed_by_one_worker(self):
+        self.post_update(12)
+        item = claim_update('a')
+        self.assertEqual(item.update_id, 12)
+        self.assertIsNone(claim_update('b'))
+        finish_update(item.pk, ok=False)
+        # Неудачный апдейт возвращается в очередь до MAX_ATTEMPTS — но не раньше, чем пройдёт пауза
+        self.assertIsNone(claim_update('b'))
+        item.refresh_from_db()
+        self.assertGreater(item.next_attempt_at, timezone.now())
+        TelegramUpdate.objects.filter(pk=item.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(claim_update('b').claimed_by, 'b')
+
+
+class BotTaskListTests(TestCase):
+    def setUp(self):
+        self.employee = make_user('worker')
+        TelegramUserModel.objects.create(user=self.employee, telegram_id='42')
+        for i in range(bot_module.TASKS_PAGE_SIZE + 2):
+            make_task(self.employee, title=f'Задача {i}')
+        bot_module._user_cache.invalidate('42')
+
+    def update(self, number, **kwargs):
+        user = {'id': 42, 'is_bot': False, 'first_name': 'W'}
+        chat = {'id': 42, 'type': 'private'}
+        message = {'message_id': 1, 'date': 0, 'chat': chat, 'from': user, 'text': '📋 Мои задачи'}
+        if 'data' in kwargs:
+            return {'update_id': number, 'callback_query': {
+                'id': str(number), 'from': user, 'chat_instance': '1', 'message': message, 'data': kwargs['data'],
+            }}
+        return {'update_id': number, 'message': message}
+
+    async def test_tasks_are_sent_as_one_paginated_message(self):
+        with FakeTelegramServer() as server:
+            application = Application.builder().token('123:abc').base_url(server.base_url).updater(None).build()
+            bot_module.register_handlers(application)
+            async with application:
+                await application.process_update(Update.de_json(self.update(1), application.bot))
+                sent = server.sent_messages()
+                self.assertEqual(len(sent), 1)
+                self.assertIn('page_1', str(sent[0]['reply_markup']))
+
+                await application.process_update(Update.de_json(self.update(2, data='page_1'), application.bot))
+                edited = [params for method, params in server.calls if method == 'editMessageText']
+                self.assertIn('Задача 9', edited[-1]['text'])
+        self.assertIsNot(bot_module._user_cache.get('42'), None)
+
+
+class BotUserCacheTests(TestCase):
+    async def test_unlinked_user_is_not_cached(self):
+        self.assertIsNone(await bot_module.get_telegram_user('4242'))
+        # Аккаунт привязали мимо этого процесса бота — следующий запрос его уже видит
+        user = await sync_to_async(make_user)('fresh')
+        await sync_to_async(TelegramUserModel.objects.create)(user=user, telegram_id='4242')
+        telegram_user = await bot_module.get_telegram_user('4242')
+        self.assertEqual(telegram_user.user_id, user.pk)
+        bot_module._user_cache.invalidate('4242')
+
+
+class AttachmentStorageTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media, TODO_UPLOAD_TEMP_DIR=os.path.join(self.media, 'uploads'), TODO_UPLOAD_CHUNK_SIZE=4,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.employee = make_user('worker')
+        self.task = make_task(self.employee)
+
+    def test_identical_files_share_one_blob(self):
+        first = attachments.attach_uploaded_file(self.task, SimpleUploadedFile('spec.pdf', b'same bytes'))
+        second = attachments.attach_uploaded_file(make_task(self.employee), SimpleUploadedFile('copy.pdf', b'same bytes'))
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(second.display_name, 'copy.pdf')
+        self.assertEqual(FileBlob.objects.get().ref_count, 2)
+
+        first.delete()
+        second.task.delete()
+        blob = FileBlob.objects.get()
+        self.assertEqual(blob.ref_count, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(attachments.collect_garbage(now=timezone.now() + timedelta(days=1)), (1, 0))
+        self.assertFalse(os.path.exists(os.path.join(self.media, blob.file.name)))
+
+    def test_chunked_upload_resumes_from_offset(self):
+        self.client.force_login(self.employee)
+        upload = self.client.post(reverse('todo:upload_start'), {'filename': 'big.bin', 'size': 6}, content_type='application/json').json()
+        url = reverse('todo:upload_chunk', args=[upload['id']])
+
+        put = lambda offset, data: self.client.put(url, data, content_type='application/octet-stream', headers={'Upload-Offset': str(offset)})
+        self.assertEqual(put(0, b'abcd').json()['offset'], 4)
+        # Повтор уже полученной части отклоняется с текущим offset
+        self.assertEqual(put(0, b'abcd').json()['offset'], 4)
+        self.assertEqual(put(4, b'abcdef').status_code, 413)
+        self.assertEqual(put(4, b'ef').json()['offset'], 6)
+
+        response = self.client.post(
+            reverse('todo:upload_complete', args=[upload['id']]), {'task_id': self.task.pk}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        task_file = self.task.files.get()
+        self.assertEqual(task_file.display_name, 'big.bin')
+        self.assertEqual(task_file.file.read(), b'abcdef')
+        self.assertFalse(os.listdir(os.path.join(self.media, 'uploads')))
+
+    def test_racing_chunk_loses_without_touching_the_file(self):
+        session = attachments.start_upload(self.employee, 'race.bin', 8)
+        stale = UploadSession.objects.get(pk=session.pk)
+        attachments.append_chunk(session, 0, io.BytesIO(b'abcd'))
+        # Параллельный запрос с тем же offset проигрывает условный UPDATE
+        with self.assertRaises(attachments.UploadOffsetMismatch) as caught:
+            attachments.append_chunk(stale, 0, io.BytesIO(b'zzzz'))
+        self.assertEqual(caught.exception.expected, 4)
+        with open(attachments.session_path(session), 'rb') as part:
+            self.assertEqual(part.read(), b'abcd')
+
+
+class AttachmentDownloadTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings_override = override_settings(MEDIA_ROOT=self.media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.employee = make_user('worker')
+        task = make_task(self.employee)
+        self.task_file = attachments.attach_uploaded_file(task, SimpleUploadedFile('report.txt', b'0123456789'))
+        self.url = self.task_file.get_absolute_url()
+        self.client.force_login(self.employee)
+
+    def test_range_and_conditional_requests(self):
+        response = self.client.get(self.url, headers={'Range': 'bytes=2-5'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+        modified = self.client.get(self.url, headers={'If-Modified-Since': response['Last-Modified']})
+        self.assertEqual(modified.status_code, 304)
+        self.assertEqual(modified['ETag'], etag)
+        self.assertEqual(self.client.get(self.url, headers={'If-Match': '"old"'}).status_code, 412)
+        self.assertEqual(self.client.get(self.url, headers={'Range': 'bytes=20-'}).status_code, 416)
+        # Устаревший If-Range — отдаём файл целиком
+        full = self.client.get(self.url, headers={'Range': 'bytes=2-5', 'If-Range': '"old"'})
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(b''.join(full.streaming_content), b'0123456789')
+
+    def test_other_employee_cannot_download(self):
+        self.client.force_login(make_user('stranger'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    @override_settings(DEBUG=True)
+    def test_media_is_not_served_directly(self):
+        # urls.py читает DEBUG при импорте — перечитываем его с DEBUG=True
+        importlib.reload(project_urls)
+        clear_url_caches()
+        self.addCleanup(clear_url_caches)
+        self.addCleanup(importlib.reload, project_urls)
+        self.client.logout()
+        for name in (self.task_file.file.name, self.task_file.blob.file.name):
+            self.assertEqual(self.client.get(settings.MEDIA_URL + name).status_code, 404)
+
+    @override_settings(TODO_SENDFILE_BACKEND='nginx')
+    def test_nginx_offload(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.task_file.file.name)
+        self.assertEqual(response.content, b'')
+
+        self.task_file.file.name = 'attachments/отчёт за май?.txt'
+        response = HttpResponse()
+        downloads._offload(response, self.task_file)
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            '/protected-media/attachments/%D0%BE%D1%82%D1%87%D1%91%D1%82%20%D0%B7%D0%B0%20%D0%BC%D0%B0%D0%B9%3F.txt',
+        )
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.manager = make_user('boss', role='manager')
+        deadline = timezone.now() + timedelta(days=1)
+        # Одинаковые дедлайны: порядок внутри них задаёт id
+        self.tasks = [make_task(self.manager, title=f'Задача {i}', deadline=deadline) for i in range(25)]
+        self.client.force_login(self.manager)
+
+    def test_history_pages_cover_all_tasks_once(self):
+        seen, cursor = [], None
+        while True:
+            params = {'sort': 'deadline', **({'cursor': cursor} if cursor else {})}
+            page = self.client.get(reverse('todo:history_list'), params).context['page_obj']
+            seen.extend(task.pk for task in page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, sorted(task.pk for task in self.tasks))
+
+        back = self.client.get(reverse('todo:history_list'), {'sort': 'deadline', 'cursor': page.previous_cursor})
+        self.assertEqual([task.pk for task in back.context['page_obj']], seen[10:20])
+
+    def test_api_cursor_and_estimated_total(self):
+        url = reverse('todo:api_tasks')
+        first = self.client.get(url, {'limit': 20, 'count': 'estimate'}).json()
+        self.assertEqual(len(first['tasks']), 20)
+        self.assertEqual((first['estimated_total'], first['total_is_exact']), (25, True))
+        second = self.client.get(url, {'limit': 20, 'cursor': first['next_cursor']}).json()
+        self.assertEqual(len(second['tasks']), 5)
+        self.assertIsNone(second['next_cursor'])
+        self.assertFalse({t['id'] for t in first['tasks']} & {t['id'] for t in second['tasks']})
+        self.assertEqual(self.client.get(url, {'cursor': 'garbage'}).status_code, 400)
+
+
+class TaskSearchTests(TestCase):
+    def setUp(self):
+        self.manager = make_user('boss', role='manager')
+        self.employee = make_user('worker')
+        self.report = make_task(self.employee, self.manager, title='Квартальный отчёт', description='Собрать цифры продаж')
+        self.other = make_task(self.manager, title='Отчёты поставщиков')
+
+    def ids(self, user, query):
+        return set(search.search_task_ids(user, query))
+
+    def test_russian_word_forms_match(self):
+        self.assertEqual(self.ids(self.manager, 'отчетов'), {self.report.pk, self.other.pk})
+        self.assertEqual(self.ids(self.manager, 'продажи'), {self.report.pk})
+
+    def test_employee_sees_only_own_tasks(self):
+        self.assertEqual(self.ids(self.employee, 'отчёт'), {self.report.pk})
+
+    def test_index_follows_edits_comments_and_deletes(self):
+        Comment.objects.create(task=self.other, author=self.manager, text='Нужна сверка накладных')
+        self.assertEqual(self.ids(self.manager, 'накладная'), {self.other.pk})
+
+        self.report.title = 'Годовой бюджет'
+        self.report.save()
+        self.assertEqual(self.ids(self.manager, 'бюджета'), {self.report.pk})
+        self.assertNotIn(self.report.pk, self.ids(self.manager, 'квартальный'))
+
+        self.other.delete()
+        self.assertEqual(self.ids(self.manager, 'накладная'), set())
+
+    def test_migration_fills_index_for_existing_tasks(self):
+        if not search.available():
+            self.skipTest("индекса нет (SQLite без FTS5)")
+        # Задачи, созданные до миграции 0020, в индексе отсутствуют
+        search.remove_tasks([self.report.pk, self.other.pk])
+        self.assertEqual(self.ids(self.manager, 'отчёт'), set())
+        migration = importlib.import_module('todo.migrations.0026_fill_search_index')
+        migration.fill_search_index(django_apps, SimpleNamespace(connection=connection))
+        self.assertEqual(self.ids(self.manager, 'отчёт'), {self.report.pk, self.other.pk})
+
+    def test_search_api(self):
+        self.client.force_login(self.employee)
+        response = self.client.get(reverse('todo:api_task_search'), {'q': 'отчёт" *'})
+        self.assertEqual([task['id'] for task in response.json()['results']], [self.report.pk])
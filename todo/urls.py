@@ -19,7 +19,22 @@ urlpatterns = [
     path('tasks/<int:pk>/complete/', views.complete_task, name='task_complete'),
     path('tasks/<int:pk>/delete/', views.TaskDeleteView.as_view(), name='task_delete'),
     path('tasks/<int:file_id>/delete-file/', views.delete_file, name='delete_file'),
+    path('files/<int:file_id>/download/', views.download_file, name='download_file'),
+    path('api/uploads/', views.upload_start, name='upload_start'),
+    path('api/uploads/<uuid:upload_id>/', views.upload_chunk, name='upload_chunk'),
+    path('api/uploads/<uuid:upload_id>/complete/', views.upload_complete, name='upload_complete'),
+    path('tasks/search/', views.task_search, name='task_search'),
+    path('dashboard/', views.dashboard_view, name='dashboard'),
+    path('api/dashboard/', views.dashboard_json, name='api_dashboard'),
     path('api/tasks/', views.get_tasks_json, name='api_tasks'),
+    path('api/tasks/search/', views.search_tasks_json, name='api_task_search'),
+    path('api/tasks/bulk/', views.bulk_tasks, name='api_tasks_bulk'),
+    path('api/tasks/import/', views.import_tasks, name='api_tasks_import'),
+    path('api/export/', views.export_tasks, name='export'),
+    path('api/tasks/events/', views.task_events_stream, name='task_events'),
+    path('api/events/metrics/', views.event_bus_metrics, name='event_bus_metrics'),
+    path('api/cache/metrics/', views.render_cache_metrics, name='render_cache_metrics'),
+    path('api/profiling/metrics/', views.profiling_metrics, name='profiling_metrics'),
     
     # Calendar
     path('api/calendar-events/', views.get_calendar_events, name='calendar_events'),
@@ -30,6 +45,7 @@ urlpatterns = [
     # Telegram Users
     path('api/generate-telegram-link/', views.generate_telegram_link, name='generate_telegram_link'),
     path('unlink-telegram/', views.unlink_telegram, name='unlink_telegram'),
+    path('api/telegram/webhook/', views.telegram_webhook, name='telegram_webhook'),
 
     # Login, Logout 
     path('login/', LoginView.as_view(
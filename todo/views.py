@@ -1,17 +1,25 @@
+import asyncio
+import hashlib
 import json
 import secrets
+from functools import lru_cache
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
 from datetime import datetime, timedelta
 from collections import defaultdict
 from django.utils.crypto import get_random_string
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import never_cache
-from django.views.decorators.csrf import csrf_protect
-from django.urls import reverse_lazy
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import require_POST
+from django.urls import reverse, reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView,TemplateView, UpdateView, DeleteView
-import requests
 from todo.forms import CommentForm, CustomUserCreationForm, TaskForm
-from .models import TaskFile, UserModel, TaskModel, TelegramUserModel
+from . import attachments, bulk, dashboard, downloads, events, export, importer, notifications, profiling, push, render_cache, search
+from .db_router import read_only
+from .pagination import InvalidCursor, KeysetPaginationMixin, KeysetPaginator, estimate_count
+from .models import TaskFile, TaskTombstone, TelegramUpdate, UploadSession, UserModel, TaskModel, TelegramUserModel
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import render, redirect
 from django.contrib.sites.shortcuts import get_current_site
@@ -20,24 +28,36 @@ from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
 from django.core.mail import EmailMessage
 from django.contrib import messages
-from django.http import JsonResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Prefetch
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 
 
 # Create your views here.
-class UserListView(LoginRequiredMixin, ListView):
+class UserListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
+    read_only = True
     model = UserModel
     template_name = 'todo/users/list.html'
     context_object_name = 'users'
     paginate_by = 10
-    ordering = ['username']
+    ordering = 'username'
+
+    def get_queryset(self):
+        # Счётчики задач и Telegram — в том же запросе, что и сами пользователи
+        return UserModel.objects.with_task_counts().select_related('telegram_profile')
 
 class UserDetailView(DetailView):
     model = UserModel
     template_name = 'todo/users/detail.html'
     context_object_name = 'profile'
 
+    def get_queryset(self):
+        return UserModel.objects.with_task_counts().select_related('telegram_profile')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         user = self.request.user
@@ -55,92 +75,92 @@ class UserDetailView(DetailView):
         return context
 
 
-class TaskListView(LoginRequiredMixin, ListView):
+class TaskSortMixin(KeysetPaginationMixin):
+    null_defaults = {'assignee__first_name': ''}
+
+    def get_ordering(self):
+        sort_by = self.request.GET.get('sort', '-created_at')
+        return sort_by if sort_by in VALID_SORT_FIELDS else '-created_at'
+
+    def get_queryset(self):
+        # Только чтение: статус «просрочена» проставляет sweep_overdue,
+        # а до его прохода шаблон показывает task.effective_status.
+        # Порядок (поле сортировки + id) задаёт KeysetPaginator
+        return _visible_tasks(self.request.user)
+
+class TaskListView(LoginRequiredMixin, TaskSortMixin, ListView):
+    read_only = True
     model = TaskModel
     template_name = 'todo/tasks/list.html'
     context_object_name = 'tasks'
     paginate_by = 10
 
-    def get_queryset(self):
-        user = self.request.user
-        now = timezone.now()
-
-        # ШАГ 1: Обновляем статус "просроченных" задач
-        if user.role == 'employee':
-            # Обновляем только свои задачи
-            TaskModel.objects.filter(
-                assignee=user,
-                status__in=['new', 'in_progress'],  # Не завершённые
-                deadline__lt=now                    # Дедлайн прошёл
-            ).update(status='overdue')
-        else:
-            # Менеджер: обновляем все задачи
-            TaskModel.objects.filter(
-                status__in=['new', 'in_progress'],
-                deadline__lt=now
-            ).update(status='overdue')
-
-        # ШАГ 2: Получаем актуальные задачи
-        if user.role == 'employee':
-            queryset = TaskModel.objects.filter(assignee=user)
-        else:  # manager
-            queryset = TaskModel.objects.all()
-
-        # ШАГ 3: Сортировка (ваш код без изменений)
-        sort_by = self.request.GET.get('sort', '-created_at')
-        valid_sort_fields = [
-            'title', '-title',
-            'created_at', '-created_at',
-            'deadline', '-deadline',
-            'status', '-status',
-            'priority', '-priority',
-            'assignee__first_name', '-assignee__first_name'
-        ]
-        if sort_by in valid_sort_fields:
-            queryset = queryset.order_by(sort_by)
-        else:
-            queryset = queryset.order_by('-created_at')
-        
-        return queryset
-
-@method_decorator(never_cache, name='dispatch')
 class TaskDetailView(DetailView):
     model = TaskModel
     template_name = 'todo/tasks/detail.html'
     context_object_name = 'task'
+    # Комментарии — страницами по курсору (?comments=), от новых к старым
+    comments_per_page = 50
+
+    def get_queryset(self):
+        # Карточка, авторы, вложения и страница комментариев — фиксированное число запросов
+        return (
+            TaskModel.objects
+            .select_related('assignee', 'created_by')
+            .prefetch_related(Prefetch('files', queryset=TaskFile.objects.order_by('pk')))
+            .annotate(comment_count=Count('comments'))
+        )
+
     def get(self, request, *args, **kwargs):
         self.object = self.get_object()
-        now = timezone.now()
-
-        # Автообновление статуса
-        updated = False
 
-        # 1. Если задача новая → в работу (только для исполнителя)
-        if self.object.assignee == request.user and self.object.status == 'new':
+        # Если задача новая → в работу (только для исполнителя).
+        # Просрочку здесь не пишем: её показывает task.effective_status
+        if self.object.assignee_id == request.user.pk and self.object.status == 'new':
             self.object.status = 'in_progress'
-            updated = True
-
-        # 2. Если задача не завершена и дедлайн прошёл → просрочена
-        if self.object.status != 'completed' and self.object.deadline < now:
-            self.object.status = 'overdue'
-            updated = True
-
-        if updated:
-            self.object.save(update_fields=['status'])
-
-        context = self.get_context_data(object=self.object)
-        return self.render_to_response(context)
+            self.object.save(update_fields=['status', 'updated_at'])
+
+        # Повторный заход на неизменившуюся карточку — 304 без комментариев и рендера
+        etag = self.get_etag()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = self.render_to_response(self.get_context_data(object=self.object))
+        response['ETag'] = etag
+        # Страница личная (права, CSRF-токен), браузер хранит её, но перепроверяет по ETag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_etag(self):
+        """Всё, от чего зависит страница: задача, её комментарии и файлы, зритель и его CSRF-токен."""
+        task = self.object
+        raw = ':'.join(map(str, (
+            task.pk, task.updated_at.isoformat(), task.effective_status, task.comment_count,
+            ','.join(str(file.pk) for file in task.files.all()),
+            self.request.user.pk, getattr(self.request.user, 'role', ''), self.request.META.get('CSRF_COOKIE', ''),
+            self.request.GET.urlencode(),
+        )))
+        return f'"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+    def get_comments_page(self):
+        paginator = KeysetPaginator(
+            self.object.comments.select_related('author'), '-created_at', self.comments_per_page,
+        )
+        try:
+            return paginator.page(self.request.GET.get('comments'))
+        except InvalidCursor:
+            return paginator.page()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['comment_form'] = CommentForm()
+        context.setdefault('comment_form', CommentForm())
+        context['comments_page'] = self.get_comments_page()
         return context
 
     def post(self, request, *args, **kwargs):
-        task = self.get_object()
+        task = self.object = self.get_object()
 
         # Проверка прав
-        if not (request.user == task.assignee or request.user == task.created_by or request.user.role == 'manager'):
+        if not _can_attach(request.user, task):
             messages.error(request, "У вас нет прав для загрузки файлов к этой задаче.")
             return redirect('todo:task_detail', pk=task.pk)
 
@@ -155,16 +175,18 @@ class TaskDetailView(DetailView):
                 messages.success(request, "Комментарий добавлен.")
                 return redirect('todo:task_detail', pk=task.pk)
             else:
-                context = self.get_context_data()
-                context['comment_form'] = form
-                return self.render_to_response(context)
+                return self.render_to_response(self.get_context_data(object=task, comment_form=form))
 
         # Обработка файлов (если есть загрузка)
         elif 'files' in request.FILES:
             files = request.FILES.getlist('files')  # ← принимает несколько файлов!
-            for f in files:
-                TaskFile.objects.create(task=task, file=f)
-            messages.success(request, f"Загружено файлов: {len(files)}.")
+            try:
+                for f in files:
+                    attachments.attach_uploaded_file(task, f)
+            except ValidationError as e:
+                messages.error(request, e.messages[0])
+            else:
+                messages.success(request, f"Загружено файлов: {len(files)}.")
             return redirect('todo:task_detail', pk=task.pk)
 
         else:
@@ -185,99 +207,30 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
         if task.deadline and timezone.is_naive(task.deadline):
             task.deadline = timezone.make_aware(task.deadline)
 
-        task.save()
+        with transaction.atomic():
+            task.save()
 
-        # Обработка файлов
-        files = self.request.FILES.getlist('files')
-        for f in files:
-            TaskFile.objects.create(task=task, file=f)
+            # Обработка файлов
+            try:
+                for f in self.request.FILES.getlist('files'):
+                    attachments.attach_uploaded_file(task, f)
+            except ValidationError as e:
+                transaction.set_rollback(True)
+                form.add_error(None, e)
+                return self.form_invalid(form)
 
-        # ✅ ОТПРАВЛЯЕМ ЗАДАЧУ В TELEGRAM
-        self.send_task_to_telegram(task)
+            # ✅ Уведомление в Telegram уходит через очередь — запрос не ждёт API
+            notifications.notify_task_assigned(task)
 
         return redirect('todo:task_detail', pk=task.pk)
 
-    def send_task_to_telegram(self, task):
-        # Получаем Telegram ID исполнителя
-        if not hasattr(task.assignee, 'telegram_profile') or not task.assignee.telegram_profile:
-            return  # Нет Telegram — не отправляем
-
-        telegram_id = task.assignee.telegram_profile.telegram_id
-
-        # Формируем сообщение
-        message = (
-            f"✅ Новая задача!\n"
-            f"• {task.title}\n"
-            f"Дедлайн: {task.deadline.strftime('%d.%m.%Y %H:%M')}\n"
-            f"Приоритет: {task.get_priority_display()}\n"
-            f"Описание: {task.description[:50]}..."
-        )
-
-        # Отправляем через API бота
-        with open("settings.json", "r", encoding="utf-8") as f:
-            settings=json.load(f)
-    
-        bot_token = settings['telegram_bot_token']  # ← замените на реальный токен
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        payload = {
-            'chat_id': telegram_id,
-            'text': message,
-            'parse_mode': 'HTML'
-        }
-
-        try:
-            requests.post(url, data=payload, timeout=5)
-        except Exception as e:
-            print(f"Ошибка отправки в Telegram: {e}")
-
-class TaskHistoryListView(LoginRequiredMixin, ListView):
+class TaskHistoryListView(LoginRequiredMixin, TaskSortMixin, ListView):
+    read_only = True
     model = TaskModel
     template_name = 'todo/history/list.html'
     context_object_name = 'tasks'  
     paginate_by = 10
 
-    def get_queryset(self):
-        user = self.request.user
-        now = timezone.now()  # ← ТЕКУЩЕЕ ВРЕМЯ
-
-        # ШАГ 1: Сначала обновляем статус "просроченных" задач
-        if user.role == 'employee':
-            # Обновляем только свои задачи
-            TaskModel.objects.filter(
-                assignee=user,
-                status__in=['new', 'in_progress'],  # Только НЕ завершённые
-                deadline__lt=now                    # Дедлайн в прошлом
-            ).update(status='overdue')
-        else:
-            # Менеджер: обновляем все задачи, которые можно просрочить
-            TaskModel.objects.filter(
-                status__in=['new', 'in_progress'],
-                deadline__lt=now
-            ).update(status='overdue')
-
-        # ШАГ 2: Теперь получаем задачи для отображения
-        if user.role == 'employee':
-            queryset = TaskModel.objects.filter(assignee=user)
-        else:  # manager
-            queryset = TaskModel.objects.all()
-
-        # ШАГ 3: Сортировка (твой код без изменений)
-        sort_by = self.request.GET.get('sort', '-created_at')
-        valid_sort_fields = [
-            'title', '-title',
-            'created_at', '-created_at',
-            'deadline', '-deadline',
-            'status', '-status',
-            'priority', '-priority',
-            'assignee__first_name', '-assignee__first_name'
-        ]
-        if sort_by in valid_sort_fields:
-            queryset = queryset.order_by(sort_by)
-        else:
-            queryset = queryset.order_by('-created_at')
-        
-        return queryset
-
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['show_completed'] = True  # ← флаг для шаблона
@@ -297,16 +250,21 @@ class TaskUpdateView(LoginRequiredMixin, UpdateView):
         return data
 
     def form_valid(self, form):
-        task = form.save()
-        # Удаляем файлы, отмеченные для удаления
-        for file in task.files.all():
-            field_name = f"delete_file_{file.id}"
-            if self.request.POST.get(field_name):
-                file.delete()
-        # Добавляем новые файлы
-        files = self.request.FILES.getlist('files')
-        for f in files:
-            TaskFile.objects.create(task=task, file=f)
+        with transaction.atomic():
+            task = form.save()
+            # Удаляем файлы, отмеченные для удаления
+            for file in task.files.all():
+                field_name = f"delete_file_{file.id}"
+                if self.request.POST.get(field_name):
+                    file.delete()
+            # Добавляем новые файлы
+            try:
+                for f in self.request.FILES.getlist('files'):
+                    attachments.attach_uploaded_file(task, f)
+            except ValidationError as e:
+                transaction.set_rollback(True)
+                form.add_error(None, e)
+                return self.form_invalid(form)
         return super().form_valid(form)
 
 class TaskDeleteView(DeleteView):
@@ -370,78 +328,456 @@ def delete_file(request, file_id):
     except TaskFile.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Файл не найден'}, status=404)
     
+def _can_attach(user, task):
+    return user == task.assignee or user == task.created_by or user.role == 'manager'
+
+@read_only
 @login_required
-def get_tasks_json(request):
-    active_statuses = ['new', 'in_progress', 'overdue']  # ← ЗАВЕРШЁННЫЕ ИСКЛЮЧЕНЫ!
-    if request.user.role == 'employee':
-        tasks = TaskModel.objects.filter(assignee=request.user, status__in=active_statuses)
-    else:  # manager
-        tasks = TaskModel.objects.filter(status__in=active_statuses)
+def download_file(request, file_id):
+    """Скачивание вложения с проверкой доступа к задаче (Range, ETag, X-Accel-Redirect)."""
+    try:
+        task_file = TaskFile.objects.get(pk=file_id, task__in=_visible_tasks(request.user))
+    except TaskFile.DoesNotExist:
+        raise Http404
+    if not task_file.file.storage.exists(task_file.file.name):
+        raise Http404
+    return downloads.serve(request, task_file)
+
+@login_required
+@require_POST
+def upload_start(request):
+    """Начало загрузки по частям: {"filename", "size"} → {"id", "offset", "chunk_size"}."""
+    try:
+        data = json.loads(request.body)
+        filename, size = str(data['filename']), int(data['size'])
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Ожидались filename и size'}, status=400)
+    try:
+        session = attachments.start_upload(request.user, filename, size)
+    except ValidationError as e:
+        return JsonResponse({'success': False, 'error': e.messages[0]}, status=413)
+    return JsonResponse({
+        'success': True, 'id': str(session.pk), 'offset': 0, 'chunk_size': attachments.upload_chunk_size(),
+    }, status=201)
+
+@login_required
+def upload_chunk(request, upload_id):
+    """GET — сколько уже получено; PUT с заголовком Upload-Offset — следующая часть; DELETE — отмена."""
+    try:
+        session = UploadSession.objects.get(pk=upload_id, user=request.user)
+    except UploadSession.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Загрузка не найдена'}, status=404)
+
+    if request.method == 'GET':
+        return JsonResponse({'success': True, 'offset': session.offset, 'size': session.size})
+    if request.method == 'DELETE':
+        attachments.discard_upload(session)
+        return JsonResponse({'success': True})
+    if request.method != 'PUT':
+        return HttpResponse(status=405)
+
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Нужен заголовок Upload-Offset'}, status=400)
+    try:
+        # Тело читается из request потоком, без request.body
+        offset = attachments.append_chunk(session, offset, request)
+    except attachments.UploadOffsetMismatch as e:
+        return JsonResponse({'success': False, 'error': str(e), 'offset': e.expected}, status=409)
+    except ValidationError as e:
+        return JsonResponse({'success': False, 'error': e.messages[0]}, status=413)
+    except UploadSession.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Загрузка не найдена'}, status=404)
+    return JsonResponse({'success': True, 'offset': offset, 'size': session.size})
+
+@login_required
+@require_POST
+def upload_complete(request, upload_id):
+    """Прикрепляет полностью загруженный файл к задаче {"task_id"}."""
+    try:
+        session = UploadSession.objects.get(pk=upload_id, user=request.user)
+        task = TaskModel.objects.get(pk=int(json.loads(request.body)['task_id']))
+    except (UploadSession.DoesNotExist, TaskModel.DoesNotExist):
+        return JsonResponse({'success': False, 'error': 'Не найдено'}, status=404)
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Ожидался task_id'}, status=400)
+    if not _can_attach(request.user, task):
+        return JsonResponse({'success': False, 'error': 'Нет доступа'}, status=403)
+    try:
+        task_file = attachments.complete_upload(session, task)
+    except attachments.UploadOffsetMismatch as e:
+        return JsonResponse({'success': False, 'error': 'Файл загружен не полностью', 'offset': e.expected}, status=409)
+    except ValidationError as e:
+        return JsonResponse({'success': False, 'error': e.messages[0]}, status=413)
+    return JsonResponse({
+        'success': True, 'id': task_file.pk, 'name': task_file.display_name, 'url': task_file.get_absolute_url(),
+    }, status=201)
+
+def _visible_tasks(user):
+    if user.role == 'employee':
+        return TaskModel.objects.filter(assignee=user)
+    return TaskModel.objects.all()
+
+
+def _visible_tombstones(user):
+    if user.role == 'employee':
+        return TaskTombstone.objects.filter(assignee_id=user.pk)
+    return TaskTombstone.objects.all()
+
+
+def _tasks_state(request):
+    """Момент последнего изменения видимых пользователю задач (кешируется на запрос)."""
+    if not hasattr(request, '_tasks_state'):
+        last_change = _visible_tasks(request.user).aggregate(last=Max('updated_at'))['last']
+        last_delete = _visible_tombstones(request.user).aggregate(last=Max('deleted_at'))['last']
+        request._tasks_state = max(filter(None, [last_change, last_delete]), default=None)
+    return request._tasks_state
+
+
+def _parse_since(request):
+    since = parse_datetime(request.GET.get('since', ''))
+    if since is None or timezone.is_naive(since):
+        return None
+    # Отметки об удалении старше срока хранения уже вычищены — дельту не собрать
+    if since < timezone.now() - TaskTombstone.RETENTION:
+        return None
+    return since
+
+
+def delta_sync_overlap():
+    """Насколько раньше курсора since перечитывать изменения (см. _tasks_payload)."""
+    return timedelta(seconds=getattr(settings, 'TODO_DELTA_SYNC_OVERLAP', 60))
+
+
+ACTIVE_STATUSES = TaskModel.ACTIVE_STATUSES  # ← ЗАВЕРШЁННЫЕ ИСКЛЮЧЕНЫ!
+VALID_SORT_FIELDS = [
+    'title', '-title',
+    'created_at', '-created_at',
+    'deadline', '-deadline',
+    'status', '-status',
+    'priority', '-priority',
+    'assignee__first_name', '-assignee__first_name'
+]
+# Подписи считаем один раз, а не через get_*_display() на каждую строку
+STATUS_LABELS = dict(TaskModel.STATUS_CHOICES)
+PRIORITY_LABELS = dict(TaskModel.PRIORITY_CHOICES)
+# Цвета в соответствии с требованиями
+PRIORITY_COLORS = {
+    'low': '#10b981',      # Зелёный
+    'medium': '#f59e0b',   # Жёлтый
+    'high': '#ef4444',     # Ярко-красный
+    'urgent': '#dc2626',   # Тёмно-красный
+}
+# Только нужные колонки, имена — через JOIN в том же запросе
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+TASK_API_FIELDS = (
+    'id', 'title', 'description', 'status', 'priority',
+    'deadline', 'created_at', 'created_by__first_name',
+)
+
+
+@lru_cache(maxsize=None)
+def _task_detail_url_template():
+    return reverse('todo:task_detail', args=[0]).replace('/0/', '/{}/')
+
+
+def _json_content(data):
+    # ensure_ascii=False: кириллица идёт как UTF-8, а не \uXXXX — ответ вдвое меньше
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def _fast_json_response(data):
+    return HttpResponse(_json_content(data), content_type='application/json')
+
+
+def _tasks_payload(request, since):
+    """Тело ответа get_tasks_json и срок (в секундах), через который оно устареет само:
+    ближайший дедлайн, после которого задача покажется просроченной."""
+    is_manager = request.user.role == 'manager'
+    if since is None:
+        tasks = _visible_tasks(request.user).filter(status__in=ACTIVE_STATUSES)
+    else:
+        # Дельта: всё, что изменилось после since (включая завершённые — их клиент уберёт).
+        # updated_at ставится до коммита, и транзакция, закоммиченная позже (просрочка,
+        # пакетные операции, импорт), может записать время раньше уже выданного курсора.
+        # Поэтому перечитываем и окно перед since: повтор задачи клиенту безвреден
+        changed_after = since - delta_sync_overlap()
+        tasks = _visible_tasks(request.user).filter(updated_at__gt=changed_after)
 
     # ДОБАВЬТЕ СОРТИРОВКУ
     sort_by = request.GET.get('sort', '-created_at')
-    valid_sort_fields = [
-        'title', '-title',
-        'created_at', '-created_at',
-        'deadline', '-deadline',
-        'status', '-status',
-        'priority', '-priority',
-        'assignee__first_name', '-assignee__first_name'
-    ]
-    if sort_by in valid_sort_fields:
-        tasks = tasks.order_by(sort_by)
+    if sort_by not in VALID_SORT_FIELDS:
+        sort_by = '-created_at'
+    fields = TASK_API_FIELDS + ('assignee__first_name',) if is_manager else TASK_API_FIELDS
+
+    # Постранично (?limit= и/или ?cursor=) — только полный список; дельта и так маленькая
+    page = None
+    if since is None and ('limit' in request.GET or 'cursor' in request.GET):
+        try:
+            limit = min(max(int(request.GET.get('limit', API_PAGE_SIZE)), 1), API_MAX_PAGE_SIZE)
+        except ValueError:
+            limit = API_PAGE_SIZE
+        paginator = KeysetPaginator(tasks, sort_by, limit, null_default=TaskSortMixin.null_defaults.get(sort_by.lstrip('-')))
+        page = paginator.page(request.GET.get('cursor'), values_list=fields)
+        rows = page.object_list
     else:
-        tasks = tasks.order_by('-created_at')
-    
+        rows = tasks.order_by(sort_by).values_list(*fields)
+
+    current_tz = timezone.get_current_timezone()
+    now = timezone.now()
+    next_overdue = None
     tasks_data = []
-    for task in tasks:
+    removed = set()
+    for row in rows:
+        task_id, title, description, status, priority, deadline, created_at, creator = row[:8]
+        if status not in ACTIVE_STATUSES:
+            removed.add(task_id)
+            continue
+        if status in TaskModel.OVERDUE_CANDIDATE_STATUSES:
+            if deadline < now:
+                # Дедлайн уже прошёл, но sweep_overdue ещё не отработал
+                status = 'overdue'
+            elif next_overdue is None or deadline < next_overdue:
+                next_overdue = deadline
         task_dict = {
-            'id': task.id,
-            'title': task.title,
-            'status': task.status,
-            'status_display': task.get_status_display(),
-            'priority': task.priority,
-            'priority_display': task.get_priority_display(),
-            'created_by__first_name': task.created_by.first_name if task.created_by else "—",
-            'deadline': timezone.localtime(task.deadline).strftime('%d.%m.%Y %H:%M'),
-            'description': task.description or "",  # ← ДОБАВЛЯЕМ description
+            'id': task_id,
+            'title': title,
+            'status': status,
+            'status_display': STATUS_LABELS.get(status, status),
+            'priority': priority,
+            'priority_display': PRIORITY_LABELS.get(priority, priority),
+            'created_by__first_name': creator if creator is not None else "—",
+            'deadline': deadline.astimezone(current_tz).strftime('%d.%m.%Y %H:%M'),
+            'deadline_iso': deadline.isoformat(),
+            'created_at': created_at.isoformat(),
+            'description': description or "",  # ← ДОБАВЛЯЕМ description
         }
         # Добавляем исполнителя ТОЛЬКО если пользователь — менеджер
-        if request.user.role == 'manager':
-            task_dict['assignee__first_name'] = task.assignee.first_name if task.assignee else "—"
+        if is_manager:
+            task_dict['assignee__first_name'] = row[8] or "—"
         tasks_data.append(task_dict)
 
-    return JsonResponse({
+    if since is not None:
+        returned_ids = {task['id'] for task in tasks_data}
+        removed.update(
+            task_id for task_id in _visible_tombstones(request.user)
+            .filter(deleted_at__gt=changed_after)
+            .values_list('task_id', flat=True)
+            if task_id not in returned_ids
+        )
+
+    state = _tasks_state(request)
+    data = {
         'tasks': tasks_data,
-        'user_is_manager': request.user.role == 'manager'  # ← добавляем флаг
+        'removed': sorted(removed),
+        'full': since is None,
+        'since': state.isoformat() if state else None,  # ← курсор для следующего опроса
+        'user_is_manager': is_manager  # ← добавляем флаг
+    }
+    if page is not None:
+        data['next_cursor'] = page.next_cursor
+        data['previous_cursor'] = page.previous_cursor
+        if request.GET.get('count') == 'estimate':
+            # Вместо точного COUNT(*): оценка планировщика (PostgreSQL) или подсчёт до предела
+            data['estimated_total'], data['total_is_exact'] = estimate_count(tasks)
+    ttl = None
+    if next_overdue is not None:
+        ttl = max(int((next_overdue - now).total_seconds()), 0)
+    return _json_content(data), ttl
+
+
+@read_only
+@login_required
+def get_tasks_json(request):
+    since = _parse_since(request)
+    try:
+        if since is None:
+            # Полный список одинаков для всех опросов, пока задачи не меняются (todo/render_cache.py)
+            variant = '&'.join(f'{key}={request.GET.get(key, "")}' for key in ('sort', 'limit', 'cursor', 'count'))
+            content = render_cache.get_or_build('tasks', request.user, variant, lambda: _tasks_payload(request, None))
+        else:
+            content = _tasks_payload(request, since)[0]
+    except InvalidCursor:
+        return JsonResponse({'error': 'Некорректный cursor'}, status=400)
+    # ETag — по самому ответу: время последнего изменения не заметит задачу, закоммиченную
+    # позже с более ранним updated_at, а содержимое (с окном перед since) — заметит
+    etag = f'"{hashlib.md5(content.encode()).hexdigest()}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    # Браузер хранит ответ, но каждый раз перепроверяет его по ETag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+# Раз в столько секунд шлём комментарий-пинг, чтобы прокси не рвали тихое соединение
+PUSH_KEEPALIVE_SECONDS = 25
+
+
+async def task_events_stream(request):
+    """SSE-поток событий о задачах. Работает только под ASGI (todo_comp.asgi)."""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+    if 'wsgi.version' in request.META:
+        # Под WSGI поток занял бы рабочий поток навсегда — клиент перейдёт на опрос
+        return HttpResponse("Push-канал доступен только под ASGI", status=503)
+
+    subscription = push.get_backend().subscribe()
+
+    async def stream():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=PUSH_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ': ping\n\n'
+                    continue
+                if event is push.RESYNC:
+                    yield 'event: resync\ndata: {}\n\n'
+                elif push.is_visible(event, user):
+                    yield f'event: task\ndata: {json.dumps(event)}\n\n'
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx не должен буферизовать поток
+    return response
+
+SEARCH_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+
+@read_only
+@login_required
+def search_tasks_json(request):
+    """Поиск по названию, описанию и комментариям среди видимых пользователю задач."""
+    try:
+        limit = min(max(int(request.GET.get('limit', SEARCH_LIMIT)), 1), SEARCH_MAX_LIMIT)
+    except ValueError:
+        limit = SEARCH_LIMIT
+    url_template = _task_detail_url_template()
+    current_tz = timezone.get_current_timezone()
+    results = [
+        {
+            'id': task.pk,
+            'title': task.title,
+            'status': task.effective_status,
+            'status_display': STATUS_LABELS.get(task.effective_status, task.effective_status),
+            'deadline': task.deadline.astimezone(current_tz).strftime('%d.%m.%Y %H:%M'),
+            'url': url_template.format(task.pk),
+        }
+        for task in search.search_tasks(request.user, request.GET.get('q', ''), limit)
+    ]
+    return _fast_json_response({'results': results})
+
+@read_only
+@login_required
+def dashboard_view(request):
+    """Сводка руководителя: нагрузка, возраст просрочки, завершённые по неделям (todo/dashboard.py)."""
+    if request.user.role != 'manager':
+        messages.error(request, "Сводка доступна только руководителям.")
+        return redirect('todo:task_list')
+    summary = dashboard.data()
+    weeks = [datetime.fromisoformat(day).strftime('%d.%m') for day in summary['weeks']]
+    return render(request, 'todo/tasks/dashboard.html', {
+        'summary': summary,
+        'status_totals': [(code, label, summary['totals']['by_status'][code]) for code, label in summary['statuses'].items()],
+        'priorities': summary['priorities'].items(),
+        'weeks': weeks,
+        'throughput': zip(weeks, summary['totals']['throughput']),
+        'aging': zip(summary['aging_buckets'], summary['totals']['aging']),
     })
 
+@read_only
 @login_required
-def get_calendar_events(request):
-    active_statuses = ['new', 'in_progress', 'overdue']
-    if request.user.role == 'employee':
-        tasks = TaskModel.objects.filter(assignee=request.user, status__in=active_statuses)
-    else:
-        tasks = TaskModel.objects.filter(status__in=active_statuses)
-
-    # Цвета в соответствии с требованиями
-    priority_colors = {
-        'low': '#10b981',      # Зелёный
-        'medium': '#f59e0b',   # Жёлтый
-        'high': '#ef4444',     # Ярко-красный
-        'urgent': '#dc2626',   # Тёмно-красный
-    }
+def dashboard_json(request):
+    if request.user.role != 'manager':
+        return JsonResponse({'error': 'Нет доступа'}, status=403)
+    return _fast_json_response(dashboard.data())
 
-    events = []
-    for task in tasks:
-        events.append({
-            'title': task.title,
-            'start': task.deadline.isoformat(),
-            'url': reverse_lazy('todo:task_detail', args=[task.id]),
-            'backgroundColor': priority_colors.get(task.priority, '#6c757d'),
+@read_only
+@login_required
+def task_search(request):
+    query = request.GET.get('q', '').strip()
+    tasks = search.search_tasks(request.user, query, SEARCH_MAX_LIMIT) if query else []
+    return render(request, 'todo/tasks/search.html', {'query': query, 'tasks': tasks})
+
+def _calendar_payload(user):
+    tasks = _visible_tasks(user).filter(status__in=ACTIVE_STATUSES)
+    url_template = _task_detail_url_template()
+
+    events = [
+        {
+            'title': title,
+            'start': deadline.isoformat(),
+            'url': url_template.format(task_id),
+            'backgroundColor': PRIORITY_COLORS.get(priority, '#6c757d'),
             'borderColor': 'transparent',
-        })
-    return JsonResponse(events, safe=False)
+        }
+        for task_id, title, deadline, priority in tasks.values_list('id', 'title', 'deadline', 'priority')
+    ]
+    return _json_content(events), None
+
+@read_only
+@login_required
+def get_calendar_events(request):
+    content = render_cache.get_or_build('calendar', request.user, '', lambda: _calendar_payload(request.user))
+    return HttpResponse(content, content_type='application/json')
+
+@csrf_exempt
+@require_POST
+async def telegram_webhook(request):
+    """Приём апдейтов от Telegram. Только сохраняет их — обрабатывают воркеры run_bot.
+
+    Асинхронный: под ASGI запрос не занимает поток, пока идёт запись в БД.
+    """
+    secret = settings.TELEGRAM_WEBHOOK_SECRET
+    if not secret:
+        raise Http404
+    if not secrets.compare_digest(request.headers.get('X-Telegram-Bot-Api-Secret-Token', ''), secret):
+        return HttpResponse(status=403)
+    try:
+        payload = json.loads(request.body)
+        update_id = int(payload['update_id'])
+    except (ValueError, KeyError, TypeError):
+        return HttpResponse(status=400)
+    await sync_to_async(_store_telegram_update)(update_id, payload)
+    return HttpResponse(status=200)
+
+def _store_telegram_update(update_id, payload):
+    try:
+        with transaction.atomic():
+            TelegramUpdate.objects.create(update_id=update_id, payload=payload)
+    except IntegrityError:
+        # Telegram повторил доставку — апдейт уже в очереди
+        pass
+
+@staff_member_required
+def event_bus_metrics(request):
+    """Глубина очередей, задержка и счётчики подписчиков шины событий."""
+    return JsonResponse(events.bus.metrics())
+
+@staff_member_required
+def render_cache_metrics(request):
+    """Попадания и промахи кэша списка задач и календаря (в этом процессе)."""
+    return JsonResponse(render_cache.metrics())
+
+def profiling_metrics(request):
+    """Метрики ProfilingMiddleware в формате Prometheus: для staff или по Bearer-токену."""
+    if not profiling.enabled():
+        raise Http404
+    token = settings.TODO_PROFILING_METRICS_TOKEN
+    authorized = request.user.is_staff or (
+        token and secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    )
+    if not authorized:
+        return HttpResponse(status=403)
+    return HttpResponse(profiling.metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 @login_required
 def complete_task(request, pk):
@@ -460,6 +796,70 @@ def complete_task(request, pk):
     
     return redirect('todo:task_list')
 
+@login_required
+def export_tasks(request):
+    """Потоковая выгрузка (todo/export.py): ?dataset=tasks|comments|files&format=csv|jsonl|xlsx
+    и фильтры status (можно несколько), assignee, date_from, date_to."""
+    dataset = request.GET.get('dataset', 'tasks')
+    format_name = request.GET.get('format', 'csv')
+    if dataset not in export.DATASETS or format_name not in export.FORMATS:
+        return JsonResponse({'error': 'Неизвестный dataset или format'}, status=400)
+    try:
+        filters = export.parse_filters({
+            'status': request.GET.getlist('status'),
+            **{key: request.GET.get(key) for key in ('assignee', 'date_from', 'date_to')},
+        })
+    except ValidationError as e:
+        return JsonResponse({'error': e.messages[0]}, status=400)
+    writer, content = export.export(dataset, format_name, _visible_tasks(request.user), **filters)
+    response = StreamingHttpResponse(content, content_type=writer.content_type)
+    response['Content-Disposition'] = f'attachment; filename="{export.filename(dataset, format_name)}"'
+    return response
+
+@login_required
+@require_POST
+def bulk_tasks(request):
+    """Пакетные операции над задачами (todo/bulk.py): {"operations": [...]}. Только для руководителей."""
+    if request.user.role != 'manager':
+        return JsonResponse({'error': 'Нет доступа'}, status=403)
+    # Пачка на 10 000 задач больше DATA_UPLOAD_MAX_MEMORY_SIZE: читаем поток со своим пределом.
+    # Content-Length может не быть (chunked) или он неверный — читаем не больше предела + 1 байт
+    limit = bulk.max_body_size()
+    try:
+        declared = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return JsonResponse({'error': 'Некорректный Content-Length'}, status=400)
+    if declared > limit:
+        return JsonResponse({'error': 'Слишком большой запрос'}, status=413)
+    body = request.read(limit + 1)
+    if len(body) > limit:
+        return JsonResponse({'error': 'Слишком большой запрос'}, status=413)
+    try:
+        operations = json.loads(body)['operations']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Ожидался JSON с полем operations'}, status=400)
+    try:
+        result = bulk.apply(operations, request.user)
+    except bulk.BulkValidationError as e:
+        return JsonResponse(e.as_dict(), status=400)
+    return JsonResponse(result.as_dict())
+
+@login_required
+@require_POST
+def import_tasks(request):
+    """Импорт задач из загруженного CSV/JSONL (todo/importer.py). Только для руководителей."""
+    if request.user.role != 'manager':
+        return JsonResponse({'error': 'Нет доступа'}, status=403)
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'error': 'Ожидался файл в поле file'}, status=400)
+    format_name = request.POST.get('format') or importer.detect_format(upload.name)
+    try:
+        result = importer.import_tasks(upload, format_name, request.user, dry_run=bool(request.POST.get('dry_run')))
+    except importer.ImportFormatError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(result.as_dict())
+
 @login_required
 def generate_telegram_link(request):
     if request.method == "POST":
@@ -0,0 +1,165 @@
+"""
+Конфигурация из settings.json: читается один раз при старте, проверяется pydantic
+и отдаётся неизменяемым объектом — get_config().
+
+Файл ищется рядом с manage.py (а не в текущем каталоге); другой путь — переменная
+окружения TODO_SETTINGS_FILE. Любое скалярное поле можно переопределить переменной
+TODO_<ИМЯ ПОЛЯ>, например TODO_TELEGRAM_BOT_TOKEN или TODO_SMTP_PORT.
+
+SIGHUP перечитывает файл (без перезапуска процесса): значения из RELOADABLE сразу
+попадают в django.conf.settings, остальные (SECRET_KEY, токен бота, база,
+включение профилирования) применяются только после перезапуска — об этом пишется
+предупреждение. Если новый файл не прошёл проверку, остаётся прежняя конфигурация.
+"""
+import json
+import logging
+import os
+import signal
+import threading
+from pathlib import Path
+from typing import Any, Literal
+
+from django.core.exceptions import ImproperlyConfigured
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+ENV_PREFIX = 'TODO_'
+
+
+class AppConfig(BaseModel):
+    # Имена ключей в settings.json исторические (SECRET_KEY, smtp_HOST…) — это алиасы полей
+    model_config = ConfigDict(frozen=True, populate_by_name=True, extra='ignore')
+
+    secret_key: str = Field(alias='SECRET_KEY', min_length=1)
+    telegram_bot_token: str = Field(min_length=1)
+    telegram_bot_username: str = 'company_task_bot'
+    # Секрет webhook-а (заголовок X-Telegram-Bot-Api-Secret-Token); пусто — webhook выключен
+    telegram_webhook_secret: str = ''
+    # Как бот получает апдейты (run_bot, run_all.py); пусто — webhook, если задан секрет, иначе polling
+    telegram_bot_mode: Literal['', 'webhook', 'polling'] = ''
+
+    smtp_backend: str = Field('django.core.mail.backends.smtp.EmailBackend', alias='smtp_BACKEND')
+    smtp_host: str = Field('localhost', alias='smtp_HOST')
+    smtp_port: int = Field(25, alias='smtp_PORT', gt=0, lt=65536)
+    smtp_use_ssl: bool = Field(False, alias='smtp_USE_SSL')
+    smtp_host_user: str = Field('', alias='smtp_HOST_USER')
+    smtp_host_password: str = Field('', alias='smtp_HOST_PASSWORD')
+    smtp_default_from_email: str = Field('webmaster@localhost', alias='smtp_DEFAULT_FROM_EMAIL')
+
+    profiling: bool = False
+    profiling_sample_rate: float = Field(1.0, ge=0, le=1)
+    profiling_metrics_token: str = ''
+
+    # Параметры PostgreSQL, см. todo_comp/database.py (там же переменные TODO_DB_*)
+    database: dict[str, Any] = Field(default_factory=dict)
+
+
+# Поле конфигурации -> настройка Django, которую можно поменять на лету
+RELOADABLE = {
+    'telegram_bot_username': 'TELEGRAM_BOT_USERNAME',
+    'telegram_webhook_secret': 'TELEGRAM_WEBHOOK_SECRET',
+    'smtp_backend': 'EMAIL_BACKEND',
+    'smtp_host': 'EMAIL_HOST',
+    'smtp_port': 'EMAIL_PORT',
+    'smtp_use_ssl': 'EMAIL_USE_SSL',
+    'smtp_host_user': 'EMAIL_HOST_USER',
+    'smtp_host_password': 'EMAIL_HOST_PASSWORD',
+    'smtp_default_from_email': 'DEFAULT_FROM_EMAIL',
+    'profiling_sample_rate': 'TODO_PROFILING_SAMPLE_RATE',
+    'profiling_metrics_token': 'TODO_PROFILING_METRICS_TOKEN',
+}
+
+
+def settings_path(environ=None):
+    environ = os.environ if environ is None else environ
+    return Path(environ.get(ENV_PREFIX + 'SETTINGS_FILE') or BASE_DIR / 'settings.json')
+
+
+def _environment_overrides(environ):
+    overrides = {}
+    for name, field in AppConfig.model_fields.items():
+        if field.annotation in (str, int, float, bool):
+            value = environ.get(ENV_PREFIX + name.upper())
+            if value is not None:
+                overrides[field.alias or name] = value
+    return overrides
+
+
+def load(path=None, environ=None):
+    """Читает и проверяет конфигурацию. Ошибки — ImproperlyConfigured с понятным текстом."""
+    environ = os.environ if environ is None else environ
+    path = Path(path) if path is not None else settings_path(environ)
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        raise ImproperlyConfigured(f"Не найден файл настроек {path}")
+    except ValueError as exc:
+        raise ImproperlyConfigured(f"{path}: некорректный JSON ({exc})")
+    # Из файла — только известные ключи; переменные окружения важнее файла
+    values = {
+        (field.alias or name): data[field.alias or name]
+        for name, field in AppConfig.model_fields.items() if (field.alias or name) in data
+    }
+    values.update(_environment_overrides(environ))
+    try:
+        return AppConfig.model_validate(values)
+    except ValidationError as exc:
+        problems = '; '.join(
+            f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors()
+        )
+        raise ImproperlyConfigured(f"{path}: {problems}")
+
+
+_lock = threading.Lock()
+_current = None
+
+
+def get_config():
+    """Текущая конфигурация; файл читается только при первом обращении и по SIGHUP."""
+    global _current
+    if _current is None:
+        with _lock:
+            if _current is None:
+                _current = load()
+    return _current
+
+
+def reload():
+    """Перечитывает файл и применяет изменяемые на лету значения. Возвращает новую конфигурацию."""
+    global _current
+    from django.conf import settings
+
+    with _lock:
+        try:
+            new = load()
+        except ImproperlyConfigured as exc:
+            logger.error("❌ Конфигурация не перечитана, остаётся прежняя: %s", exc)
+            return _current
+        old, _current = _current, new
+    for name, setting in RELOADABLE.items():
+        setattr(settings, setting, getattr(new, name))
+    if old is not None:
+        restart = [
+            name for name in AppConfig.model_fields
+            if name not in RELOADABLE and getattr(old, name) != getattr(new, name)
+        ]
+        if restart:
+            logger.warning("Изменения вступят в силу после перезапуска: %s", ', '.join(restart))
+    logger.info("✅ Конфигурация перечитана из %s", settings_path())
+    return new
+
+
+def install_reload_handler():
+    """Перечитывать конфигурацию по SIGHUP. Только из главного потока и там, где SIGHUP есть."""
+    if not hasattr(signal, 'SIGHUP') or threading.current_thread() is not threading.main_thread():
+        return False
+
+    def handle(signum, frame):
+        # Сам обработчик ничего не читает и не логирует: прерванный им код мог держать те же блокировки
+        threading.Thread(target=reload, name='config-reload', daemon=True).start()
+
+    signal.signal(signal.SIGHUP, handle)
+    return True
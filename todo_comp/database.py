@@ -0,0 +1,116 @@
+"""
+Настройки PostgreSQL для DATABASES.
+
+Берутся из блока "database" в settings.json; переменные окружения TODO_DB_* важнее
+(удобно для контейнеров и секретов). Пример:
+
+    "database": {
+        "engine": "postgresql",
+        "name": "todo", "user": "todo", "password": "...",
+        "host": "db", "port": 5432,
+        "pool": {"min_size": 2, "max_size": 10, "timeout": 10},
+        "read_host": "db-replica",
+        "disable_server_side_cursors": false
+    }
+
+Без блока (или с "engine": "sqlite") остаётся SQLite — см. todo_comp/settings.py.
+
+Пул соединений — psycopg_pool (pip install -r requirements-postgres.txt). Пул свой у
+каждого процесса: при N воркерах gunicorn плюс run_bot к базе может прийти до
+(N + 1) * max_size соединений — max_connections сервера должно хватать.
+Если перед базой стоит pgbouncer в режиме transaction, включите
+disable_server_side_cursors: .iterator() иначе открывает курсоры, которые
+pgbouncer между транзакциями не сохраняет.
+"""
+
+ENV_PREFIX = 'TODO_DB_'
+
+DEFAULTS = {
+    'engine': 'sqlite',
+    'name': 'todo',
+    'user': '',
+    'password': '',
+    'host': 'localhost',
+    'port': 5432,
+    'read_host': '',
+    'disable_server_side_cursors': False,
+    'pool': {'min_size': 2, 'max_size': 10, 'timeout': 10},
+}
+
+# Переменная окружения -> (ключ, ключ внутри pool или None)
+ENV_KEYS = {
+    'ENGINE': ('engine', None),
+    'NAME': ('name', None),
+    'USER': ('user', None),
+    'PASSWORD': ('password', None),
+    'HOST': ('host', None),
+    'PORT': ('port', None),
+    'READ_HOST': ('read_host', None),
+    'DISABLE_SERVER_SIDE_CURSORS': ('disable_server_side_cursors', None),
+    'POOL_MIN_SIZE': ('pool', 'min_size'),
+    'POOL_MAX_SIZE': ('pool', 'max_size'),
+    'POOL_TIMEOUT': ('pool', 'timeout'),
+}
+
+
+def _flag(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
+def load_config(config=None, environ=None):
+    """Итоговые параметры базы: DEFAULTS, поверх них settings.json, поверх — окружение."""
+    config = config or {}
+    environ = environ or {}
+    result = dict(DEFAULTS, **{key: value for key, value in config.items() if key != 'pool'})
+    result['pool'] = dict(DEFAULTS['pool'], **config.get('pool', {}))
+    for suffix, (key, pool_key) in ENV_KEYS.items():
+        value = environ.get(ENV_PREFIX + suffix)
+        if value is None:
+            continue
+        if pool_key is None:
+            result[key] = value
+        else:
+            result['pool'][pool_key] = value
+    result['engine'] = str(result['engine']).lower()
+    result['port'] = int(result['port'])
+    result['disable_server_side_cursors'] = _flag(result['disable_server_side_cursors'])
+    result['pool'] = {
+        'min_size': int(result['pool']['min_size']),
+        'max_size': int(result['pool']['max_size']),
+        'timeout': float(result['pool']['timeout']),
+    }
+    return result
+
+
+def is_postgresql(config):
+    return config['engine'] in ('postgresql', 'postgres')
+
+
+def postgres_databases(config):
+    """DATABASES для PostgreSQL: 'default' и 'read' (реплика или тот же сервер только на чтение)."""
+
+    def alias(host, read_only=False):
+        options = {
+            # Пул держит соединения сам; CONN_MAX_AGE с ним должен быть 0
+            'pool': dict(config['pool']),
+        }
+        if read_only:
+            # Аналог PRAGMA query_only у SQLite: запись из read-only страницы упадёт
+            options['options'] = '-c default_transaction_read_only=on'
+        return {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config['name'],
+            'USER': config['user'],
+            'PASSWORD': config['password'],
+            'HOST': host,
+            'PORT': config['port'],
+            'CONN_MAX_AGE': 0,
+            'DISABLE_SERVER_SIDE_CURSORS': config['disable_server_side_cursors'],
+            'OPTIONS': options,
+        }
+
+    read = alias(config['read_host'] or config['host'], read_only=True)
+    read['TEST'] = {'MIRROR': 'default'}
+    return {'default': alias(config['host']), 'read': read}
@@ -11,11 +11,11 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-import json
-from django.conf import settings
+import os
+from todo_comp import config, database
 
-with open("settings.json", "r", encoding="utf-8") as f:
-    settings=json.load(f)
+# settings.json рядом с manage.py, проверенный и с переопределениями из окружения (todo_comp/config.py)
+CONFIG = config.get_config()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -25,7 +25,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = settings['SECRET_KEY']
+SECRET_KEY = CONFIG.secret_key
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
@@ -48,11 +48,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'todo.profiling.ProfilingMiddleware',  # первым: учитывает и запросы остальных middleware
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'todo.db_router.ReadOnlyViewMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -83,12 +85,55 @@ WSGI_APPLICATION = 'todo_comp.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite пишут сразу несколько потоков и процессов (сайт, бот, sweep_overdue):
+#   WAL — читатели не ждут писателя и наоборот;
+#   synchronous=NORMAL — в режиме WAL база не портится, при сбое питания теряется
+#     разве что последняя транзакция;
+#   timeout — сколько секунд ждать занятую базу вместо «database is locked»;
+#   transaction_mode IMMEDIATE — транзакция сразу берёт блокировку записи: иначе
+#     транзакция, начавшая с чтения, при первой записи получает SQLITE_BUSY без ожидания.
+SQLITE_INIT_COMMAND = ';'.join([
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=268435456',  # 256 МБ
+    'PRAGMA cache_size=-32000',    # ~32 МБ страничного кэша на соединение
+    'PRAGMA temp_store=MEMORY',
+])
+SQLITE_TIMEOUT = 20
+
+# PostgreSQL — блок "database" в settings.json или переменные TODO_DB_* (см. todo_comp/database.py)
+DATABASE_CONFIG = database.load_config(CONFIG.database, os.environ)
+if database.is_postgresql(DATABASE_CONFIG):
+    DATABASES = database.postgres_databases(DATABASE_CONFIG)
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            # Соединение живёт между запросами; перед повторным использованием проверяется
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'timeout': SQLITE_TIMEOUT,
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': SQLITE_INIT_COMMAND,
+            },
+        },
+        # Только чтение для страниц с @read_only (todo/db_router.py): тот же файл, отдельное соединение
+        'read': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'timeout': SQLITE_TIMEOUT,
+                'init_command': SQLITE_INIT_COMMAND + ';PRAGMA query_only=ON',
+            },
+            'TEST': {'MIRROR': 'default'},
+        },
     }
-}
+DATABASE_ROUTERS = ['todo.db_router.ReadOnlyViewRouter']
+TODO_READ_DATABASE = 'read'
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -119,21 +164,101 @@ LOGIN_REDIRECT_URL = 'todo:task_list'
 LOGOUT_REDIRECT_URL = 'todo:task_list'
 
 
-TELEGRAM_BOT_TOKEN = settings['telegram_bot_token']
-TELEGRAM_BOT_USERNAME = "company_task_bot"  # ← замени на своё
+# Значения из config.RELOADABLE перечитываются по SIGHUP без перезапуска
+TELEGRAM_BOT_TOKEN = CONFIG.telegram_bot_token
+TELEGRAM_BOT_USERNAME = CONFIG.telegram_bot_username
+# Секрет webhook-а (заголовок X-Telegram-Bot-Api-Secret-Token); пусто — webhook выключен
+TELEGRAM_WEBHOOK_SECRET = CONFIG.telegram_webhook_secret
+# webhook — апдейты складывает views.telegram_webhook, разбирают воркеры bot_runner; polling — getUpdates.
+# Одновременно работать оба не могут: пока webhook установлен, Telegram отвечает на getUpdates ошибкой
+TELEGRAM_BOT_MODE = CONFIG.telegram_bot_mode or ('webhook' if CONFIG.telegram_webhook_secret else 'polling')
+
+EMAIL_BACKEND = CONFIG.smtp_backend
+EMAIL_HOST = CONFIG.smtp_host
+EMAIL_PORT = CONFIG.smtp_port
+EMAIL_USE_SSL = CONFIG.smtp_use_ssl
+EMAIL_HOST_USER = CONFIG.smtp_host_user
+EMAIL_HOST_PASSWORD = CONFIG.smtp_host_password
+DEFAULT_FROM_EMAIL = CONFIG.smtp_default_from_email
+
+
+# Push-уведомления о задачах (SSE, только под ASGI: todo_comp.asgi:application).
+# Для нескольких воркеров: 'todo.push.RedisPushBackend' и TODO_PUSH_OPTIONS = {'url': 'redis://...'}
+TODO_PUSH_BACKEND = 'todo.push.InMemoryPushBackend'
+TODO_PUSH_OPTIONS = {}
+
 
-EMAIL_BACKEND = settings['smtp_BACKEND']
-EMAIL_HOST = settings['smtp_HOST']
-EMAIL_PORT = settings['smtp_PORT']
-EMAIL_USE_SSL = settings['smtp_USE_SSL']
-EMAIL_HOST_USER = settings['smtp_HOST_USER']
-EMAIL_HOST_PASSWORD = settings['smtp_HOST_PASSWORD']
-DEFAULT_FROM_EMAIL = settings['smtp_DEFAULT_FROM_EMAIL']
+# Шина доменных событий (todo/events.py): размер очереди каждого подписчика
+TODO_EVENT_QUEUE_SIZE = 1000
+
+# Письма исполнителю о новой задаче и постановщику о завершённой (подписчик email шины,
+# настройки SMTP — выше)
+TODO_EMAIL_NOTIFICATIONS = False
+
+# Кэш. Для нескольких процессов (gunicorn, отдельный run_bot) — общий бэкенд, например
+# {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379/1'}
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'todo',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+# Кэш JSON списка задач и календаря (todo/render_cache.py): алиас из CACHES (None — выключен)
+# и время жизни записи в секундах. Метрики: /api/cache/metrics/
+TODO_RENDER_CACHE = 'default'
+TODO_RENDER_CACHE_TIMEOUT = 300
+
+# Дельта-синхронизация /api/tasks/?since=: на сколько секунд раньше курсора перечитывать
+# изменения — транзакция, закоммиченная позже, может записать более ранний updated_at
+TODO_DELTA_SYNC_OVERLAP = 60
+
+# Профилирование запросов (todo/profiling.py). Выключено — middleware не подключается вовсе.
+# Метрики Prometheus: /api/profiling/metrics/ (staff или заголовок Authorization: Bearer <токен>),
+# сводка журнала: python manage.py profile_report
+TODO_PROFILING = CONFIG.profiling
+TODO_PROFILING_SAMPLE_RATE = CONFIG.profiling_sample_rate
+TODO_PROFILING_SLOW_QUERY_MS = 100
+TODO_PROFILING_DUPLICATE_THRESHOLD = 5  # столько одинаковых SQL за запрос — это N+1
+TODO_PROFILING_LOG = BASE_DIR / 'logs' / 'profiling.jsonl'
+TODO_PROFILING_LOG_MAX_BYTES = 10 * 1024 * 1024
+TODO_PROFILING_LOG_BACKUP_COUNT = 5
+TODO_PROFILING_METRICS_TOKEN = CONFIG.profiling_metrics_token
+
+# Пакетные операции /api/tasks/bulk/ и python manage.py bulk_tasks (todo/bulk.py):
+# предел операций в одной пачке и размера тела запроса
+TODO_BULK_MAX_OPERATIONS = 10_000
+TODO_BULK_MAX_BODY_SIZE = 20 * 1024 * 1024
+
+# Хранить счётчики задач пользователей в отдельной таблице (O(1) на чтение для больших команд).
+# После включения один раз выполнить: python manage.py rebuild_task_counters
+TODO_DENORMALIZED_TASK_COUNTERS = False
+
+# Сводка руководителя (/dashboard/, todo/dashboard.py) из таблиц, которые ведутся приращениями.
+# Таблицы заполняет миграция 0024; если флаг включают позже, один раз выполнить
+# python manage.py rebuild_dashboard. Фоновая проверка просрочки сверяет сводку с задачами
+# при запуске и затем раз в TODO_DASHBOARD_RECONCILE_INTERVAL секунд
+TODO_DASHBOARD_SUMMARY = True
+TODO_DASHBOARD_RECONCILE_INTERVAL = 3600
 
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Вложения (todo/attachments.py): предельный размер файла, размер одной части при
+# загрузке по частям и каталог для недокачанных файлов.
+# Файлы без ссылок удаляет: python manage.py gc_attachments
+TODO_UPLOAD_MAX_SIZE = 512 * 1024 * 1024
+TODO_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+TODO_UPLOAD_TEMP_DIR = MEDIA_ROOT / 'uploads'
+
+# Скачивание вложений (todo/downloads.py). None — файлы отдаёт Django;
+# 'nginx' — X-Accel-Redirect на TODO_SENDFILE_URL_PREFIX (internal location с alias на MEDIA_ROOT);
+# 'apache' — X-Sendfile. MEDIA_URL наружу не публикуется (и при DEBUG): доступ проверяет Django.
+TODO_SENDFILE_BACKEND = None
+TODO_SENDFILE_URL_PREFIX = '/protected-media/'
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -1,14 +1,11 @@
-from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import RedirectView
 
+# MEDIA_URL не публикуется даже при DEBUG: в MEDIA_ROOT лежат вложения (task_files/, blobs/)
+# и недокачанные загрузки (uploads/) — их отдаёт только todo.views.download_file с проверкой прав
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include(('todo.urls', 'todo'), namespace='todo')),
     path('', RedirectView.as_view(pattern_name='todo:task_list'), name='home'),
-]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+]
\ No newline at end of file